@@ -0,0 +1,141 @@
+#aggregator.py
+
+import os
+import json
+import polars as pl
+from pathlib import Path
+from threading import Lock
+from datetime import datetime
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+from app.processor import hash_dataframe
+from app.metrics import incrementar
+
+logger = configurar_logger('aggregator')
+
+AGREGADOS_DIR = Path(os.getenv("AGREGADOS_DIR", "cache/agregados"))
+TOP_N = 5
+MAX_EN_MEMORIA = 16
+
+#caché en memoria {(hash_datos, top_n): agregados} + clave del último cálculo
+_cache = {}
+_ultima_clave = None
+_lock_cache = Lock()
+
+
+def _metricas(top_n: int, agrupado: bool = True) -> list:
+    """Expresiones de agregación comunes a todos los niveles de agrupación."""
+    top = pl.col("pais").sort_by("poblacion_2024", descending=True).head(top_n)
+    return [
+        pl.col("poblacion_2024").sum().alias("poblacion_total"),
+        pl.col("poblacion_2024").mean().alias("poblacion_promedio"),
+        pl.col("poblacion_2024").median().alias("poblacion_mediana"),
+        pl.len().alias("paises"),
+        #cambio % ponderado por población: sum(cambio * pob) / sum(pob con cambio)
+        (
+            (pl.col("cambio_porcentual") * pl.col("poblacion_2024")).sum()
+            / pl.col("poblacion_2024").filter(pl.col("cambio_porcentual").is_not_null()).sum()
+        ).alias("cambio_ponderado"),
+        #dentro de agg() la lista se arma sola; en un select global hay que implotarla
+        (top if agrupado else top.implode()).alias("top")
+    ]
+
+
+def calcular_agregados(df: pl.DataFrame, top_n: int = TOP_N) -> dict:
+    """
+    Calcula los agregados global, por continente y por región en una sola
+    ejecución de polars (los tres planes comparten el escaneo del DataFrame).
+
+    Returns:
+        dict: {global, continentes: [...], regiones: [...]}
+    """
+    lf = df.lazy()
+    metricas = _metricas(top_n)
+
+    global_, continentes, regiones = pl.collect_all([
+        lf.select(_metricas(top_n, agrupado=False)),
+        lf.group_by("continente").agg(metricas).sort("poblacion_total", descending=True),
+        lf.group_by(["continente", "region"]).agg(metricas).sort("poblacion_total", descending=True)
+    ])
+
+    return {
+        "global": global_.to_dicts()[0],
+        "continentes": continentes.to_dicts(),
+        "regiones": regiones.to_dicts()
+    }
+
+
+def _ruta_cache(hash_datos: str, top_n: int) -> Path:
+    return AGREGADOS_DIR / f"{hash_datos[:32]}_top{top_n}.json"
+
+
+def obtener_agregados(df: pl.DataFrame, top_n: int = TOP_N) -> dict:
+    """
+    Retorna los agregados del DataFrame desde la caché (memoria, luego disco)
+    o los calcula y los guarda si es la primera vez que se ven estos datos.
+
+    Returns:
+        dict: agregados con 'hash' y 'generado'
+    """
+    global _ultima_clave
+
+    hash_datos = hash_dataframe(df)
+    #el top por grupo depende de top_n: mismos datos con otro top_n es otra entrada
+    clave = (hash_datos, top_n)
+
+    with _lock_cache:
+        if clave in _cache:
+            logger.info(f"📦 agregados en caché (memoria): {hash_datos[:12]} top {top_n}")
+            incrementar("cache_consultas_total", cache="agregados", resultado="hit")
+            _ultima_clave = clave
+            return _cache[clave]
+
+    ruta = _ruta_cache(hash_datos, top_n)
+    if ruta.exists():
+        with open(ruta, 'r', encoding='utf-8') as f:
+            agregados = json.load(f)
+        ruta.touch()
+        logger.info(f"📦 agregados en caché (disco): {hash_datos[:12]} top {top_n}")
+        incrementar("cache_consultas_total", cache="agregados", resultado="hit")
+    else:
+        logger.info(f"   calculando agregados por continente y región ({df.height} países)...")
+        incrementar("cache_consultas_total", cache="agregados", resultado="miss")
+        agregados = calcular_agregados(df, top_n)
+        agregados["hash"] = hash_datos
+        agregados["top_n"] = top_n
+        agregados["generado"] = datetime.now().isoformat()
+
+        AGREGADOS_DIR.mkdir(parents=True, exist_ok=True)
+        temporal = ruta_temporal(ruta)
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(agregados, f, ensure_ascii=False)
+        temporal.replace(ruta)
+
+    with _lock_cache:
+        if len(_cache) >= MAX_EN_MEMORIA:
+            #descartar el más antiguo (los dict mantienen orden de inserción)
+            _cache.pop(next(iter(_cache)))
+        _cache[clave] = agregados
+        _ultima_clave = clave
+
+    return agregados
+
+
+def obtener_ultimos_agregados():
+    """
+    Retorna los agregados más recientes sin recalcular nada.
+
+    Returns:
+        dict: agregados del último DataFrame procesado (o del más reciente en disco)
+        None: si todavía no se calculó ninguno
+    """
+    with _lock_cache:
+        if _ultima_clave is not None:
+            return _cache[_ultima_clave]
+
+    guardados = sorted(AGREGADOS_DIR.glob("*.json"), key=lambda ruta: ruta.stat().st_mtime)
+    if not guardados:
+        return None
+
+    with open(guardados[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,15 @@
+#archivos.py
+
+import os
+import uuid
+from pathlib import Path
+
+
+def ruta_temporal(ruta: Path) -> Path:
+    """
+    Archivo temporal junto a ruta para escribir y luego hacer replace atómico.
+    El nombre es único por proceso y llamada: dos pipelines que escriben el
+    mismo archivo a la vez no se pisan el temporal.
+    """
+    ruta = Path(ruta)
+    return ruta.with_name(f"{ruta.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
@@ -0,0 +1,193 @@
+#async_extractor.py
+
+import time
+import asyncio
+from playwright.async_api import async_playwright
+from app.logger import configurar_logger
+from app.extractor import URL_POBLACION, COLUMNAS, PERFILES_CARGA, columnas_a_filas, resolver_perfil
+
+logger = configurar_logger('async_extractor')
+
+MAX_CONCURRENCIA = 4
+TIMEOUT_FUENTE_SEG = 45
+
+#tabla de población que usa el pipeline (motor 'async' del extractor);
+#otras fuentes siguen el mismo formato:
+#  nombre: clave del resultado
+#  url: página a abrir
+#  selector: selector css de las filas de la tabla
+#  columnas: {nombre_columna: índice de celda <td>}
+FUENTE_POBLACION_ONU = {
+    "nombre": "poblacion_onu",
+    "url": URL_POBLACION,
+    "selector": "table.wikitable tbody tr",
+    "columnas": {columna: i for i, columna in enumerate(COLUMNAS)}
+}
+
+#recorre las filas y arma arrays por columna según el mapeo {columna: índice};
+#las filas de encabezado (solo <th>) o incompletas se cuentan como inválidas
+_JS_EXTRAER_MAPEO = """
+([selector, mapeo]) => {
+    const filas = document.querySelectorAll(selector);
+    const nombres = Object.keys(mapeo);
+    const minimo = Math.max(...Object.values(mapeo)) + 1;
+    const datos = {};
+    nombres.forEach(c => datos[c] = []);
+    let invalidas = 0;
+
+    for (const fila of filas) {
+        const celdas = fila.querySelectorAll("td");
+        if (celdas.length < minimo) {
+            invalidas++;
+            continue;
+        }
+        nombres.forEach(c => datos[c].push(celdas[mapeo[c]].innerText.trim()));
+    }
+
+    return {total_filas: filas.length, columnas: datos, invalidas: invalidas};
+}
+"""
+
+
+def _validar_fuente(fuente: dict):
+    """Verifica que la definición de fuente tenga los campos requeridos."""
+    faltantes = [campo for campo in ("nombre", "url", "selector", "columnas") if not fuente.get(campo)]
+    if faltantes:
+        raise ValueError(f"fuente inválida, faltan campos: {', '.join(faltantes)}")
+
+
+async def _bloquear_recursos(page, perfil: dict):
+    """Aborta los tipos de recurso que el perfil de carga no necesita."""
+    bloquear = perfil["bloquear"]
+    if not bloquear:
+        return
+
+    async def _enrutar(route):
+        if route.request.resource_type in bloquear:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", _enrutar)
+
+
+async def _leer_fuente(browser, fuente: dict, perfil: dict) -> dict:
+    """
+    Abre la fuente en un contexto nuevo y extrae su tabla.
+
+    Returns:
+        dict: {datos, total_filas, filas_invalidas}
+    """
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await _bloquear_recursos(page, perfil)
+
+        await page.goto(fuente["url"], wait_until=perfil["esperar"])
+        await page.wait_for_selector(fuente["selector"], state="attached")
+
+        resultado = await page.evaluate(_JS_EXTRAER_MAPEO, [fuente["selector"], fuente["columnas"]])
+        return {
+            "datos": columnas_a_filas(resultado["columnas"]),
+            "total_filas": resultado["total_filas"],
+            "filas_invalidas": resultado["invalidas"]
+        }
+    finally:
+        await context.close()
+
+
+async def _extraer_fuente(browser, fuente: dict, semaforo, timeout_seg: float, perfil: dict) -> dict:
+    """
+    Extrae una fuente respetando el tope de concurrencia y su timeout.
+
+    Returns:
+        dict: {estado, datos, duracion_seg, error, ...}; nunca lanza excepción
+    """
+    nombre = fuente.get("nombre", fuente.get("url"))
+
+    async with semaforo:
+        inicio = time.time()
+        try:
+            _validar_fuente(fuente)
+            logger.info(f"  [{nombre}] navegando a: {fuente['url']}")
+
+            resultado = await asyncio.wait_for(
+                _leer_fuente(browser, fuente, perfil),
+                timeout=fuente.get("timeout_seg", timeout_seg)
+            )
+            duracion = time.time() - inicio
+            logger.info(f"  ✅ [{nombre}] {len(resultado['datos'])} filas en {duracion:.2f} segundos")
+
+            estado = "EXITOSO" if resultado["datos"] else "VACIO"
+            return {"estado": estado, "duracion_seg": round(duracion, 3), "error": None, **resultado}
+
+        except asyncio.TimeoutError:
+            duracion = time.time() - inicio
+            logger.error(f"  ❌ [{nombre}] timeout tras {duracion:.1f} segundos")
+            return {"estado": "TIMEOUT", "datos": [], "duracion_seg": round(duracion, 3), "error": "timeout"}
+
+        except Exception as e:
+            duracion = time.time() - inicio
+            logger.error(f"  ❌ [{nombre}] {type(e).__name__}: {e}")
+            return {"estado": "FALLIDO", "datos": [], "duracion_seg": round(duracion, 3), "error": str(e)}
+
+
+async def extraer_fuentes_async(
+    fuentes: list,
+    max_concurrencia: int = MAX_CONCURRENCIA,
+    timeout_seg: float = TIMEOUT_FUENTE_SEG,
+    perfil: str = "ligero"
+) -> dict:
+    """
+    Extrae varias tablas en paralelo con un solo navegador y un contexto por fuente.
+
+    Args:
+        fuentes: lista de definiciones {nombre, url, selector, columnas[, timeout_seg]}
+        max_concurrencia: páginas abiertas al mismo tiempo como máximo
+        timeout_seg: timeout por fuente (si la fuente no define el suyo)
+        perfil: nombre en PERFILES_CARGA
+
+    Returns:
+        dict: {nombre_fuente: resultado}; una fuente que falla no afecta a las demás
+    """
+    logger.info("=" * 60)
+    logger.info(f"EXTRACCIÓN MULTI-FUENTE: {len(fuentes)} fuentes (concurrencia {max_concurrencia})")
+    logger.info("=" * 60)
+
+    nombres = [fuente.get("nombre", fuente.get("url")) for fuente in fuentes]
+    if len(set(nombres)) != len(nombres):
+        raise ValueError("los nombres de las fuentes deben ser únicos")
+
+    inicio = time.time()
+    config_perfil = PERFILES_CARGA[resolver_perfil(perfil)]
+    semaforo = asyncio.Semaphore(max_concurrencia)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            resultados = await asyncio.gather(*[
+                _extraer_fuente(browser, fuente, semaforo, timeout_seg, config_perfil)
+                for fuente in fuentes
+            ])
+        finally:
+            await browser.close()
+
+    por_fuente = dict(zip(nombres, resultados))
+
+    exitosas = sum(1 for r in resultados if r["estado"] == "EXITOSO")
+    logger.info("=" * 60)
+    logger.info("EXTRACCIÓN MULTI-FUENTE COMPLETADA")
+    logger.info(f"  fuentes exitosas: {exitosas}/{len(fuentes)}")
+    logger.info(f"  duración total: {time.time() - inicio:.2f} segundos")
+    logger.info("=" * 60)
+
+    return por_fuente
+
+
+def extraer_fuentes(fuentes: list, **kwargs) -> dict:
+    """
+    Versión síncrona de extraer_fuentes_async; la usa el motor 'async' del
+    extractor (pipeline en hilos de trabajo o handlers sync de la API).
+    No debe llamarse desde dentro de un event loop en ejecución.
+    """
+    return asyncio.run(extraer_fuentes_async(fuentes, **kwargs))
@@ -0,0 +1,283 @@
+#browser_pool.py
+
+import os
+import time
+import contextvars
+from queue import Queue
+from threading import Thread, Lock
+from concurrent.futures import Future, TimeoutError as FuturoTimeout
+from app.logger import configurar_logger
+from app.metrics import observar
+
+logger = configurar_logger('browser_pool')
+
+#configuración (sobrescribible por variables de entorno)
+POOL_TAMAÑO = int(os.getenv("BROWSER_POOL_SIZE", "2"))            #máximo de páginas simultáneas
+POOL_MAX_USOS = int(os.getenv("BROWSER_POOL_MAX_USES", "50"))     #reciclar navegador tras N usos
+POOL_TIMEOUT_SEG = float(os.getenv("BROWSER_POOL_TIMEOUT", "120"))
+
+# Variables globales
+_cola_tareas = Queue()
+_trabajadores = []
+_lock = Lock()          #ciclo de vida: _pool_activo, _trabajadores, _trabajadores_vivos y la cola
+_lock_estado = Lock()   #contadores de _estado
+_pool_activo = False
+_trabajadores_vivos = 0
+_estado = {
+    "lanzamientos": 0,
+    "reciclajes": 0,
+    "usos_totales": 0,
+    "paginas_activas": 0,
+    "navegadores_sanos": 0,
+    "ultimo_lanzamiento_seg": None
+}
+
+
+def _actualizar_estado(**cambios):
+    """Aplica incrementos al estado compartido del pool."""
+    with _lock_estado:
+        for clave, delta in cambios.items():
+            _estado[clave] += delta
+
+
+def _lanzar_navegador(p, indice):
+    """Lanza un chromium headless y registra el costo de arranque."""
+    inicio = time.time()
+    browser = p.chromium.launch(headless=True)
+    duracion = time.time() - inicio
+    observar("navegador_lanzamiento_segundos", duracion)
+
+    with _lock_estado:
+        _estado["lanzamientos"] += 1
+        _estado["navegadores_sanos"] += 1
+        _estado["ultimo_lanzamiento_seg"] = round(duracion, 3)
+
+    logger.info(f"🚀 navegador #{indice} lanzado en {duracion:.2f} segundos")
+    return browser
+
+
+def _cerrar_navegador(browser, indice):
+    """Cierra un navegador ignorando errores si ya estaba caído."""
+    if browser is None:
+        return
+
+    _actualizar_estado(navegadores_sanos=-1)
+    try:
+        browser.close()
+    except Exception as e:
+        logger.warning(f"⚠️    error al cerrar navegador #{indice}: {e}")
+
+
+def _vaciar_cola():
+    """
+    Descarta lo que quedó en la cola (llamar con _lock tomado): las tareas
+    fallan de inmediato y los None de cierre sobrantes se eliminan.
+    """
+    while not _cola_tareas.empty():
+        tarea = _cola_tareas.get_nowait()
+        if tarea is not None and tarea[1].set_running_or_notify_cancel():
+            tarea[1].set_exception(RuntimeError("el pool de navegadores no está disponible"))
+
+
+def _retirar_trabajador(indice: int):
+    """
+    Un hilo del pool terminó sin poder atender tareas. Si era el último, el
+    pool se desactiva (el extractor pasa a lanzar un navegador por llamada) y
+    las tareas en cola fallan de inmediato en lugar de esperar el timeout.
+    """
+    global _trabajadores_vivos, _pool_activo
+
+    with _lock:
+        _trabajadores_vivos -= 1
+        ultimo = _trabajadores_vivos <= 0 and _pool_activo
+        if ultimo:
+            _pool_activo = False
+            #todos los hilos terminaron: un iniciar_pool posterior arranca de cero
+            _trabajadores.clear()
+            _vaciar_cola()
+
+    if ultimo:
+        logger.error("❌ ningún navegador del pool pudo iniciar, pool desactivado")
+
+
+def _trabajador(indice: int, max_usos: int):
+    """
+    Hilo dueño de un navegador. Playwright sync no es thread-safe, así que
+    cada navegador vive y se usa siempre desde el mismo hilo.
+    """
+    try:
+        #playwright se importa recién al lanzar el primer navegador (arranque rápido de la API)
+        from playwright.sync_api import sync_playwright
+        p = sync_playwright().start()
+    except Exception as e:
+        logger.error(f"❌ no se pudo iniciar playwright para el navegador #{indice}: {e}")
+        _retirar_trabajador(indice)
+        return
+
+    try:
+        _atender_tareas(p, indice, max_usos)
+    finally:
+        p.stop()
+
+
+def _atender_tareas(p, indice: int, max_usos: int):
+    """Loop del hilo: toma tareas de la cola hasta recibir None."""
+    browser = None
+    usos = 0
+
+    try:
+        browser = _lanzar_navegador(p, indice)
+    except Exception as e:
+        logger.error(f"❌ no se pudo lanzar navegador #{indice}: {e}")
+
+    while True:
+        tarea = _cola_tareas.get()
+        if tarea is None:
+            break
+
+        funcion, futuro = tarea
+        if not futuro.set_running_or_notify_cancel():
+            continue
+
+        try:
+            #health check: relanzar si el navegador murió o llegó al límite de usos
+            if browser is None or not browser.is_connected():
+                logger.warning(f"⚠️    navegador #{indice} no responde, relanzando...")
+                _cerrar_navegador(browser, indice)
+                #si el relanzamiento falla, no conservar (ni volver a cerrar) el navegador caído
+                browser = None
+                browser = _lanzar_navegador(p, indice)
+                usos = 0
+            elif usos >= max_usos:
+                logger.info(f"♻️  reciclando navegador #{indice} tras {usos} usos")
+                _cerrar_navegador(browser, indice)
+                browser = None
+                browser = _lanzar_navegador(p, indice)
+                _actualizar_estado(reciclajes=1)
+                usos = 0
+
+            #contexto nuevo por tarea: sin cookies ni caché compartidos entre reportes
+            context = browser.new_context()
+            _actualizar_estado(paginas_activas=1)
+            try:
+                page = context.new_page()
+                futuro.set_result(funcion(page))
+            finally:
+                _actualizar_estado(paginas_activas=-1)
+                context.close()
+
+            usos += 1
+            _actualizar_estado(usos_totales=1)
+
+        except Exception as e:
+            if not futuro.done():
+                futuro.set_exception(e)
+
+    _cerrar_navegador(browser, indice)
+
+
+def iniciar_pool(tamaño: int = POOL_TAMAÑO, max_usos: int = POOL_MAX_USOS):
+    """
+    Arranca los hilos del pool; cada uno lanza su navegador en background.
+
+    Args:
+        tamaño: número de navegadores (= tope de páginas simultáneas)
+        max_usos: usos tras los cuales se recicla cada navegador
+    """
+    global _pool_activo, _trabajadores_vivos
+
+    #activo antes de arrancar los hilos: uno que falle al iniciar lo desactiva
+    #recién cuando este bloque suelta _lock
+    with _lock:
+        if _pool_activo:
+            return
+
+        _pool_activo = True
+        _trabajadores_vivos = tamaño
+
+        for indice in range(tamaño):
+            hilo = Thread(target=_trabajador, args=(indice, max_usos), daemon=True)
+            hilo.start()
+            _trabajadores.append(hilo)
+
+    logger.info(f"✅ pool de navegadores iniciado ({tamaño} navegadores, reciclaje cada {max_usos} usos)")
+
+
+def detener_pool(timeout: float = 10):
+    """Cierra todos los navegadores del pool."""
+    global _pool_activo
+
+    with _lock:
+        activo, _pool_activo = _pool_activo, False
+        hilos = list(_trabajadores)
+        for _ in hilos:
+            _cola_tareas.put(None)
+
+    if activo:
+        logger.info("🛑 Deteniendo pool de navegadores...")
+
+    #fuera de _lock: un hilo que termina con error lo necesita en _retirar_trabajador
+    for hilo in hilos:
+        hilo.join(timeout=timeout)
+
+    with _lock:
+        _trabajadores[:] = [hilo for hilo in _trabajadores if hilo not in hilos]
+        #None de hilos que ya habían terminado y tareas que nadie tomó
+        if not _pool_activo:
+            _vaciar_cola()
+
+    if activo:
+        logger.info("✅ pool de navegadores detenido")
+
+
+def pool_activo() -> bool:
+    """Indica si hay un pool disponible para recibir tareas."""
+    return _pool_activo
+
+
+def ejecutar_con_pagina(funcion, timeout: float = POOL_TIMEOUT_SEG):
+    """
+    Ejecuta funcion(page) en una página de un contexto nuevo del pool.
+
+    Args:
+        funcion: callable que recibe una page de playwright
+        timeout: segundos máximos de espera (incluye la cola)
+
+    Returns:
+        lo que retorne funcion
+
+    Raises:
+        RuntimeError: si el pool no está iniciado
+        TimeoutError: si no terminó a tiempo (si seguía en cola, se cancela)
+    """
+    #el hilo del navegador hereda el contexto (ej. el perfil activo de profiler)
+    contexto = contextvars.copy_context()
+    futuro = Future()
+
+    #con _lock: un pool que se desactiva vacía la cola después de este put, no antes
+    with _lock:
+        if not _pool_activo:
+            raise RuntimeError("el pool de navegadores no está iniciado")
+        _cola_tareas.put((lambda page: contexto.run(funcion, page), futuro))
+
+    try:
+        return futuro.result(timeout=timeout)
+    except FuturoTimeout:
+        #en cola: el hilo la descarta al tomarla; ya corriendo: termina, pero nadie la espera
+        if not futuro.cancel():
+            logger.warning("⚠️    tarea del pool excedió el timeout mientras corría en un navegador")
+        raise TimeoutError(f"el pool de navegadores no respondió en {timeout} segundos") from None
+
+
+def obtener_estado_pool():
+    """Retorna el estado actual del pool de navegadores."""
+    with _lock_estado:
+        estado = dict(_estado)
+
+    with _lock:
+        estado.update({
+            "activo": _pool_activo,
+            "hilos_vivos": sum(1 for hilo in _trabajadores if hilo.is_alive()),
+            "tareas_en_cola": _cola_tareas.qsize()
+        })
+    return estado
@@ -0,0 +1,219 @@
+#charts.py
+
+import os
+import io
+import json
+import time
+import hashlib
+import multiprocessing
+from pathlib import Path
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+
+logger = configurar_logger('charts')
+
+GRAFICOS_DIR = Path(os.getenv("GRAFICOS_DIR", "cache/graficos"))
+#límites de la caché de PNG (por último uso: un acierto renueva el mtime)
+GRAFICOS_MAX_BYTES = int(float(os.getenv("GRAFICOS_MAX_MB", "50")) * 1024 * 1024)
+GRAFICOS_MAX_EDAD_SEG = float(os.getenv("GRAFICOS_MAX_DIAS", "30")) * 24 * 3600
+MAX_PROCESOS = int(os.getenv("CHARTS_MAX_PROCESOS", str(min(3, os.cpu_count() or 1))))
+TIMEOUT_SEG = 60
+TOP_N = 10
+
+#subir cuando cambie el estilo de los gráficos (invalida la caché de PNG)
+VERSION_GRAFICOS = "1"
+
+_pool = None
+_lock_pool = Lock()
+
+
+def _renderizar(tipo: str, datos: dict) -> bytes:
+    """
+    Dibuja un gráfico y lo devuelve como PNG. Corre dentro de un proceso del
+    pool, así que matplotlib se importa aquí y nunca en el proceso de la API.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4.5), dpi=110)
+
+    if tipo == "top":
+        ax.barh(datos["etiquetas"][::-1], [v / 1e6 for v in datos["valores"][::-1]], color="#4472C4")
+        ax.set_xlabel("población 2024 (millones)")
+        ax.set_title(f"top {len(datos['etiquetas'])} países por población")
+
+    elif tipo == "continentes":
+        ax.pie(datos["valores"], labels=datos["etiquetas"], autopct="%1.1f%%", startangle=90)
+        ax.set_title("participación por continente")
+        ax.axis("equal")
+
+    elif tipo == "crecimiento":
+        ax.hist(datos["valores"], bins=30, color="#ED7D31", edgecolor="white")
+        ax.set_xlabel("cambio % anual")
+        ax.set_ylabel("países")
+        ax.set_title("distribución del crecimiento poblacional")
+
+    else:
+        plt.close(fig)
+        raise ValueError(f"tipo de gráfico desconocido: {tipo}")
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    """Pool de procesos creado en el primer uso (spawn: seguro con hilos en el padre)."""
+    global _pool
+
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_PROCESOS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"🎨 pool de gráficos iniciado ({MAX_PROCESOS} procesos)")
+        return _pool
+
+
+def detener_pool_graficos():
+    """Cierra los procesos del pool de gráficos."""
+    global _pool
+
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            logger.info("✅ pool de gráficos detenido")
+
+
+def _datos_graficos(df, agregados: dict) -> dict:
+    """Datos mínimos (serializables) que necesita cada gráfico."""
+    top = df.head(TOP_N)
+    return {
+        "top": {
+            "etiquetas": top["pais"].to_list(),
+            "valores": top["poblacion_2024"].to_list()
+        },
+        "continentes": {
+            "etiquetas": [str(grupo["continente"]) for grupo in agregados["continentes"]],
+            "valores": [grupo["poblacion_total"] for grupo in agregados["continentes"]]
+        },
+        "crecimiento": {
+            "valores": df["cambio_porcentual"].drop_nulls().to_list()
+        }
+    }
+
+
+def _clave(tipo: str, datos: dict) -> str:
+    contenido = json.dumps({"tipo": tipo, "datos": datos, "version": VERSION_GRAFICOS}, sort_keys=True)
+    return hashlib.sha256(contenido.encode()).hexdigest()[:32]
+
+
+def enviar_graficos(df, agregados: dict) -> dict:
+    """
+    Lanza el render de los gráficos que no estén en caché y retorna sin esperar.
+
+    Returns:
+        dict: {tipo: (clave, bytes PNG | Future)} para pasar a recolectar_graficos
+    """
+    pendientes = {}
+    a_renderizar = 0
+
+    for tipo, datos in _datos_graficos(df, agregados).items():
+        clave = _clave(tipo, datos)
+        ruta = GRAFICOS_DIR / f"{clave}.png"
+
+        try:
+            pendientes[tipo] = (clave, ruta.read_bytes())
+            os.utime(ruta)
+            continue
+        except FileNotFoundError:
+            pass
+
+        a_renderizar += 1
+        try:
+            pendientes[tipo] = (clave, _obtener_pool().submit(_renderizar, tipo, datos))
+            continue
+        except Exception as e:
+            logger.warning(f"⚠️    pool de gráficos no disponible ({e}), dibujando '{tipo}' en este proceso")
+
+        try:
+            pendientes[tipo] = (clave, _renderizar(tipo, datos))
+        except Exception as e:
+            #sin el gráfico el reporte sale igual (recolectar_graficos omite los que fallan)
+            logger.error(f"❌ no se pudo generar el gráfico '{tipo}': {type(e).__name__}: {e}")
+
+    logger.info(f"🎨 gráficos: {len(pendientes) - a_renderizar} desde caché, {a_renderizar} en render")
+    return pendientes
+
+
+def recolectar_graficos(pendientes: dict, timeout_seg: float = TIMEOUT_SEG) -> dict:
+    """
+    Espera los renders lanzados por enviar_graficos y guarda los nuevos en caché.
+
+    Returns:
+        dict: {tipo: bytes PNG}; un gráfico que falla se omite
+    """
+    graficos = {}
+    nuevos = 0
+
+    for tipo, (clave, resultado) in pendientes.items():
+        try:
+            png = resultado if isinstance(resultado, bytes) else resultado.result(timeout=timeout_seg)
+        except Exception as e:
+            logger.error(f"❌ no se pudo generar el gráfico '{tipo}': {type(e).__name__}: {e}")
+            continue
+
+        ruta = GRAFICOS_DIR / f"{clave}.png"
+        if not ruta.exists():
+            GRAFICOS_DIR.mkdir(parents=True, exist_ok=True)
+            temporal = ruta_temporal(ruta)
+            temporal.write_bytes(png)
+            temporal.replace(ruta)
+            nuevos += 1
+
+        graficos[tipo] = png
+
+    if nuevos:
+        podar_graficos()
+
+    return graficos
+
+
+def podar_graficos(max_bytes: int = GRAFICOS_MAX_BYTES, max_edad_seg: float = GRAFICOS_MAX_EDAD_SEG) -> int:
+    """
+    Borra de GRAFICOS_DIR los PNG sin usar hace más de max_edad_seg y, si aún
+    se supera max_bytes, los de uso más antiguo hasta quedar por debajo.
+
+    Returns:
+        int: archivos eliminados
+    """
+    archivos = []
+    for ruta in GRAFICOS_DIR.glob("*.png"):
+        try:
+            info = ruta.stat()
+        except FileNotFoundError:
+            continue
+        archivos.append((info.st_mtime, info.st_size, ruta))
+
+    archivos.sort()
+    total_bytes = sum(tamaño for _, tamaño, _ in archivos)
+    limite_edad = time.time() - max_edad_seg
+    eliminados = 0
+
+    for ultimo_uso, tamaño, ruta in archivos:
+        if ultimo_uso >= limite_edad and total_bytes <= max_bytes:
+            break
+        ruta.unlink(missing_ok=True)
+        total_bytes -= tamaño
+        eliminados += 1
+
+    if eliminados:
+        logger.info(f"🧹 caché de gráficos: {eliminados} archivos eliminados")
+    return eliminados
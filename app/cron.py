@@ -0,0 +1,170 @@
+#cron.py
+
+import os
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+#expresiones cron de 5 campos: minuto hora día-del-mes mes día-de-la-semana
+#(0 y 7 = domingo); soporta *, listas, rangos, pasos y nombres (jan, mon...)
+
+_CAMPOS = (
+    ("minuto", 0, 59),
+    ("hora", 0, 23),
+    ("dia", 1, 31),
+    ("mes", 1, 12),
+    ("dia_semana", 0, 7),
+)
+
+_NOMBRES_MES = {n: i for i, n in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+_NOMBRES_DIA = {n: i for i, n in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+_ATAJOS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+#búsqueda de la próxima ocurrencia: cota para expresiones imposibles (ej. 30 de febrero)
+_MAX_ITERACIONES = 5000
+
+
+def _valor(texto: str, nombres: dict) -> int:
+    texto = texto.lower()
+    return nombres[texto] if texto in nombres else int(texto)
+
+
+def _parsear_campo(texto: str, nombre: str, minimo: int, maximo: int) -> frozenset:
+    nombres = _NOMBRES_MES if nombre == "mes" else _NOMBRES_DIA if nombre == "dia_semana" else {}
+    valores = set()
+
+    for parte in texto.split(","):
+        rango, _, paso = parte.partition("/")
+        paso = int(paso) if paso else 1
+
+        if rango == "*":
+            inicio, fin = minimo, maximo
+        elif "-" in rango:
+            inicio, fin = (_valor(v, nombres) for v in rango.split("-", 1))
+        else:
+            inicio = _valor(rango, nombres)
+            fin = maximo if paso > 1 else inicio
+
+        if paso < 1 or not minimo <= inicio <= fin <= maximo:
+            raise ValueError(f"campo {nombre} fuera de rango: '{parte}' ({minimo}-{maximo})")
+
+        valores.update(range(inicio, fin + 1, paso))
+
+    return frozenset(valores)
+
+
+class Cron:
+    """Expresión cron parseada; siguiente() da la próxima ocurrencia en una zona horaria."""
+
+    def __init__(self, expresion: str):
+        self.expresion = expresion.strip()
+        campos = _ATAJOS.get(self.expresion.lower(), self.expresion).split()
+
+        if len(campos) != 5:
+            raise ValueError(f"expresión cron inválida (se esperan 5 campos): '{expresion}'")
+
+        try:
+            self.minutos, self.horas, self.dias, self.meses, dias_semana = (
+                _parsear_campo(texto, *definicion) for texto, definicion in zip(campos, _CAMPOS)
+            )
+        except ValueError as e:
+            raise ValueError(f"expresión cron inválida '{expresion}': {e}") from None
+
+        #7 también es domingo
+        self.dias_semana = frozenset(d % 7 for d in dias_semana)
+        #como en cron: si día del mes y día de la semana están restringidos, basta con uno
+        self._dia_libre = campos[2] == "*"
+        self._semana_libre = campos[4] == "*"
+
+    def _dia_coincide(self, fecha: datetime) -> bool:
+        en_mes = fecha.day in self.dias
+        en_semana = (fecha.weekday() + 1) % 7 in self.dias_semana
+
+        if self._dia_libre or self._semana_libre:
+            return en_mes and en_semana
+        return en_mes or en_semana
+
+    def siguiente(self, desde: datetime, zona) -> datetime:
+        """
+        Próxima ocurrencia estrictamente posterior a desde.
+
+        Args:
+            desde: instante (con zona horaria) a partir del cual buscar
+            zona: tzinfo en la que se interpreta la expresión
+
+        Returns:
+            datetime: ocurrencia con zona horaria
+        """
+        #se recorre en hora local (de pared) avanzando por el campo que no coincide
+        local = desde.astimezone(zona).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+
+        for _ in range(_MAX_ITERACIONES):
+            if local.month not in self.meses:
+                anio, mes = (local.year + 1, 1) if local.month == 12 else (local.year, local.month + 1)
+                local = datetime(anio, mes, 1)
+            elif not self._dia_coincide(local):
+                local = datetime(local.year, local.month, local.day) + timedelta(days=1)
+            elif local.hour not in self.horas:
+                local = local.replace(minute=0) + timedelta(hours=1)
+            elif local.minute not in self.minutos:
+                local += timedelta(minutes=1)
+            else:
+                #horas inexistentes por cambio de horario se corren hacia adelante
+                candidato = local.replace(tzinfo=zona).astimezone(timezone.utc).astimezone(zona)
+                if candidato > desde:
+                    return candidato
+                local += timedelta(minutes=1)
+
+        raise ValueError(f"la expresión cron '{self.expresion}' no tiene ocurrencias")
+
+    def __repr__(self):
+        return f"Cron('{self.expresion}')"
+
+
+def _zona_local():
+    """
+    Zona IANA del servidor (con sus cambios de horario): la variable TZ o, si
+    no está, /etc/localtime. Solo si ninguna sirve se usa el offset actual fijo.
+    """
+    #TZ, o el nombre al que apunta el enlace /etc/localtime (.../zoneinfo/America/Lima)
+    destino = os.path.realpath("/etc/localtime")
+    for nombre in (os.environ.get("TZ", "").lstrip(":"), destino.partition("/zoneinfo/")[2]):
+        if nombre:
+            try:
+                return ZoneInfo(nombre)
+            except (ZoneInfoNotFoundError, ValueError):
+                pass
+
+    try:
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f, key="localtime")
+    except (OSError, ValueError):
+        #sin base de zonas (ej. Windows sin tzdata): sin cambios de horario
+        return datetime.now().astimezone().tzinfo
+
+
+def obtener_zona(nombre: str = None):
+    """
+    Zona horaria IANA (ej. 'America/Lima'); None usa la zona local del servidor
+    (ver _zona_local), que sigue los cambios de horario.
+
+    Raises:
+        ValueError: si la zona no existe
+    """
+    if not nombre:
+        return _zona_local()
+
+    try:
+        return ZoneInfo(nombre)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"zona horaria desconocida: '{nombre}'") from None
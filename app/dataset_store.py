@@ -0,0 +1,173 @@
+#dataset_store.py
+
+import os
+import json
+import polars as pl
+from pathlib import Path
+from threading import Lock
+from datetime import datetime
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+
+logger = configurar_logger('dataset_store')
+
+#estructura en disco (particionado estilo hive por fecha de ejecución):
+#  data/dataset/fecha=2026-01-31/run_20260131_080000.parquet
+#  data/dataset/catalogo.json
+DATASET_DIR = Path(os.getenv("DATASET_DIR", "data/dataset"))
+RUTA_CATALOGO = DATASET_DIR / "catalogo.json"
+
+_lock_catalogo = Lock()
+
+
+def _leer_catalogo() -> list:
+    """Carga el catálogo de ejecuciones guardadas."""
+    if not RUTA_CATALOGO.exists():
+        return []
+
+    with open(RUTA_CATALOGO, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_catalogo(catalogo: list):
+    """Escribe el catálogo de forma atómica."""
+    temporal = ruta_temporal(RUTA_CATALOGO)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(catalogo, f, indent=2, ensure_ascii=False)
+    temporal.replace(RUTA_CATALOGO)
+
+
+def guardar_en_dataset(df: pl.DataFrame, run_id: str = None) -> dict:
+    """
+    Guarda el DataFrame limpio de una ejecución como partición Parquet.
+
+    Args:
+        df: DataFrame limpio de procesar_incremental
+        run_id: identificador de la ejecución (por defecto, fecha y hora actual)
+
+    Returns:
+        dict: entrada agregada al catálogo
+    """
+    ahora = datetime.now()
+    run_id = run_id or ahora.strftime("%Y%m%d_%H%M%S")
+    fecha = ahora.strftime("%Y-%m-%d")
+
+    particion = DATASET_DIR / f"fecha={fecha}"
+    particion.mkdir(parents=True, exist_ok=True)
+
+    #nombre elegido, archivo escrito y catálogo actualizado bajo el mismo lock:
+    #dos ejecuciones en el mismo segundo (trabajos en paralelo) no deben pisarse
+    with _lock_catalogo:
+        ruta = particion / f"run_{run_id}.parquet"
+        sufijo = 1
+        while ruta.exists():
+            sufijo += 1
+            ruta = particion / f"run_{run_id}_{sufijo}.parquet"
+        if sufijo > 1:
+            run_id = f"{run_id}_{sufijo}"
+
+        df_run = df.with_columns([
+            pl.lit(run_id).alias("run_id"),
+            pl.lit(ahora).alias("fecha_ejecucion")
+        ])
+
+        temporal = ruta_temporal(ruta)
+        df_run.write_parquet(temporal, statistics=True)
+        temporal.replace(ruta)
+
+        entrada = {
+            "run_id": run_id,
+            "fecha": fecha,
+            "timestamp": ahora.isoformat(),
+            "ruta": str(ruta),
+            "filas": df.height,
+            "bytes": ruta.stat().st_size
+        }
+
+        catalogo = _leer_catalogo()
+        catalogo.append(entrada)
+        _escribir_catalogo(catalogo)
+
+    logger.info(f"💾 ejecución {run_id} guardada en dataset ({df.height} filas, {entrada['bytes'] / 1024:.1f} KB)")
+    return entrada
+
+
+def obtener_catalogo() -> list:
+    """Retorna las ejecuciones guardadas en el dataset."""
+    with _lock_catalogo:
+        return _leer_catalogo()
+
+
+def escanear_dataset(desde: str = None, hasta: str = None) -> pl.LazyFrame:
+    """
+    LazyFrame sobre todas las particiones (lectura perezosa, memory-mapped).
+    Los filtros por fecha se aplican sobre la columna de partición, así que
+    las carpetas fuera de rango ni se abren.
+
+    Args:
+        desde: fecha mínima 'YYYY-MM-DD' (inclusive)
+        hasta: fecha máxima 'YYYY-MM-DD' (inclusive)
+
+    Returns:
+        pl.LazyFrame
+        None: si el dataset está vacío
+    """
+    if not any(DATASET_DIR.glob("fecha=*/*.parquet")):
+        return None
+
+    lf = pl.scan_parquet(
+        DATASET_DIR / "**" / "*.parquet",
+        hive_partitioning=True,
+        hive_schema={"fecha": pl.String}
+    )
+
+    if desde:
+        lf = lf.filter(pl.col("fecha") >= desde)
+    if hasta:
+        lf = lf.filter(pl.col("fecha") <= hasta)
+
+    return lf
+
+
+def consultar_pais(pais: str, desde: str = None, hasta: str = None) -> list:
+    """
+    Población de un país en cada ejecución guardada.
+
+    Returns:
+        list[dict]: {fecha, run_id, poblacion_2023, poblacion_2024, cambio_porcentual}
+    """
+    lf = escanear_dataset(desde, hasta)
+    if lf is None:
+        return []
+
+    return (
+        lf.filter(pl.col("pais") == pais)
+        .select(["fecha", "run_id", "poblacion_2023", "poblacion_2024", "cambio_porcentual"])
+        .sort("run_id")
+        .collect()
+        .to_dicts()
+    )
+
+
+def consultar_continente(continente: str, desde: str = None, hasta: str = None) -> list:
+    """
+    Población total de un continente en cada ejecución guardada.
+
+    Returns:
+        list[dict]: {fecha, run_id, poblacion_total, paises}
+    """
+    lf = escanear_dataset(desde, hasta)
+    if lf is None:
+        return []
+
+    return (
+        lf.filter(pl.col("continente") == continente)
+        .group_by(["fecha", "run_id"])
+        .agg([
+            pl.col("poblacion_2024").sum().alias("poblacion_total"),
+            pl.len().alias("paises")
+        ])
+        .sort("run_id")
+        .collect()
+        .to_dicts()
+    )
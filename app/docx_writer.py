@@ -0,0 +1,91 @@
+#docx_writer.py
+
+import io
+import hashlib
+from copy import deepcopy
+from pathlib import Path
+from threading import Lock
+from docx import Document
+from docx.oxml.ns import qn
+from app.logger import configurar_logger
+
+logger = configurar_logger('docx_writer')
+
+#plantilla con los estilos del reporte ya definidos (se lee una sola vez por proceso)
+RUTA_PLANTILLA = Path(__file__).parent / "plantillas" / "reporte.docx"
+ESTILO_TABLA = 'Light Grid Accent 1'
+
+_plantilla_bytes = None
+_lock_plantilla = Lock()
+
+
+def _bytes_plantilla() -> bytes:
+    """Contenido de la plantilla en memoria; si falta el archivo, usa la de python-docx."""
+    global _plantilla_bytes
+
+    with _lock_plantilla:
+        if _plantilla_bytes is None:
+            if RUTA_PLANTILLA.exists():
+                _plantilla_bytes = RUTA_PLANTILLA.read_bytes()
+            else:
+                logger.warning(f"⚠️    plantilla no encontrada en {RUTA_PLANTILLA}, usando la de python-docx")
+                buffer = io.BytesIO()
+                Document().save(buffer)
+                _plantilla_bytes = buffer.getvalue()
+
+        return _plantilla_bytes
+
+
+def version_plantilla() -> str:
+    """Hash corto del contenido de la plantilla (cambia si se edita el .docx)."""
+    return hashlib.sha256(_bytes_plantilla()).hexdigest()[:12]
+
+
+def nuevo_documento():
+    """Documento vacío creado desde la plantilla en memoria."""
+    return Document(io.BytesIO(_bytes_plantilla()))
+
+
+def agregar_tabla(doc, encabezados: list, filas: list, total_filas: int = None, estilo: str = ESTILO_TABLA):
+    """
+    Agrega una tabla construyendo las filas en bloque a nivel XML.
+
+    Solo la fila de encabezados pasa por la API de celdas de python-docx; cada fila
+    de datos es una copia de ese <w:tr> a la que se le reemplaza el texto de las
+    celdas, sin volver a recorrer la tabla por cada rows[i].cells[j].
+
+    Args:
+        doc: documento python-docx
+        encabezados: textos de la primera fila
+        filas: lista de filas, cada una con un texto por columna
+        total_filas: filas de datos a reservar (las sobrantes quedan vacías),
+            igual que add_table(rows=N) con menos datos que filas
+        estilo: estilo de tabla
+
+    Returns:
+        docx.table.Table
+    """
+    tabla = doc.add_table(rows=1, cols=len(encabezados))
+    tabla.style = estilo
+
+    for celda, encabezado in zip(tabla.rows[0].cells, encabezados):
+        celda.text = encabezado
+
+    tbl = tabla._tbl
+    tr_modelo = tabla.rows[0]._tr
+
+    for fila in filas:
+        tr = deepcopy(tr_modelo)
+        for r, valor in zip(tr.iter(qn('w:r')), fila):
+            r.text = valor
+        tbl.append(tr)
+
+    #filas reservadas sin datos: celdas con un párrafo vacío
+    for _ in range(max(0, (total_filas or 0) - len(filas))):
+        tr = deepcopy(tr_modelo)
+        for p in tr.iter(qn('w:p')):
+            for r in list(p.iter(qn('w:r'))):
+                p.remove(r)
+        tbl.append(tr)
+
+    return tabla
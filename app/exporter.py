@@ -0,0 +1,110 @@
+#exporter.py
+
+import io
+import hashlib
+import polars as pl
+from app.logger import configurar_logger
+from app.dataset_store import obtener_catalogo
+from app.snapshots import COLUMNAS_LIMPIAS
+
+logger = configurar_logger('exporter')
+
+#filas por bloque al transmitir CSV / NDJSON
+FILAS_POR_BLOQUE = 10_000
+
+#byte_a_byte: el mismo run produce siempre los mismos bytes (ETag fuerte); parquet
+#y xlsx se reescriben con metadatos del escritor (xlsx incluso la fecha), solo
+#son equivalentes (ETag débil)
+FORMATOS = {
+    "csv": {"media_type": "text/csv; charset=utf-8", "extension": "csv", "byte_a_byte": True},
+    "ndjson": {"media_type": "application/x-ndjson", "extension": "ndjson", "byte_a_byte": True},
+    "parquet": {"media_type": "application/vnd.apache.parquet", "extension": "parquet", "byte_a_byte": False},
+    "xlsx": {
+        "media_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "extension": "xlsx",
+        "byte_a_byte": False
+    }
+}
+
+
+def obtener_ultima_ejecucion():
+    """
+    Última ejecución guardada en el dataset. Sus archivos Parquet nunca se
+    reescriben, así que se pueden leer por bloques sin riesgo de cambios a mitad.
+
+    Returns:
+        dict: entrada del catálogo
+        None: si aún no hay datos
+    """
+    catalogo = obtener_catalogo()
+    return catalogo[-1] if catalogo else None
+
+
+def etag_exportacion(entrada: dict, formato: str) -> str:
+    """
+    ETag por run y formato: fuerte si el formato es byte a byte reproducible,
+    débil (W/"...") si solo el contenido es equivalente (ver FORMATOS).
+    """
+    base = f"{entrada['run_id']}:{formato}:{','.join(COLUMNAS_LIMPIAS)}"
+    etag = '"' + hashlib.sha256(base.encode()).hexdigest()[:32] + '"'
+    return etag if FORMATOS[formato]["byte_a_byte"] else "W/" + etag
+
+
+def _escanear(entrada: dict) -> pl.LazyFrame:
+    return pl.scan_parquet(entrada["ruta"]).select(COLUMNAS_LIMPIAS)
+
+
+def _bloques(entrada: dict, filas_por_bloque: int):
+    """
+    Lee el Parquet con el motor streaming en bloques de filas_por_bloque: en
+    memoria solo está el bloque que se está codificando, no el run completo.
+    """
+    return _escanear(entrada).collect_batches(chunk_size=filas_por_bloque)
+
+
+def transmitir_csv(entrada: dict, filas_por_bloque: int = FILAS_POR_BLOQUE):
+    """Genera el CSV por bloques (encabezado solo en el primero, ver _bloques)."""
+    vacio = True
+
+    for bloque in _bloques(entrada, filas_por_bloque):
+        yield bloque.write_csv(include_header=vacio).encode("utf-8")
+        vacio = False
+
+    if vacio:
+        yield pl.DataFrame(schema=_escanear(entrada).collect_schema()).write_csv().encode("utf-8")
+
+
+def transmitir_ndjson(entrada: dict, filas_por_bloque: int = FILAS_POR_BLOQUE):
+    """Genera JSON Lines por bloques (ver _bloques)."""
+    for bloque in _bloques(entrada, filas_por_bloque):
+        yield bloque.write_ndjson().encode("utf-8")
+
+
+def coincide_etag(if_none_match: str, etag: str) -> bool:
+    """
+    Evalúa una cabecera If-None-Match: lista separada por comas, '*' o ETags
+    débiles (W/"..."), con comparación débil como pide la RFC 9110.
+    """
+    if not if_none_match:
+        return False
+
+    def opaco(valor: str) -> str:
+        valor = valor.strip()
+        return valor[2:] if valor.startswith("W/") else valor
+
+    candidatos = [opaco(valor) for valor in if_none_match.split(",")]
+    return "*" in candidatos or opaco(etag) in candidatos
+
+
+def exportar_parquet(entrada: dict) -> bytes:
+    """Parquet completo con las columnas limpias."""
+    buffer = io.BytesIO()
+    _escanear(entrada).collect().write_parquet(buffer)
+    return buffer.getvalue()
+
+
+def exportar_xlsx(entrada: dict) -> bytes:
+    """XLSX completo con las columnas limpias (requiere xlsxwriter)."""
+    buffer = io.BytesIO()
+    _escanear(entrada).collect().write_excel(buffer, worksheet="poblacion", autofit=True)
+    return buffer.getvalue()
@@ -1,89 +1,547 @@
 #extractor.py
 
+import os
+from lxml import html as lxml_html
 from playwright.sync_api import sync_playwright
 from app import logger
-from app.logger import configurar_logger
+from app.logger import configurar_logger, advertencia_muestreada, cerrar_muestreo
+from app.browser_pool import pool_activo, ejecutar_con_pagina
+from app import source_cache
+from app.metrics import cronometrar, observar, incrementar
+from app.profiler import span
 
 #configurar logger para este módulo
 logger = configurar_logger('extractor')
 
+#clave de muestreo para las advertencias por fila (una tabla rota genera cientos)
+MUESTREO_FILAS = "extractor.filas"
 
-def extraer_tabla_completa():
+URL_POBLACION = "https://en.wikipedia.org/wiki/List_of_countries_by_population_(United_Nations)"
+SELECTOR_FILAS = "table.wikitable tbody tr"
+
+#orden de las columnas tal como aparecen en la tabla de wikipedia
+COLUMNAS = ["pais", "poblacion_2023", "poblacion_2024", "cambio_porcentual", "continente", "region"]
+
+#modos de extracción soportados
+MODO_EVALUATE = "evaluate"   #una sola evaluación dentro de la página
+MODO_CELDAS = "celdas"       #una llamada por celda (modo original)
+
+#motores de extracción
+MOTOR_HTTP = "http"               #requests + lxml, sin navegador
+MOTOR_PLAYWRIGHT = "playwright"   #chromium headless
+MOTOR_ASYNC = "async"             #playwright.async_api vía async_extractor
+MOTOR_POR_DEFECTO = os.getenv("EXTRACTOR_MOTOR", MOTOR_HTTP)
+MOTORES = (MOTOR_HTTP, MOTOR_PLAYWRIGHT, MOTOR_ASYNC)
+
+#perfiles de carga de página para playwright
+#  bloquear: tipos de recurso abortados vía page.route
+#  esperar: evento de navegación que da por cargada la página
+#las hojas de estilo no se bloquean: innerText depende del css (claves de
+#orden y notas ocultas por clase aparecerían en el texto de las celdas)
+PERFILES_CARGA = {
+    "ligero": {
+        "bloquear": {"image", "font", "media", "script", "xhr", "fetch", "other"},
+        "esperar": "domcontentloaded"
+    },
+    "completo": {
+        "bloquear": set(),
+        "esperar": "load"
+    }
+}
+PERFIL_POR_DEFECTO = os.getenv("EXTRACTOR_PERFIL_CARGA", "ligero")
+
+
+
+def resolver_motor(motor: str = None) -> str:
+    """
+    Motor de extracción a usar (None = MOTOR_POR_DEFECTO).
+
+    Raises:
+        ValueError: si el motor no existe
+    """
+    motor = motor or MOTOR_POR_DEFECTO
+    if motor not in MOTORES:
+        raise ValueError(f"motor inválido: '{motor}' (opciones: {', '.join(MOTORES)})")
+    return motor
+
+
+def resolver_perfil(perfil: str = None) -> str:
+    """
+    Perfil de carga a usar (None = PERFIL_POR_DEFECTO).
+
+    Raises:
+        ValueError: si el perfil no está en PERFILES_CARGA
+    """
+    perfil = perfil or PERFIL_POR_DEFECTO
+    if perfil not in PERFILES_CARGA:
+        raise ValueError(f"perfil de carga inválido: '{perfil}' (opciones: {', '.join(PERFILES_CARGA)})")
+    return perfil
+
+
+#tamaño típico por tipo de recurso, para estimar bytes ahorrados al bloquear
+#(una petición abortada nunca informa su tamaño real)
+_BYTES_ESTIMADOS_POR_TIPO = {
+    "image": 20 * 1024,
+    "stylesheet": 30 * 1024,
+    "font": 40 * 1024,
+    "media": 200 * 1024,
+    "script": 60 * 1024,
+    "xhr": 5 * 1024,
+    "fetch": 5 * 1024,
+    "other": 2 * 1024
+}
+
+#estadísticas de la última carga con playwright
+_ultima_carga = None
+
+#última versión de la fuente leída por el motor http (hash, cambiado, origen)
+_ultima_fuente = None
+
+#tablas con clase wikitable; filas fuera de <thead>, igual que "table.wikitable tbody tr" en el navegador
+_XPATH_FILAS = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' wikitable ')]"
+    "//tr[not(ancestor::thead)]"
+)
+
+#contenido no visible de una celda; el estilo se compara sin espacios ni
+#mayúsculas ('display:none', 'display: none', 'DISPLAY : NONE')
+_XPATH_OCULTOS = (
+    ".//style | .//script"
+    " | .//*[contains(translate(@style, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ ', 'abcdefghijklmnopqrstuvwxyz'), 'display:none')]"
+)
+
+#script ejecutado dentro del navegador: recorre la tabla completa y
+#devuelve arrays por columna en un solo viaje de ida y vuelta
+_JS_EXTRAER_COLUMNAS = """
+([selector, columnas]) => {
+    const filas = document.querySelectorAll(selector);
+    const datos = {};
+    columnas.forEach(c => datos[c] = []);
+    const invalidas = [];
+
+    for (let i = 1; i < filas.length; i++) {
+        const celdas = filas[i].querySelectorAll("td");
+        if (celdas.length < columnas.length) {
+            invalidas.push([i, celdas.length]);
+            continue;
+        }
+        columnas.forEach((c, j) => datos[c].push(celdas[j].innerText.trim()));
+    }
+
+    return {total_filas: filas.length, columnas: datos, invalidas: invalidas};
+}
+"""
+
+
+def columnas_a_filas(columnas: dict) -> list:
+    """
+    Convierte arrays por columna en la lista de diccionarios que recibe el procesamiento.
+
+    Args:
+        columnas: dict {nombre_columna: [valores]}
+
+    Returns:
+        list[dict]: una entrada por país
+    """
+    nombres = list(columnas.keys())
+    return [dict(zip(nombres, valores)) for valores in zip(*columnas.values())]
+
+
+def _extraer_por_evaluate(page):
+    """
+    Extrae la tabla completa con una sola evaluación en la página.
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    resultado = page.evaluate(_JS_EXTRAER_COLUMNAS, [SELECTOR_FILAS, COLUMNAS])
+    logger.info(f"  total de filas encontradas: {resultado['total_filas']}")
+
+    for i, total_celdas in resultado["invalidas"]:
+        advertencia_muestreada(logger, MUESTREO_FILAS, f"⚠️    fila {i} tiene formato inválido (solo {total_celdas} celdas)")
+    cerrar_muestreo(logger, MUESTREO_FILAS)
+
+    datos = columnas_a_filas(resultado["columnas"])
+    return datos, 0
+
+
+def _texto_celda(celda) -> str:
+    """Texto visible de una celda lxml (sin <style>, <script> ni elementos ocultos)."""
+    for oculto in celda.xpath(_XPATH_OCULTOS):
+        oculto.drop_tree()
+    return " ".join(celda.text_content().split())
+
+
+def parsear_html(contenido) -> tuple:
+    """
+    Extrae las filas de la tabla de población desde HTML estático con lxml.
+
+    Args:
+        contenido: HTML de la página (str o bytes)
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    if isinstance(contenido, bytes):
+        #wikipedia sirve utf-8; sin esto lxml asume latin-1 si falta <meta charset>
+        contenido = contenido.decode("utf-8", errors="replace")
+
+    documento = lxml_html.fromstring(contenido)
+    filas = documento.xpath(_XPATH_FILAS)
+    logger.info(f"  total de filas encontradas: {len(filas)}")
+
+    datos = []
+    errores = 0
+
+    # Recorrer cada fila (saltar encabezado)
+    for i, fila in enumerate(filas[1:], start=1):
+        celdas = fila.xpath("./td")
+
+        if len(celdas) >= len(COLUMNAS):
+            try:
+                datos.append({
+                    columna: _texto_celda(celdas[j]) for j, columna in enumerate(COLUMNAS)
+                })
+            except Exception as e:
+                errores += 1
+                advertencia_muestreada(logger, MUESTREO_FILAS, f"⚠️     Error al procesar fila {i}: {e}")
+        else:
+            advertencia_muestreada(logger, MUESTREO_FILAS, f"⚠️    fila {i} tiene formato inválido (solo {len(celdas)} celdas)")
+
+    cerrar_muestreo(logger, MUESTREO_FILAS)
+    return datos, errores
+
+
+def _extraer_por_http():
+    """
+    Obtiene la página a través de la caché de fuente y la parsea con lxml,
+    sin navegador. Si la fuente no cambió, reutiliza las filas ya parseadas.
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    global _ultima_fuente
+
+    with span("descarga_fuente"):
+        fuente = source_cache.obtener_fuente(URL_POBLACION)
+    if fuente is None:
+        return [], 0
+
+    _ultima_fuente = {k: fuente[k] for k in ("hash", "cambiado", "origen")}
+    incrementar("fuente_obtenciones_total", origen=fuente["origen"])
+
+    filas = source_cache.leer_filas(URL_POBLACION, fuente["hash"])
+    incrementar("cache_consultas_total", cache="filas_parseadas", resultado="hit" if filas is not None else "miss")
+    if filas is not None:
+        logger.info(f"📦 fuente sin cambios ({fuente['hash'][:12]}): reutilizando {len(filas)} filas parseadas")
+        return filas, 0
+
+    contenido = fuente["contenido"] or source_cache.leer_contenido(URL_POBLACION)
+    with span("parseo_html"):
+        datos, errores = parsear_html(contenido)
+
+    if datos:
+        source_cache.guardar_filas(URL_POBLACION, fuente["hash"], datos)
+
+    return datos, errores
+
+
+def obtener_info_fuente():
+    """
+    Retorna la versión de la fuente usada en la última extracción http.
+
+    Returns:
+        dict: {hash, cambiado, origen}
+        None: si aún no hubo extracción http
+    """
+    return _ultima_fuente
+
+
+def _extraer_por_celdas(page):
+    """
+    Extrae la tabla celda por celda (una llamada al navegador por celda).
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    filas = page.query_selector_all(SELECTOR_FILAS)
+    logger.info(f"  total de filas encontradas: {len(filas)}")
+
+    datos = []
+    errores = 0
+
+    # Recorrer cada fila (saltar encabezado)
+    for i, fila in enumerate(filas[1:], start=1):
+        celdas = fila.query_selector_all("td")
+
+        if len(celdas) >= 6:
+            try:
+                pais = {
+                    "pais": celdas[0].inner_text().strip(),
+                    "poblacion_2023": celdas[1].inner_text().strip(),
+                    "poblacion_2024": celdas[2].inner_text().strip(),
+                    "cambio_porcentual": celdas[3].inner_text().strip(),
+                    "continente": celdas[4].inner_text().strip(),
+                    "region": celdas[5].inner_text().strip()
+                }
+
+                datos.append(pais)
+
+            except Exception as e:
+                errores += 1
+                advertencia_muestreada(logger, MUESTREO_FILAS, f"⚠️     Error al procesar fila {i}: {e}")
+                continue
+        else:
+            advertencia_muestreada(logger, MUESTREO_FILAS, f"⚠️    fila {i} tiene formato inválido (solo {len(celdas)} celdas)")
+
+    cerrar_muestreo(logger, MUESTREO_FILAS)
+    return datos, errores
+
+
+def _aplicar_perfil_carga(page, perfil: dict) -> dict:
+    """
+    Registra el bloqueo de recursos del perfil en la página.
+
+    Returns:
+        dict: estadísticas que se van llenando durante la carga
+    """
+    estadisticas = {
+        "peticiones_permitidas": 0,
+        "peticiones_bloqueadas": 0,
+        "bloqueadas_por_tipo": {},
+        "bytes_descargados": 0,
+        "bytes_ahorrados_estimados": 0
+    }
+    bloquear = perfil["bloquear"]
+
+    def _al_responder(respuesta):
+        estadisticas["bytes_descargados"] += int(respuesta.headers.get("content-length", 0) or 0)
+
+    page.on("response", _al_responder)
+
+    if not bloquear:
+        return estadisticas
+
+    def _enrutar(route):
+        tipo = route.request.resource_type
+        if tipo in bloquear:
+            estadisticas["peticiones_bloqueadas"] += 1
+            estadisticas["bloqueadas_por_tipo"][tipo] = estadisticas["bloqueadas_por_tipo"].get(tipo, 0) + 1
+            estadisticas["bytes_ahorrados_estimados"] += _BYTES_ESTIMADOS_POR_TIPO.get(tipo, 0)
+            route.abort()
+        else:
+            estadisticas["peticiones_permitidas"] += 1
+            route.continue_()
+
+    page.route("**/*", _enrutar)
+    return estadisticas
+
+
+def obtener_info_carga():
+    """
+    Retorna las estadísticas de carga de la última extracción con playwright.
+
+    Returns:
+        dict: perfil, peticiones bloqueadas/permitidas, bytes descargados y ahorrados
+        None: si aún no hubo extracción con playwright
+    """
+    return _ultima_carga
+
+
+def _leer_tabla(page, modo: str, perfil: str = None):
+    """
+    Navega a la página de población y extrae la tabla con el modo indicado.
+
+    Args:
+        page: página de playwright
+        modo: 'evaluate' | 'celdas'
+        perfil: nombre en PERFILES_CARGA (por defecto EXTRACTOR_PERFIL_CARGA)
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    global _ultima_carga
+
+    nombre_perfil = resolver_perfil(perfil)
+    config_perfil = PERFILES_CARGA[nombre_perfil]
+    estadisticas = _aplicar_perfil_carga(page, config_perfil)
+
+    url = URL_POBLACION
+    logger.info(f"navegando a: {url} (perfil de carga: {nombre_perfil})")
+
+    #timeout de 30 segundos para navegación
+    with span("navegacion"):
+        page.goto(url, timeout=30000, wait_until=config_perfil["esperar"])
+
+        logger.info("esperando datos de tabla...")
+        page.wait_for_selector("table.wikitable", timeout=15000, state="attached")
+
+    _ultima_carga = {"perfil": nombre_perfil, **estadisticas}
+    logger.info(
+        f"  peticiones bloqueadas: {estadisticas['peticiones_bloqueadas']} "
+        f"(~{estadisticas['bytes_ahorrados_estimados'] / 1024:.0f} KB ahorrados), "
+        f"descargados: {estadisticas['bytes_descargados'] / 1024:.1f} KB"
+    )
+
+    logger.info(f"extrallendo datos de la tabla (modo: {modo})...")
+    with span("extraccion_filas"):
+        if modo == MODO_CELDAS:
+            return _extraer_por_celdas(page)
+        return _extraer_por_evaluate(page)
+
+
+def _extraer_con_playwright(modo: str, usar_pool: bool, perfil: str = None):
+    """
+    Extrae la tabla con chromium (pool si está activo, navegador propio si no).
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    if usar_pool and pool_activo():
+        logger.info("usando navegador del pool (contexto nuevo)...")
+        return ejecutar_con_pagina(lambda page: _leer_tabla(page, modo, perfil))
+
+    with sync_playwright() as p:
+        logger.info("lanzando navegador chromium...")
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+
+        datos, errores = _leer_tabla(page, modo, perfil)
+
+        browser.close()
+        logger.info("🔒 navegador cerrado correctamente")
+
+    return datos, errores
+
+
+def _extraer_con_async(perfil: str = None):
+    """
+    Extrae la tabla con el motor async (un navegador propio, fuera del pool).
+
+    Returns:
+        tuple: (datos, errores)
+    """
+    #importe diferido: async_extractor importa de este módulo
+    from app.async_extractor import extraer_fuentes, FUENTE_POBLACION_ONU
+
+    resultado = extraer_fuentes([FUENTE_POBLACION_ONU], perfil=perfil or PERFIL_POR_DEFECTO)
+    fuente = resultado[FUENTE_POBLACION_ONU["nombre"]]
+
+    if fuente["error"]:
+        raise RuntimeError(f"motor async: {fuente['error']}")
+
+    return fuente["datos"], fuente["filas_invalidas"]
+
+
+def _comparar_filas(filas_a: list, filas_b: list, limite: int = 10) -> list:
+    """Primeras diferencias entre dos extracciones, fila por fila."""
+    diferencias = []
+    for i, (a, b) in enumerate(zip(filas_a, filas_b)):
+        if a != b:
+            diferencias.append({"fila": i, "a": a, "b": b})
+            if len(diferencias) >= limite:
+                break
+    return diferencias
+
+
+def comparar_perfiles_carga(perfil: str = "ligero", modo: str = MODO_EVALUATE, usar_pool: bool = True) -> dict:
+    """
+    Extrae la tabla con el perfil dado y con 'completo' y compara el texto de
+    las celdas: un perfil que bloquea recursos no debe cambiar lo extraído.
+
+    Returns:
+        dict: {iguales, filas_perfil, filas_completo, diferencias}
+    """
+    datos_perfil, _ = _extraer_con_playwright(modo, usar_pool, perfil)
+    datos_completo, _ = _extraer_con_playwright(modo, usar_pool, "completo")
+    diferencias = _comparar_filas(datos_perfil, datos_completo)
+
+    iguales = not diferencias and len(datos_perfil) == len(datos_completo)
+    if not iguales:
+        logger.warning(f"⚠️    el perfil '{perfil}' extrae distinto que 'completo' ({len(diferencias)} diferencias)")
+
+    return {
+        "iguales": iguales,
+        "filas_perfil": len(datos_perfil),
+        "filas_completo": len(datos_completo),
+        "diferencias": diferencias
+    }
+
+
+@cronometrar("etapa_duracion_segundos", etapa="extraccion")
+def extraer_tabla_completa(
+    modo: str = MODO_EVALUATE,
+    usar_pool: bool = True,
+    motor: str = None,
+    perfil: str = None
+):
     """"
     extrae los datos de la población mundial desde wikipedia
-    
+
+    Args:
+        modo: 'evaluate' (por defecto, un solo viaje al navegador) | 'celdas'
+        usar_pool: usar el pool de navegadores si está iniciado
+        motor: 'http' (requests + lxml, respaldo en playwright) | 'playwright' |
+            'async' (playwright.async_api); por defecto EXTRACTOR_MOTOR o 'http'
+        perfil: perfil de carga de playwright ('ligero' | 'completo');
+            por defecto EXTRACTOR_PERFIL_CARGA o 'ligero'
+
     returns:
         list[dict]: lista de países con sus datos demográficos
         none: si hay error crítico
+
+    Raises:
+        ValueError: motor o perfil desconocido (error del llamador, no de extracción)
     """
-    
+
+    global _ultima_fuente
+
+    motor = resolver_motor(motor)
+    perfil = resolver_perfil(perfil)
+
     try:
         logger.info("=" * 60)
         logger.info("iniciando extracción de datos")
         logger.info("=" * 60)
 
-        with sync_playwright() as p:
-            logger.info("lanzando navegador chromium...")
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            url = "https://en.wikipedia.org/wiki/List_of_countries_by_population_(United_Nations)"
-            logger.info(f"navegando a: {url}")
-
-            #timeout de 30 segundos para navegación
-            page.goto(url, timeout=30000)
-
-            logger.info("esperando datos de tabla...")
-            page.wait_for_selector("table.wikitable", timeout=15000)
-            
-            logger.info("extrallendo datos de la tabla...")
-            filas = page.query_selector_all("table.wikitable tbody tr")
-            logger.info(f"  total de filas encontradas: {len(filas)}")              
-            
-            datos = []
-            errores = 0
-            
-            # Recorrer cada fila (saltar encabezado)
-            for i, fila in enumerate(filas[1:], start=1):
-                celdas = fila.query_selector_all("td")
-                
-                if len(celdas) >= 6:
-                    try:
-                        pais = {
-                            "pais": celdas[0].inner_text().strip(),
-                            "poblacion_2023": celdas[1].inner_text().strip(),
-                            "poblacion_2024": celdas[2].inner_text().strip(),
-                            "cambio_porcentual": celdas[3].inner_text().strip(),
-                            "continente": celdas[4].inner_text().strip(),
-                            "region": celdas[5].inner_text().strip()
-                        }
-
-                        datos.append(pais)
-
-                    except Exception as e:
-                        errores += 1
-                        logger.warning(f"⚠️     Error al procesar fila {i}: {e}")
-                        continue
-                else:
-                    logger.warning(f"⚠️    fila {i} tiene formato inválido (solo {len(celdas)} celdas)")
-        
-            browser.close()
-            logger.info("🔒 navegador cerrado correctamente")
-
-            #resumen de datos extraidos
-            logger.info("=" * 60)
-            logger.info("EXTRACCIÓN COMPLETADA")
-            logger.info(f"  ✅ países extraídos: {len(datos)}")
-            logger.info(f"  ⚠️ fillas con errores: {errores}")
-            logger.info(f"  tasa de éxito: {len(datos/(len(datos)+errores))*100}")
-            logger.info("=" * 60)
-
-            if len(datos) == 0:
-                logger.error("❌ crítico: no se extrajo ningún dato válido")
-                return None
-
-            return datos
-    
+        _ultima_fuente = None
+        datos, errores = [], 0
+
+        if motor == MOTOR_HTTP:
+            try:
+                datos, errores = _extraer_por_http()
+            except Exception as e:
+                logger.warning(f"⚠️    motor http falló ({type(e).__name__}: {e})")
+
+            if not datos:
+                logger.warning("⚠️    sin tabla válida en HTML estático, usando playwright como respaldo")
+                motor = MOTOR_PLAYWRIGHT
+                _ultima_fuente = None
+
+        if motor == MOTOR_PLAYWRIGHT:
+            datos, errores = _extraer_con_playwright(modo, usar_pool, perfil)
+        elif motor == MOTOR_ASYNC:
+            datos, errores = _extraer_con_async(perfil)
+
+        #resumen de datos extraidos
+        total = len(datos) + errores
+        logger.info("=" * 60)
+        logger.info("EXTRACCIÓN COMPLETADA")
+        logger.info(f"  motor: {motor}")
+        logger.info(f"  ✅ países extraídos: {len(datos)}")
+        logger.info(f"  ⚠️ fillas con errores: {errores}")
+        logger.info(f"  tasa de éxito: {(len(datos) / total * 100) if total else 0:.1f}%")
+        logger.info("=" * 60)
+
+        observar("filas_extraidas", len(datos), motor=motor)
+        observar("filas_con_error", errores, motor=motor)
+
+        if len(datos) == 0:
+            logger.error("❌ crítico: no se extrajo ningún dato válido")
+            return None
+
+        return datos
+
     except Exception as e:
         logger.error("=" * 60)
         logger.error("❌ ERROR DE EXTRACCIÓN")
@@ -91,4 +549,3 @@ def extraer_tabla_completa():
         logger.error(f"     detalle: {str(e)}")
         logger.error("=" * 60)
         return None
-
@@ -1,30 +1,224 @@
 #generator.py
 
+import io
+import uuid
 from os import path
-from docx import Document
 from datetime import datetime
 import polars as pl
 from pathlib import Path
 from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+from app.aggregator import obtener_agregados
+from app.docx_writer import nuevo_documento, agregar_tabla
+from app.charts import enviar_graficos, recolectar_graficos
+from app.metrics import cronometrar, observar
+from app.profiler import span
+from docx.shared import Inches
 
 logger = configurar_logger('generator')
 
 
-def crear_reporte(df: pl.dataframe) -> str:
+#subir cuando cambie el contenido o formato del reporte (invalida la caché de reportes)
+VERSION_GENERADOR = "3"
+
+MAX_FILAS_CAMBIOS = 20
+
+
+def _agregar_seccion_cambios(doc, diff: dict):
+    """Agrega la sección 'cambios desde el último reporte' a partir del diff de snapshots."""
+    doc.add_heading("Cambios desde el último reporte", 1)
+
+    if diff.get("primera_ejecucion"):
+        doc.add_paragraph("primer reporte: no hay un reporte anterior para comparar.")
+        return
+
+    if diff.get("sin_cambios"):
+        doc.add_paragraph(f"sin cambios respecto al reporte del {diff.get('fecha_anterior')}.")
+        return
+
+    doc.add_paragraph(
+        f"comparado con el reporte del {diff.get('fecha_anterior')}: "
+        f"{len(diff['agregados'])} países nuevos, "
+        f"{len(diff['eliminados'])} eliminados, "
+        f"{len(diff['cambiados'])} con datos modificados."
+    )
+
+    if diff["agregados"]:
+        doc.add_paragraph(f"nuevos: {', '.join(diff['agregados'])}")
+    if diff["eliminados"]:
+        doc.add_paragraph(f"eliminados: {', '.join(diff['eliminados'])}")
+
+    if diff["cambiados"]:
+        cambiados = diff["cambiados"][:MAX_FILAS_CAMBIOS]
+        agregar_tabla(
+            doc,
+            ["País", "Población anterior", "Población actual", "Cambio % anterior", "Cambio % actual"],
+            [
+                [
+                    cambio['pais'],
+                    f"{cambio['poblacion_2024_anterior']:,}",
+                    f"{cambio['poblacion_2024']:,}",
+                    f"{cambio['cambio_porcentual_anterior']}",
+                    f"{cambio['cambio_porcentual']}"
+                ]
+                for cambio in cambiados
+            ]
+        )
+
+        if len(diff["cambiados"]) > MAX_FILAS_CAMBIOS:
+            doc.add_paragraph(f"... y {len(diff['cambiados']) - MAX_FILAS_CAMBIOS} países más con cambios.")
+
+
+def _agregar_seccion_continentes(doc, agregados: dict):
+    """Agrega la tabla de población por continente desde los agregados precalculados."""
+    doc.add_heading("Población por continente", 1)
+
+    filas = []
+    for grupo in agregados["continentes"]:
+        cambio = grupo['cambio_ponderado']
+        filas.append([
+            str(grupo['continente']),
+            f"{grupo['poblacion_total']:,}",
+            str(grupo['paises']),
+            f"{int(grupo['poblacion_promedio']):,}",
+            f"{int(grupo['poblacion_mediana']):,}",
+            f"{cambio:.2f}" if cambio is not None else "-"
+        ])
+
+    agregar_tabla(
+        doc,
+        ["Continente", "Población 2024", "Países", "Promedio", "Mediana", "Cambio % ponderado"],
+        filas
+    )
+
+
+def _agregar_seccion_graficos(doc, graficos: dict):
+    """Inserta los gráficos PNG ya renderizados."""
+    doc.add_heading("Gráficos", 1)
+
+    for tipo in ("top", "continentes", "crecimiento"):
+        if tipo in graficos:
+            doc.add_picture(io.BytesIO(graficos[tipo]), width=Inches(6))
+
+
+def _construir_documento(df: pl.dataframe, diff: dict = None, agregados: dict = None):
+    """
+    Arma el documento completo en memoria (sin tocar disco).
+
+    Returns:
+        docx.Document
+    """
+    logger.info("   creando documento word")
+    doc = nuevo_documento()
+
+    #titulo principal
+    titulo = doc.add_heading("reporte de la pobración mundial", 0)
+
+    #fecha
+    fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M")
+    doc.add_paragraph(f"fecha de generación: {fecha_actual}")
+    doc.add_paragraph()  #espacio en blanco
+
+    logger.info("   calculando estadísticas globales...")
+
+    #estadísticas globales
+    doc.add_heading("Estadísticas globales", 1)
+
+    #estadísticas desde la capa de agregados (caché por hash de datos)
+    if agregados is None:
+        agregados = obtener_agregados(df)
+
+    #los gráficos se dibujan en otros procesos mientras se arman las tablas
+    graficos_pendientes = enviar_graficos(df, agregados)
+
+    poblacion_total = agregados["global"]["poblacion_total"]
+    poblacion_promedio = agregados["global"]["poblacion_promedio"]
+    total_paises = agregados["global"]["paises"]
+
+    logger.info(f"  - población mundial total: {poblacion_total:,}")
+    logger.info(f"  - promedio por país: {int(poblacion_promedio):,}")
+    logger.info(f"  - total países: {total_paises}")
+
+    #crear tabla de estadísticas
+    agregar_tabla(doc, ["métrica", "valor"], [
+        ["Población mundial", f"{poblacion_total:,}"],
+        ["población promedio por país", f"{int(poblacion_promedio):,}"],
+        ["total de países", str(total_paises)]
+    ])
+
+    doc.add_paragraph()
+
+    logger.info("   generando tabla TOP 10...")
+    #top 10 países
+    doc.add_heading("top 10 países por población", 1)
+
+    top10 = df.head(10)
+
+    #crear tabla (siempre 10 filas de datos, como el reporte original)
+    agregar_tabla(
+        doc,
+        ["País", "Población 2024", "Cambio %", "Continente"],
+        [
+            [
+                dato['pais'],
+                f"{dato['poblacion_2024']:,}",
+                f"{dato['cambio_porcentual']:,}",
+                dato['continente']
+            ]
+            for dato in top10.iter_rows(named=True)
+        ],
+        total_filas=10
+    )
+
+    logger.info("   generando tabla por continente...")
+    doc.add_paragraph()
+    _agregar_seccion_continentes(doc, agregados)
+
+    if diff is not None:
+        logger.info("   agregando sección de cambios...")
+        doc.add_paragraph()
+        _agregar_seccion_cambios(doc, diff)
+
+    logger.info("   insertando gráficos...")
+    with span("graficos_espera"):
+        graficos = recolectar_graficos(graficos_pendientes)
+    if graficos:
+        doc.add_paragraph()
+        _agregar_seccion_graficos(doc, graficos)
+
+    return doc
+
+
+def nombre_reporte(sufijo: str = None) -> str:
+    """
+    Nombre de archivo del reporte según la fecha actual (hasta segundos) más
+    un sufijo (clave de caché o run_id; aleatorio si no se pasa) para que dos
+    reportes del mismo segundo no se pisen.
+    """
+    fecha_archivo = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return f"reporte_población_{fecha_archivo}_{sufijo or uuid.uuid4().hex[:8]}.docx"
+
 
+@cronometrar("etapa_duracion_segundos", etapa="generacion")
+def crear_reporte_en_memoria(df: pl.dataframe, diff: dict = None, agregados: dict = None, sufijo: str = None):
     """
-    Genera reporte DOCX a partir de DataFrame procesado.
-    
+    Genera el reporte DOCX en un buffer en memoria, sin escribir en disco.
+
     Args:
         df: DataFrame con datos de población mundial
-        
+        diff: cambios desde el último snapshot (ver snapshots.calcular_diff);
+            si se pasa, se agrega la sección de cambios
+        agregados: resultado de aggregator.obtener_agregados; si no se pasa,
+            se obtiene de la caché de agregados
+        sufijo: agregado al nombre del archivo (ver nombre_reporte)
+
     Returns:
-        str: Ruta completa del archivo generado
+        tuple: (nombre_archivo, bytes del DOCX)
         None: Si hay error crítico
     """
     try:
         logger.info("=" * 60)
-        logger.info("INICIANDO GENERACIÓN DE REPORTE")
+        logger.info("INICIANDO GENERACIÓN DE REPORTE (EN MEMORIA)")
         logger.info("=" * 60)
 
         #validar entrada
@@ -34,98 +228,23 @@ def crear_reporte(df: pl.dataframe) -> str:
 
         logger.info(f"  DF recibido: {df.height} registros")
 
-        logger.info("  verificando existencia de carpeta outputs")
-        Path("outputs").mkdir(exist_ok=True)
-
-        logger.info("   creando documento word")
-        doc = Document()
-
-        #titulo principal
-        titulo = doc.add_heading("reporte de la pobración mundial", 0)
-
-        #fecha
-        fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M")
-        doc.add_paragraph(f"fecha de generación: {fecha_actual}")
-        doc.add_paragraph()  #espacio en blanco
-
-        logger.info("   calculando estadísticas globales...")
-
-        #estadísticas globales
-        doc.add_heading("Estadísticas globales", 1)
-
-        #calcular estadísticas
-        poblacion_total = df["poblacion_2024"].sum()
-        poblacion_promedio = df["poblacion_2024"].mean()
-        total_paises = df.height
-
-        logger.info(f"  - población mundial total: {poblacion_total:,}")
-        logger.info(f"  - promedio por país: {int(poblacion_promedio):,}")
-        logger.info(f"  - total países: {total_paises}")
+        with span("documento_construir"):
+            doc = _construir_documento(df, diff, agregados)
 
-        #crear tabla de estadísticas
-        tabla_stats = doc.add_table(rows=4, cols=2)
-        tabla_stats.style = 'Light Grid Accent 1'
-
-        #encabezados
-        tabla_stats.rows[0].cells[0].text = "métrica"
-        tabla_stats.rows[0].cells[1].text = "valor"
-
-        #datos
-        tabla_stats.rows[1].cells[0].text = "Población mundial"
-        tabla_stats.rows[1].cells[1].text = f"{poblacion_total:,}"
-
-        tabla_stats.rows[2].cells[0].text = "población promedio por país"
-        tabla_stats.rows[2].cells[1].text = f"{int(poblacion_promedio):,}"
-
-        tabla_stats.rows[3].cells[0].text = "total de países"
-        tabla_stats.rows[3].cells[1].text = str(total_paises)
-
-        doc.add_paragraph()
-
-        logger.info("   generando tabla TOP 10...")
-        #top 10 países
-        doc.add_heading("top 10 países por población", 1)
-
-        top10 = df.head(10)
-
-        #crear tabla
-        tabla_top = doc.add_table(rows=11, cols= 4)
-        tabla_top.style = 'Light Grid Accent 1'
-
-        #encabezados
-        encabezados = ["País", "Población 2024", "Cambio %", "Continente"]
-        for i,encabezado in enumerate(encabezados):
-            tabla_top.rows[0].cells[i].text = encabezado
-
-        #datos
-        for idx, dato in enumerate(top10.iter_rows(named=True)):
-            tabla_top.rows[idx + 1].cells[0].text = dato['pais']
-            tabla_top.rows[idx + 1].cells[1].text = f"{dato['poblacion_2024']:,}"
-            tabla_top.rows[idx + 1].cells[2].text = f"{dato['cambio_porcentual']:,}"
-            tabla_top.rows[idx + 1].cells[3].text = dato['continente']
-
-        logger.info("   guardando archivo...")
-        fecha_archivo = datetime.now().strftime("%Y-%m-%d_%H-%M")
-        nombre_archivo = f"reporte_población_{fecha_archivo}.docx"
-        ruta_completa = f"outputs/{nombre_archivo}"
-
-        doc.save(ruta_completa)
-
-        #verificar que se creó el archivo
-        if not Path(ruta_completa).exists():
-            logger.error(f"❌ el archivo no se creó en: {ruta_completa}")
-            return None
-
-        tamaño_kb = Path(ruta_completa).start().st_size / 1024
+        buffer = io.BytesIO()
+        with span("docx_guardar"):
+            doc.save(buffer)
+        contenido = buffer.getvalue()
+        nombre_archivo = nombre_reporte(sufijo)
+        observar("docx_bytes", len(contenido))
 
         logger.info("=" * 60)
-        logger.info("REPORTE GENERADO EXITOSAMENTE")
+        logger.info("REPORTE GENERADO EN MEMORIA")
         logger.info(f"  archivo: {nombre_archivo}")
-        logger.info(f"  ubicación: {ruta_completa}")
-        logger.info(f"  tamaño: {tamaño_kb:.2f} KB")
+        logger.info(f"  tamaño: {len(contenido) / 1024:.2f} KB")
         logger.info("=" * 60)
 
-        return ruta_completa
+        return nombre_archivo, contenido
 
     except Exception as e:
         logger.error("=" * 60)
@@ -136,3 +255,19 @@ def crear_reporte(df: pl.dataframe) -> str:
         return None
 
 
+def persistir_reporte(nombre_archivo: str, contenido: bytes) -> str:
+    """
+    Guarda en outputs/ un reporte generado en memoria (escritura atómica).
+
+    Returns:
+        str: ruta del archivo guardado
+    """
+    Path("outputs").mkdir(exist_ok=True)
+    ruta_completa = Path("outputs") / nombre_archivo
+
+    temporal = ruta_temporal(ruta_completa)
+    temporal.write_bytes(contenido)
+    temporal.replace(ruta_completa)
+
+    logger.info(f"💾 reporte persistido en {ruta_completa} ({len(contenido) / 1024:.2f} KB)")
+    return str(ruta_completa)
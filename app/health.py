@@ -0,0 +1,214 @@
+#health.py
+
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from datetime import datetime
+from app.logger import configurar_logger
+
+logger = configurar_logger('health')
+
+#segundos entre chequeos profundos reales (en medio se devuelve el último)
+DEEP_INTERVALO_SEG = float(os.getenv("HEALTH_DEEP_INTERVALO_SEG", "30"))
+DEEP_TIMEOUT_SEG = float(os.getenv("HEALTH_DEEP_TIMEOUT_SEG", "5"))
+#componentes que deben estar listos para recibir tráfico
+COMPONENTES_REQUERIDOS = tuple(
+    c for c in os.getenv("HEALTH_COMPONENTES_REQUERIDOS", "scheduler,carpetas").split(",") if c
+)
+
+# Variables globales: estado en memoria que actualizan pipeline, scheduler y
+# arranque; los probes solo lo leen (sin disco ni red)
+_lock = Lock()
+_inicio = time.time()
+_componentes = {}           #nombre -> {listo, detalle, desde}
+_ejecuciones_en_curso = {}  #run_id -> {etapa, inicio}
+_ultima_ejecucion = None
+_ultimo_exito = None
+
+_lock_deep = Lock()
+_ultimo_deep = None
+
+#campos de ultima_ejecucion / ultimo_exito (subconjunto de una fila de run_history)
+CAMPOS_EJECUCION = ("run_id", "timestamp", "estado", "duracion_segundos", "error", "perfil")
+
+
+def marcar_componente(nombre: str, listo: bool, detalle: str = None):
+    """Registra si un componente (scheduler, carpetas, módulos...) está listo."""
+    with _lock:
+        _componentes[nombre] = {"listo": listo, "detalle": detalle, "desde": datetime.now().isoformat()}
+
+
+def _registro_ejecucion(fila: dict):
+    """Misma forma para las ejecuciones de este proceso y las leídas del historial."""
+    return {campo: fila.get(campo) for campo in CAMPOS_EJECUCION} if fila else None
+
+
+def cargar_ultimas_ejecuciones(ultima: dict = None, ultimo_exito: dict = None):
+    """Inicializa el estado con filas del historial persistido (una vez, al arrancar)."""
+    global _ultima_ejecucion, _ultimo_exito
+
+    with _lock:
+        _ultima_ejecucion = _ultima_ejecucion or _registro_ejecucion(ultima)
+        _ultimo_exito = _ultimo_exito or _registro_ejecucion(ultimo_exito)
+
+
+def registrar_inicio_ejecucion(run_id: str):
+    with _lock:
+        _ejecuciones_en_curso[run_id] = {"etapa": "iniciando", "inicio": datetime.now().isoformat()}
+
+
+def registrar_etapa(run_id: str, etapa: str):
+    with _lock:
+        if run_id in _ejecuciones_en_curso:
+            _ejecuciones_en_curso[run_id]["etapa"] = etapa
+
+
+def registrar_fin_ejecucion(run_id: str, estado: str, duracion_seg: float, error: str = None, perfil: str = None):
+    """Guarda el resultado de una ejecución como la última (y la último éxito si aplica)."""
+    global _ultima_ejecucion, _ultimo_exito
+
+    registro = _registro_ejecucion({
+        "run_id": run_id,
+        "timestamp": datetime.now().isoformat(),
+        "estado": estado,
+        "duracion_segundos": duracion_seg,
+        "error": error,
+        "perfil": perfil
+    })
+
+    with _lock:
+        _ejecuciones_en_curso.pop(run_id, None)
+        _ultima_ejecucion = registro
+        if estado == "EXITOSO":
+            _ultimo_exito = registro
+
+
+def estado_vivo() -> dict:
+    """Liveness: el proceso responde."""
+    return {"status": "alive", "uptime_seg": round(time.time() - _inicio, 1)}
+
+
+def estado_listo() -> tuple:
+    """
+    Readiness: los componentes requeridos están listos.
+
+    Returns:
+        tuple: (listo, detalle)
+    """
+    with _lock:
+        componentes = {nombre: dict(c) for nombre, c in _componentes.items()}
+
+    pendientes = [
+        nombre for nombre in COMPONENTES_REQUERIDOS
+        if not componentes.get(nombre, {}).get("listo")
+    ]
+
+    return not pendientes, {
+        "status": "ready" if not pendientes else "not_ready",
+        "pendientes": pendientes,
+        "componentes": componentes
+    }
+
+
+def resumen_salud() -> dict:
+    """Estado completo en memoria: componentes, ejecuciones en curso y últimas ejecuciones."""
+    from app.browser_pool import obtener_estado_pool
+
+    listo, detalle = estado_listo()
+    navegadores = obtener_estado_pool()
+
+    with _lock:
+        return {
+            "status": "healthy" if listo else "degraded",
+            "timestamp": datetime.now().isoformat(),
+            "uptime_seg": round(time.time() - _inicio, 1),
+            "componentes": detalle["componentes"],
+            "navegadores": navegadores,
+            "en_curso": {run_id: dict(e) for run_id, e in _ejecuciones_en_curso.items()},
+            "ultima_ejecucion": _ultima_ejecucion,
+            "ultimo_exito": _ultimo_exito
+        }
+
+
+def _chequear(nombre: str, funcion) -> dict:
+    inicio = time.perf_counter()
+    try:
+        detalle = funcion()
+        ok = True
+    except Exception as e:
+        detalle = f"{type(e).__name__}: {e}"
+        ok = False
+    return {"ok": ok, "detalle": detalle, "ms": round((time.perf_counter() - inicio) * 1000, 1)}
+
+
+def _chequear_disco():
+    prueba = Path("outputs") / ".health"
+    prueba.write_text(datetime.now().isoformat())
+    prueba.unlink()
+    return "outputs/ escribible"
+
+
+def _chequear_historial():
+    from app.run_history import ultima_ejecucion
+    ultima = ultima_ejecucion()
+    return f"última ejecución id={ultima['id']}" if ultima else "historial vacío"
+
+
+def _chequear_fuente():
+    import requests
+    from app.source_cache import CACHE_OFFLINE, HTTP_HEADERS
+    from app.extractor import URL_POBLACION
+
+    if CACHE_OFFLINE:
+        return "modo offline, fuente no consultada"
+
+    respuesta = requests.head(URL_POBLACION, headers=HTTP_HEADERS, timeout=DEEP_TIMEOUT_SEG, allow_redirects=True)
+    respuesta.raise_for_status()
+    return f"HTTP {respuesta.status_code}"
+
+
+def _chequear_navegadores():
+    from app.browser_pool import obtener_estado_pool
+    estado = obtener_estado_pool()
+    if estado["activo"] and estado["navegadores_sanos"] == 0:
+        raise RuntimeError("pool activo sin navegadores sanos")
+    return f"{estado['navegadores_sanos']} navegadores sanos, {estado['tareas_en_cola']} tareas en cola"
+
+
+def chequeo_profundo(forzar: bool = False) -> dict:
+    """
+    Prueba las dependencias reales (disco, historial, fuente, navegadores).
+    Limitado a uno cada DEEP_INTERVALO_SEG: en medio retorna el último resultado.
+
+    Returns:
+        dict: {status, cacheado, edad_seg, chequeos}
+    """
+    global _ultimo_deep
+
+    with _lock_deep:
+        ahora = time.time()
+        if not forzar and _ultimo_deep and ahora - _ultimo_deep["_momento"] < DEEP_INTERVALO_SEG:
+            resultado = dict(_ultimo_deep)
+            resultado["cacheado"] = True
+        else:
+            chequeos = {
+                "disco": _chequear("disco", _chequear_disco),
+                "historial": _chequear("historial", _chequear_historial),
+                "fuente": _chequear("fuente", _chequear_fuente),
+                "navegadores": _chequear("navegadores", _chequear_navegadores)
+            }
+            resultado = {
+                "status": "healthy" if all(c["ok"] for c in chequeos.values()) else "unhealthy",
+                "timestamp": datetime.now().isoformat(),
+                "chequeos": chequeos,
+                "_momento": ahora,
+                "cacheado": False
+            }
+            _ultimo_deep = resultado
+            if resultado["status"] != "healthy":
+                fallidos = [nombre for nombre, c in chequeos.items() if not c["ok"]]
+                logger.warning(f"⚠️    chequeo profundo con fallos: {', '.join(fallidos)}")
+
+        resultado["edad_seg"] = round(ahora - resultado["_momento"], 1)
+        return {k: v for k, v in resultado.items() if k != "_momento"}
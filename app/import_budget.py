@@ -0,0 +1,124 @@
+#import_budget.py
+
+"""
+Chequeo del costo de importar app.main (arranque en frío).
+
+Uso:
+    python -m app.import_budget
+
+Importa app.main en un proceso nuevo con `python -X importtime`, imprime el
+costo por módulo y termina con código 1 si se supera el presupuesto o si
+algún módulo pesado se cargó al importar (deben cargarse en el primer uso).
+"""
+
+import os
+import sys
+import subprocess
+
+MODULO_OBJETIVO = os.getenv("IMPORT_BUDGET_MODULO", "app.main")
+PRESUPUESTO_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+TOP_N = 15
+
+#paquetes que no deben importarse al arrancar la API
+PROHIBIDOS = ("playwright", "polars", "docx", "lxml", "matplotlib", "pyarrow", "xlsxwriter", "requests")
+
+
+def medir_importacion(modulo: str = MODULO_OBJETIVO) -> list:
+    """
+    Importa el módulo en un intérprete nuevo con -X importtime.
+
+    Returns:
+        list[dict]: {modulo, propio_ms, acumulado_ms, nivel} en orden de importación
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+
+    if resultado.returncode != 0:
+        raise RuntimeError(f"no se pudo importar {modulo}:\n{resultado.stderr[-2000:]}")
+
+    registros = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+
+        propio, acumulado, nombre = linea[len("import time:"):].split("|", 2)
+        registros.append({
+            "modulo": nombre.strip(),
+            "propio_ms": int(propio) / 1000,
+            "acumulado_ms": int(acumulado) / 1000,
+            "nivel": (len(nombre) - len(nombre.lstrip())) // 2
+        })
+
+    return registros
+
+
+def desglosar(registros: list, modulo: str = MODULO_OBJETIVO) -> dict:
+    """
+    Resume los registros de importación.
+
+    Returns:
+        dict: {total_ms, modulos_app, paquetes, prohibidos}
+    """
+    raiz = next((r for r in registros if r["modulo"] == modulo), None)
+
+    #costo acumulado de cada módulo de la app y de cada paquete externo
+    #(la primera vez que aparece, que es la que paga el costo)
+    modulos_app = {}
+    paquetes = {}
+    for r in registros:
+        nombre = r["modulo"]
+        paquete = nombre.split(".")[0]
+
+        if paquete == "app":
+            modulos_app.setdefault(nombre, r["acumulado_ms"])
+        elif nombre == paquete:
+            paquetes.setdefault(paquete, r["acumulado_ms"])
+
+    cargados = {r["modulo"].split(".")[0] for r in registros}
+
+    return {
+        "total_ms": raiz["acumulado_ms"] if raiz else sum(r["propio_ms"] for r in registros),
+        "modulos_app": modulos_app,
+        "paquetes": paquetes,
+        "prohibidos": sorted(cargados.intersection(PROHIBIDOS))
+    }
+
+
+def main() -> int:
+    desglose = desglosar(medir_importacion())
+
+    print("=" * 60)
+    print(f"COSTO DE IMPORTAR {MODULO_OBJETIVO}")
+    print("=" * 60)
+
+    print("módulos de la app (acumulado):")
+    for nombre, ms in sorted(desglose["modulos_app"].items(), key=lambda x: -x[1]):
+        print(f"  {ms:9.1f} ms  {nombre}")
+
+    print(f"paquetes externos (top {TOP_N}, acumulado):")
+    for nombre, ms in sorted(desglose["paquetes"].items(), key=lambda x: -x[1])[:TOP_N]:
+        print(f"  {ms:9.1f} ms  {nombre}")
+
+    print("-" * 60)
+    print(f"total: {desglose['total_ms']:.1f} ms (presupuesto {PRESUPUESTO_MS:.0f} ms)")
+
+    fallos = []
+    if desglose["total_ms"] > PRESUPUESTO_MS:
+        fallos.append(f"importar {MODULO_OBJETIVO} tardó {desglose['total_ms']:.0f} ms > {PRESUPUESTO_MS:.0f} ms")
+    if desglose["prohibidos"]:
+        fallos.append(f"paquetes pesados cargados al importar: {', '.join(desglose['prohibidos'])}")
+
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if not fallos:
+        print("✅ dentro del presupuesto")
+
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
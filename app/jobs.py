@@ -0,0 +1,340 @@
+#jobs.py
+
+import os
+import time
+import uuid
+from pathlib import Path
+from threading import Lock, Event
+from concurrent.futures import ThreadPoolExecutor
+from app.logger import configurar_logger, contexto_log
+from app.scheduler import ejecutar_pipeline
+from app.profiler import PERFILADO_POR_DEFECTO, CPROFILE_POR_DEFECTO
+
+logger = configurar_logger('jobs')
+
+#pipelines simultáneos como máximo (el resto espera en cola)
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+#trabajos terminados que se conservan para consultar estado/resultado
+JOBS_MAX_FINALIZADOS = int(os.getenv("JOBS_MAX_FINALIZADOS", "100"))
+#espera máxima al cerrar por los trabajos que están corriendo
+JOBS_ESPERA_CIERRE_SEG = float(os.getenv("JOBS_ESPERA_CIERRE_SEG", "30"))
+
+EN_COLA = "en_cola"
+EN_EJECUCION = "en_ejecucion"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+
+# Variables globales
+_executor = None
+_lock = Lock()
+_trabajos = {}      #id -> trabajo
+_en_curso = {}      #clave de deduplicación -> id del trabajo en cola / ejecución
+_terminados = {}    #id -> Event que se marca al terminar (para esperar_trabajo)
+_listos = {}        #id -> Event que se marca con el reporte en memoria (para esperar_reporte)
+_reportes = {}      #id -> (nombre, bytes) del DOCX mientras no esté en outputs/
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    """Pool de hilos creado en el primer uso."""
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOBS_WORKERS, thread_name_prefix="job")
+        logger.info(f"🧵 pool de trabajos iniciado ({JOBS_WORKERS} workers)")
+    return _executor
+
+
+def _clave_dedup(motor: str, perfilar: bool, cprofile: bool, persistir: bool) -> str:
+    """
+    Solicitudes con los mismos parámetros producen el mismo reporte (y perfil).
+    Los None se resuelven a su valor por defecto antes de armar la clave, así
+    motor=None y motor='http' (si es el por defecto) comparten trabajo.
+    """
+    #extractor importa playwright y lxml: solo cuando ya hay un trabajo
+    from app.extractor import resolver_motor
+
+    motor = resolver_motor(motor)
+    perfilar = PERFILADO_POR_DEFECTO if perfilar is None else perfilar
+    cprofile = CPROFILE_POR_DEFECTO if cprofile is None else cprofile
+    return f"pipeline:{motor}:{bool(perfilar)}:{bool(cprofile)}:{bool(persistir)}"
+
+
+def _actualizar(id_trabajo: str, **cambios):
+    with _lock:
+        _trabajos[id_trabajo].update(cambios)
+
+
+def _podar_finalizados():
+    """Descarta los trabajos terminados más viejos (llamar con _lock tomado)."""
+    finalizados = [t for t in _trabajos.values() if t["estado"] in (COMPLETADO, FALLIDO)]
+    sobrantes = len(finalizados) - JOBS_MAX_FINALIZADOS
+
+    if sobrantes > 0:
+        for trabajo in sorted(finalizados, key=lambda t: t["finalizado"])[:sobrantes]:
+            _trabajos.pop(trabajo["id"], None)
+            _reportes.pop(trabajo["id"], None)
+
+
+def _entregar_reporte(id_trabajo: str, nombre_archivo: str, contenido: bytes):
+    """Callback del pipeline: el DOCX ya está en memoria, despierta a quien lo espera."""
+    with _lock:
+        _reportes[id_trabajo] = (nombre_archivo, contenido)
+        listo = _listos.get(id_trabajo)
+
+    if listo is not None:
+        listo.set()
+
+
+def _cancelado(id_trabajo: str, clave: str, futuro):
+    """
+    Callback del future: si se canceló antes de empezar (detener_trabajos), el
+    trabajo queda FALLIDO, libera su clave y despierta a quien lo espera.
+    """
+    if not futuro.cancelled():
+        return
+
+    with _lock:
+        trabajo = _trabajos.get(id_trabajo)
+        if trabajo is None:
+            return
+        trabajo.update(
+            estado=FALLIDO,
+            finalizado=time.time(),
+            error="cancelado al detener la cola de trabajos"
+        )
+        if _en_curso.get(clave) == id_trabajo:
+            _en_curso.pop(clave)
+        eventos = [_terminados.pop(id_trabajo, None), _listos.pop(id_trabajo, None)]
+
+    for evento in eventos:
+        if evento is not None:
+            evento.set()
+
+    logger.warning(f"⚠️    trabajo {id_trabajo} cancelado antes de empezar")
+
+
+def _ejecutar_trabajo(id_trabajo: str, clave: str, motor: str, perfilar: bool, cprofile: bool, persistir: bool):
+    """
+    Corre el pipeline en un worker del pool y registra etapa y resultado. El
+    DOCX se entrega en memoria apenas existe (ver esperar_reporte); guardarlo
+    en outputs/ queda en segundo plano respecto de quien lo espera.
+    """
+    _actualizar(id_trabajo, estado=EN_EJECUCION, iniciado=time.time())
+    logger.info(f"▶️  trabajo {id_trabajo} iniciado")
+
+    try:
+        with contexto_log(job_id=id_trabajo):
+            ruta = ejecutar_pipeline(
+                motor=motor,
+                al_cambiar_etapa=lambda etapa: _actualizar(id_trabajo, etapa=etapa),
+                perfilar=perfilar,
+                cprofile=cprofile,
+                persistir=persistir,
+                al_generar=lambda nombre, contenido: _entregar_reporte(id_trabajo, nombre, contenido)
+            )
+    except Exception as e:
+        ruta = None
+        logger.error(f"❌ trabajo {id_trabajo}: {type(e).__name__}: {e}")
+
+    with _lock:
+        trabajo = _trabajos[id_trabajo]
+        trabajo["finalizado"] = time.time()
+        trabajo["duracion_seg"] = round(trabajo["finalizado"] - trabajo["iniciado"], 2)
+
+        if ruta:
+            trabajo.update(estado=COMPLETADO, etapa="completado", ruta=ruta if persistir else None)
+            if persistir:
+                #ya está en disco: no hace falta retenerlo en memoria
+                _reportes.pop(id_trabajo, None)
+        else:
+            trabajo.update(estado=FALLIDO, error=f"el pipeline falló en la etapa '{trabajo['etapa']}', revisar logs/")
+
+        #a partir de aquí una nueva solicitud crea otro trabajo
+        if _en_curso.get(clave) == id_trabajo:
+            _en_curso.pop(clave)
+        eventos = [_terminados.pop(id_trabajo, None), _listos.pop(id_trabajo, None)]
+        _podar_finalizados()
+
+    for evento in eventos:
+        if evento is not None:
+            evento.set()
+
+    logger.info(f"⏹️  trabajo {id_trabajo}: {trabajo['estado']} ({trabajo['duracion_seg']} s)")
+
+
+def enviar_trabajo(motor: str = None, perfilar: bool = None, cprofile: bool = None, persistir: bool = True):
+    """
+    Encola una ejecución del pipeline y retorna sin esperar. Si ya hay un trabajo
+    idéntico en cola o en ejecución, se reutiliza en lugar de lanzar otro.
+
+    Args:
+        motor: motor de extracción ('http' | 'playwright'); None usa el por defecto
+        perfilar / cprofile: ver ejecutar_pipeline (None usa la configuración)
+        persistir: guardar el reporte en outputs/ (si no, solo queda en memoria)
+
+    Returns:
+        tuple: (copia del trabajo, True si se creó uno nuevo)
+
+    Raises:
+        ValueError: si el motor no existe (no se encola nada)
+    """
+    clave = _clave_dedup(motor, perfilar, cprofile, persistir)
+
+    with _lock:
+        id_existente = _en_curso.get(clave)
+        if id_existente:
+            trabajo = _trabajos[id_existente]
+            trabajo["solicitudes"] += 1
+            logger.info(f"🔗 solicitud unida al trabajo en curso {id_existente}")
+            return dict(trabajo), False
+
+        id_trabajo = uuid.uuid4().hex[:12]
+        trabajo = {
+            "id": id_trabajo,
+            "estado": EN_COLA,
+            "etapa": "en_cola",
+            "motor": motor,
+            "persistir": persistir,
+            "solicitudes": 1,
+            "creado": time.time(),
+            "iniciado": None,
+            "finalizado": None,
+            "duracion_seg": None,
+            "ruta": None,
+            "error": None
+        }
+        _trabajos[id_trabajo] = trabajo
+        _en_curso[clave] = id_trabajo
+        _terminados[id_trabajo] = Event()
+        _listos[id_trabajo] = Event()
+
+        futuro = _obtener_executor().submit(_ejecutar_trabajo, id_trabajo, clave, motor, perfilar, cprofile, persistir)
+
+    #fuera de _lock: si el future ya terminó, el callback corre en este hilo
+    futuro.add_done_callback(lambda f: _cancelado(id_trabajo, clave, f))
+
+    logger.info(f"📨 trabajo {id_trabajo} encolado")
+    return dict(trabajo), True
+
+
+def obtener_trabajo(id_trabajo: str):
+    """
+    Returns:
+        dict: copia del trabajo
+        None: si no existe (o ya se descartó)
+    """
+    with _lock:
+        trabajo = _trabajos.get(id_trabajo)
+        return dict(trabajo) if trabajo else None
+
+
+def esperar_trabajo(id_trabajo: str, timeout: float = None):
+    """
+    Bloquea hasta que el trabajo termine o pase timeout.
+
+    Returns:
+        dict: copia del trabajo (sigue en cola / en ejecución si venció el timeout)
+        None: si no existe
+    """
+    with _lock:
+        if id_trabajo not in _trabajos:
+            return None
+        terminado = _terminados.get(id_trabajo)
+
+    if terminado is not None:
+        terminado.wait(timeout)
+
+    return obtener_trabajo(id_trabajo)
+
+
+def esperar_reporte(id_trabajo: str, timeout: float = None):
+    """
+    Bloquea hasta que el DOCX del trabajo esté en memoria (sin esperar a que
+    se guarde en disco), hasta que el trabajo termine o pase timeout.
+
+    Returns:
+        dict: copia del trabajo (el reporte se lee con obtener_reporte)
+        None: si no existe
+    """
+    with _lock:
+        if id_trabajo not in _trabajos:
+            return None
+        listo = _listos.get(id_trabajo)
+
+    if listo is not None:
+        listo.wait(timeout)
+
+    return obtener_trabajo(id_trabajo)
+
+
+def obtener_reporte(id_trabajo: str):
+    """
+    Reporte de un trabajo: de memoria si todavía está ahí, si no de outputs/.
+
+    Returns:
+        tuple: (nombre_archivo, bytes)
+        None: si aún no hay reporte o el archivo ya no existe
+    """
+    with _lock:
+        reporte = _reportes.get(id_trabajo)
+        trabajo = _trabajos.get(id_trabajo)
+        ruta = trabajo["ruta"] if trabajo else None
+
+    if reporte is not None:
+        return reporte
+    if ruta is None:
+        return None
+
+    try:
+        return os.path.basename(ruta), Path(ruta).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def obtener_estado_trabajos() -> dict:
+    """Resumen de la cola: trabajos por estado y los más recientes."""
+    with _lock:
+        trabajos = [dict(t) for t in _trabajos.values()]
+
+    por_estado = {estado: 0 for estado in (EN_COLA, EN_EJECUCION, COMPLETADO, FALLIDO)}
+    for trabajo in trabajos:
+        por_estado[trabajo["estado"]] += 1
+
+    return {
+        "workers": JOBS_WORKERS,
+        "por_estado": por_estado,
+        "recientes": sorted(trabajos, key=lambda t: t["creado"], reverse=True)[:20]
+    }
+
+
+def detener_trabajos(timeout: float = JOBS_ESPERA_CIERRE_SEG):
+    """
+    Cancela los trabajos en cola (quedan FALLIDO) y espera a los que están
+    corriendo hasta timeout segundos.
+    """
+    global _executor
+
+    with _lock:
+        executor, _executor = _executor, None
+
+    if executor is None:
+        return
+
+    logger.info("🛑 deteniendo pool de trabajos...")
+    #los cancelados pasan por _cancelado; no se bloquea aquí por los que corren
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    #los cancelados ya soltaron su evento: quedan los que alcanzaron a empezar
+    with _lock:
+        corriendo = list(_terminados.items())
+
+    limite = time.monotonic() + timeout
+    pendientes = []
+    for id_trabajo, terminado in corriendo:
+        if not terminado.wait(max(0.0, limite - time.monotonic())):
+            pendientes.append(id_trabajo)
+
+    if pendientes:
+        logger.warning(f"⚠️    {len(pendientes)} trabajo(s) siguen corriendo tras {timeout:.0f} s: {', '.join(pendientes)}")
+    else:
+        logger.info("✅ pool de trabajos detenido")
@@ -1,15 +1,199 @@
 import logging
 import sys
 import json
+import os
+import time
+import copy
+import queue
+import atexit
 
 from logging import handlers
 from pathlib import Path
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from threading import Lock
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+#'texto' (formato de siempre) | 'json' (una línea JSON por registro)
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto")
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+
+#muestreo de advertencias repetitivas (ej. una por fila en el extractor):
+#se emiten las primeras LOG_MUESTREO_LIMITE por ventana, luego 1 de cada
+#LOG_MUESTREO_CADA (0 = ninguna) y al cerrar la ventana un resumen
+LOG_MUESTREO_LIMITE = int(os.getenv("LOG_MUESTREO_LIMITE", "5"))
+LOG_MUESTREO_CADA = int(os.getenv("LOG_MUESTREO_CADA", "100"))
+LOG_MUESTREO_VENTANA_SEG = float(os.getenv("LOG_MUESTREO_VENTANA_SEG", "60"))
+
+#ids de la ejecución / trabajo actual, agregados a cada registro
+_contexto_log = ContextVar("contexto_log", default={})
+
+# Variables globales del backend: una cola compartida y un solo hilo
+# (QueueListener) dueño de la consola y del archivo rotativo
+_cola_logs = queue.SimpleQueue()
+_handler_cola = None
+_listener = None
+_lock_backend = Lock()
+_loggers = set()    #nombres configurados; se les reconecta el handler si el backend se recrea
+
+_muestreo = {}
+_lock_muestreo = Lock()
+
+#formatea las trazas en el hilo que loguea (ver _HandlerCola)
+_formato_trazas = logging.Formatter()
+
+
+class FormatoJSON(logging.Formatter):
+    """Un objeto JSON por línea con nivel, módulo, mensaje e ids de contexto."""
+
+    def format(self, record):
+        registro = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "modulo": record.name,
+            "hilo": record.threadName,
+            "mensaje": record.getMessage()
+        }
+        registro.update(getattr(record, "contexto", None) or {})
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            registro["excepcion"] = record.exc_text
+
+        return json.dumps(registro, ensure_ascii=False)
+
+
+class _HandlerCola(QueueHandler):
+    """
+    QueueHandler que conserva la traza de las excepciones. El prepare de la
+    stdlib funde la traza en el mensaje y borra exc_info; aquí se formatea en
+    el hilo que loguea (exc_text) y el mensaje queda limpio, así cada
+    formato del listener la ubica donde corresponde (texto: debajo del
+    mensaje; json: campo "excepcion").
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _formato_trazas.formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        #el traceback retiene frames (y variables locales) del hilo que logueó
+        record.exc_info = None
+        return record
+
+
+def _agregar_contexto(record) -> bool:
+    """Filtro del handler de cola: copia los ids del contexto del hilo que loguea."""
+    record.contexto = _contexto_log.get()
+    return True
+
+
+def fijar_contexto_log(**ids):
+    """
+    Agrega ids (ej. run_id, job_id) a los registros del contexto actual (y de
+    los hilos que lo copien). Retorna un token para restaurar_contexto_log.
+    """
+    return _contexto_log.set({**_contexto_log.get(), **{k: v for k, v in ids.items() if v is not None}})
+
+
+def restaurar_contexto_log(token):
+    _contexto_log.reset(token)
+
+
+@contextmanager
+def contexto_log(**ids):
+    """Igual que fijar_contexto_log, limitado a un bloque with."""
+    token = fijar_contexto_log(**ids)
+    try:
+        yield
+    finally:
+        restaurar_contexto_log(token)
+
+
+def _iniciar_backend() -> QueueHandler:
+    """
+    Crea el handler de cola y el listener con los sinks si no existen (al
+    primer logger o después de detener_logging) y conecta el handler a todos
+    los loggers configurados.
+    """
+    global _handler_cola, _listener
+
+    with _lock_backend:
+        if _handler_cola is not None:
+            return _handler_cola
+
+        #crear directorio de logs si no existe
+        Path("logs").mkdir(exist_ok=True)
+
+        if LOG_FORMATO == "json":
+            formato = FormatoJSON()
+        else:
+            #formaro detallado con timesamp
+            formato = logging.Formatter(
+                '%(asctime)s | %(name)-12s | %(levelname)-8s | %(message)s',
+                datefmt = '%Y-%m-%d %H:%M:%S'
+            )
+
+        # handler 1: consola (para railway logs en vivo)
+        handler_consola = logging.StreamHandler(sys.stdout)
+        handler_consola.setFormatter(formato)
+
+        #handler 2: archivo rotativo (persistencia local); un único dueño, así
+        #la rotación no compite entre loggers
+        handler_archivo = RotatingFileHandler(
+            filename='logs/app.log',
+            maxBytes=5*1024*1024,  #5MB
+            backupCount=10,
+            encoding='utf-8',
+            delay=True  #el archivo se abre con el primer mensaje, no al importar
+        )
+        handler_archivo.setFormatter(formato)
+
+        _listener = QueueListener(_cola_logs, handler_consola, handler_archivo, respect_handler_level=True)
+        _listener.start()
+        atexit.unregister(detener_logging)
+        atexit.register(detener_logging)
+
+        #el hilo que loguea solo encola el registro
+        _handler_cola = _HandlerCola(_cola_logs)
+        _handler_cola.addFilter(_agregar_contexto)
+
+        for nombre in _loggers:
+            logging.getLogger(nombre).addHandler(_handler_cola)
+
+        return _handler_cola
+
+
+def iniciar_logging():
+    """Recrea el backend si se detuvo (ej. la app vuelve a arrancar en el mismo proceso)."""
+    _iniciar_backend()
+
+
+def detener_logging():
+    """
+    Vacía la cola, detiene el listener y desconecta el handler de cola de los
+    loggers (se llama también al salir del proceso); iniciar_logging lo recrea.
+    """
+    global _handler_cola, _listener
+
+    with _lock_backend:
+        if _handler_cola is not None:
+            for nombre in _loggers:
+                logging.getLogger(nombre).removeHandler(_handler_cola)
+            _handler_cola = None
+
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
 
 def configurar_logger(nombre_modulo:str) -> logging.Logger:
     """
-    Configura un logger con salida a consola y archivo rotativo.
+    Configura un logger que encola sus registros; la escritura a consola y al
+    archivo rotativo la hace un único hilo en segundo plano.
     
     Args:
         nombre_modulo: Nombre del módulo que usa el logger (ej: 'extractor')
@@ -17,84 +201,92 @@ def configurar_logger(nombre_modulo:str) -> logging.Logger:
     Returns:
         Logger configurado
     """
-    #crear directorio de logs si no existe
-    Path("logs").mkdir(exist_ok=True)
-
     #crear logger específico para el módulo
     logger = logging.getLogger(nombre_modulo)
-    logger.setLevel(logging.INFO)
-
-    #evitar duplicar handlers si ya existe
-    if logger.handlers:
-        return logger
-
-    #formaro detallado con timesamp
-    formato = logging.Formatter(
-        '%(asctime)s | %(name)-12s | %(levelname)-8s | %(message)s',
-        datefmt = '%Y-%m-%d %H:%M:%S'
-    )
-
-    # handler 1: consola (para railway logs en vivo)
-    handler_consola = logging.StreamHandler(sys.stdout)
-    handler_consola.setLevel(logging.INFO)
-    handler_consola.setFormatter(formato)
-
-    #handler 2: archivo rotativo (persistencia local)
-    handler_archivo = RotatingFileHandler(
-        filename='logs/app.log',
-        maxBytes=5*1024*1024,  #5MB
-        backupCount=10,
-        encoding='utf-8'
-    )
-
-    handler_archivo.setLevel(logging.INFO)
-    handler_archivo.setFormatter(formato)
-
-    #agregar ambos handlers
-    logger.addHandler(handler_consola)
-    logger.addHandler(handler_archivo)
+    logger.setLevel(LOG_NIVEL)
+
+    #registrado para que un backend recreado (ver iniciar_logging) lo reconecte
+    with _lock_backend:
+        _loggers.add(nombre_modulo)
+
+    #evitar duplicar el handler si ya está conectado
+    handler = _iniciar_backend()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
     return logger
 
 
+def advertencia_muestreada(logger: logging.Logger, clave: str, mensaje: str):
+    """
+    logger.warning con muestreo por clave para advertencias que se repiten
+    (ej. una por fila). Cerrar con cerrar_muestreo para loguear el resumen.
+    """
+    ahora = time.monotonic()
+
+    with _lock_muestreo:
+        estado = _muestreo.get(clave)
+        if estado is None or ahora - estado["inicio"] > LOG_MUESTREO_VENTANA_SEG:
+            suprimidas = estado["suprimidas"] if estado else 0
+            estado = _muestreo[clave] = {"inicio": ahora, "vistas": 0, "suprimidas": 0}
+        else:
+            suprimidas = 0
+
+        estado["vistas"] += 1
+        excedente = estado["vistas"] - LOG_MUESTREO_LIMITE
+        emitir = excedente <= 0 or (LOG_MUESTREO_CADA > 0 and excedente % LOG_MUESTREO_CADA == 0)
+        if not emitir:
+            estado["suprimidas"] += 1
+
+    if suprimidas:
+        logger.warning(f"⚠️    {suprimidas} advertencias '{clave}' suprimidas en la ventana anterior")
+    if emitir:
+        logger.warning(mensaje if excedente <= 0 else f"{mensaje} (muestreada, {excedente} por encima del límite)")
+
+
+def cerrar_muestreo(logger: logging.Logger, clave: str):
+    """Loguea cuántas advertencias de la clave se suprimieron y reinicia su conteo."""
+    with _lock_muestreo:
+        estado = _muestreo.pop(clave, None)
+
+    if estado and estado["suprimidas"]:
+        logger.warning(
+            f"⚠️    {estado['suprimidas']} de {estado['vistas']} advertencias '{clave}' suprimidas por muestreo"
+        )
+
+
 def log_ejecución_pipeline(
     estado:str,
     duracion_seg:float,
-    error:str = None
+    error:str = None,
+    perfil:str = None,
+    run_id:str = None
 ):
     """
-    Registra resultado de ejecución del pipeline en archivo JSON.
-    Útil para dashboard o análisis histórico.
+    Registra resultado de ejecución del pipeline en el historial (SQLite, solo
+    agrega filas; ver run_history). Útil para dashboard o análisis histórico.
     
     Args:
         estado: 'EXITOSO' | 'FALLIDO' | 'PARCIAL'
         duracion_seg: Tiempo de ejecución en segundos
         error: Mensaje de error si hubo fallo
+        perfil: id del perfil de la ejecución (ver profiler), si se perfiló
+        run_id: id de la ejecución (el mismo que llevan sus logs en formato json)
     """
 
-    archivo_historial = Path("logs/historial_ejecuciones.json")
-
-    #cargar historial existente
-    if archivo_historial.exists():
-        with open(archivo_historial, 'r', encoding='utf-8') as f:
-            historial = json.load(f)
-    else:
-        historial = []
+    #importe diferido: run_history usa este módulo para su logger
+    from app.run_history import registrar_ejecucion
 
     #crear registro de esta ejecución
     registro = {
         "timestamp": datetime.now().isoformat(),
         "estado": estado,
         "duracion_segundos": duracion_seg,
-        "error": error
+        "error": error,
+        "perfil": perfil,
+        "run_id": run_id
     }
 
-    #agregar al historial (mantener últimos 100)
-    historial.append(registro)
-    historial = historial[-100:]
-
-    #guardar
-    with open(archivo_historial, 'w', encoding='utf-8') as f:
-        json.dump(historial, f, indent=2, ensure_ascii=False)
+    registrar_ejecucion(registro)
 
     
\ No newline at end of file
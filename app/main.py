@@ -1,40 +1,144 @@
 # main.py
 
-from logging import Logger
-from sys import exception
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import os
+import time
+import importlib
+from threading import Thread
 from pathlib import Path
+from urllib.parse import quote
 import json
 
-from app.extractor import extraer_tabla_completa
-from app.processor import procesar_datos
-from app.generator import crear_reporte
+#solo módulos livianos al importar: extractor, snapshots, dataset_store,
+#generator, aggregator y exporter (playwright, polars, python-docx, lxml) se
+#importan dentro de los endpoints que los usan y se precalientan en segundo
+#plano al arrancar (ver _precalentar_modulos)
 from app.scheduler import (
-    iniciar_scheduler_background, 
-    ejecutar_pipeline,
+    iniciar_scheduler_background,
     detener_scheduler,
     activar_scheduler,      
     desactivar_scheduler,   
-    obtener_estado_scheduler 
+    obtener_estado_scheduler,
+    listar_tareas,
+    crear_tarea,
+    editar_tarea,
+    eliminar_tarea
 )
 
-from app.logger import configurar_logger
+from app.report_cache import (
+    ultimo_reporte,
+    obtener_estadisticas_cache
+)
+from app.charts import detener_pool_graficos
+from app.metrics import observar, exportar_prometheus
+from app.profiler import listar_perfiles, obtener_perfil, ruta_flame, ruta_cprofile
+from app.jobs import (
+    enviar_trabajo,
+    obtener_trabajo,
+    esperar_reporte,
+    obtener_reporte,
+    obtener_estado_trabajos,
+    detener_trabajos,
+    COMPLETADO,
+    FALLIDO
+)
+from app.browser_pool import iniciar_pool, detener_pool, obtener_estado_pool
+from app.health import (
+    marcar_componente,
+    cargar_ultimas_ejecuciones,
+    estado_vivo,
+    estado_listo,
+    resumen_salud,
+    chequeo_profundo
+)
+from app.run_history import (
+    ultima_ejecucion as ultima_ejecucion_historial,
+    consultar_ejecuciones,
+    estadisticas_diarias,
+    compactar
+)
+from app.logger import configurar_logger, iniciar_logging, detener_logging
 
 #configurar logger
 logger = configurar_logger('main')
 
+MEDIA_TYPE_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+#guardar en outputs/ los reportes servidos por /generar-reporte (en segundo plano)
+PERSISTIR_REPORTES = os.getenv("PERSISTIR_REPORTES", "1") == "1"
+
+#espera máxima de /generar-reporte por su trabajo antes de responder 202
+REPORTE_ESPERA_SEG = float(os.getenv("REPORTE_ESPERA_SEG", "300"))
+
+#stale-while-revalidate en /generar-reporte: dentro de la ventana de frescura se
+#sirve el último reporte tal cual; pasada la ventana se sirve igual y se refresca
+#en segundo plano; más viejo que el máximo se genera en vivo
+SWR_ACTIVO = os.getenv("REPORTE_SWR", "1") == "1"
+SWR_FRESCURA_SEG = float(os.getenv("REPORTE_FRESCURA_SEG", "600"))
+SWR_MAX_OBSOLETO_SEG = float(os.getenv("REPORTE_MAX_OBSOLETO_SEG", "86400"))
+
+#importar los módulos pesados en un hilo al arrancar, sin bloquear las primeras solicitudes
+PRECALENTAR = os.getenv("PRECALENTAR_MODULOS", "1") == "1"
+MODULOS_PESADOS = (
+    "app.extractor",
+    "app.snapshots",
+    "app.dataset_store",
+    "app.aggregator",
+    "app.generator",
+    "app.exporter"
+)
+
+
+def _precalentar_modulos():
+    """Importa los módulos pesados para que la primera solicitud no pague el costo."""
+    inicio = time.perf_counter()
+
+    for modulo in MODULOS_PESADOS:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            logger.warning(f"⚠️    no se pudo precalentar {modulo}: {type(e).__name__}: {e}")
+
+    logger.info(f"🔥 módulos precalentados en {time.perf_counter() - inicio:.2f} segundos")
+    marcar_componente("modulos", True)
+
+
+def _inicializar_salud():
+    """Carpetas y últimas ejecuciones una sola vez al arrancar; los probes leen de memoria."""
+    try:
+        Path("logs").mkdir(exist_ok=True)
+        Path("outputs").mkdir(exist_ok=True)
+        marcar_componente("carpetas", True)
+    except Exception as e:
+        marcar_componente("carpetas", False, str(e))
+
+    try:
+        exitos = consultar_ejecuciones(estado="EXITOSO", limite=1)["ejecuciones"]
+        cargar_ultimas_ejecuciones(ultima_ejecucion_historial(), exitos[0] if exitos else None)
+    except Exception as e:
+        logger.warning(f"⚠️    no se pudo leer el historial para el health check: {e}")
+
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Se ejecuta al iniciar
+    # Se ejecuta al iniciar (el logging se recrea si un cierre anterior lo detuvo)
+    iniciar_logging()
     logger.info("=" * 50)
     logger.info("🟢 INICIANDO APLICACIÓN")
     logger.info("=" * 50)
 
+    _inicializar_salud()
+
+    if PRECALENTAR:
+        marcar_componente("modulos", False, "precalentando")
+        Thread(target=_precalentar_modulos, name="precalentar", daemon=True).start()
+
+    iniciar_pool()
+    logger.info("   pool de navegadores calentando en background")
+
     iniciar_scheduler_background()
     logger.info("   scheduler iniciado en modo PAUSADO por defecto")
     logger.info("   usa POST/scheduler/activar para habilitar ejecución automática")
@@ -45,6 +149,10 @@ async def lifespan(app: FastAPI):
     logger.info("🔴 CERRANDO APLICACIÓN")
     logger.info("=" * 50)
     detener_scheduler()
+    detener_trabajos()
+    detener_pool()
+    detener_pool_graficos()
+    detener_logging()
 
 app = FastAPI(
     title="Reporte automatizado",
@@ -54,21 +162,64 @@ app = FastAPI(
 )
 
 
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    """Latencia por endpoint (plantilla de ruta, no la url concreta, para acotar etiquetas)."""
+    inicio = time.perf_counter()
+    codigo = 500
+
+    try:
+        respuesta = await call_next(request)
+        codigo = respuesta.status_code
+        return respuesta
+    finally:
+        ruta = request.scope.get("route")
+        observar(
+            "http_duracion_segundos",
+            time.perf_counter() - inicio,
+            ruta=ruta.path if ruta is not None else "sin_ruta",
+            metodo=request.method,
+            codigo=codigo
+        )
+
+
 @app.get("/")
 def inicio():
     """Endpoint de bienvenida"""
-    Logger.info("   endpoint '/encendido' activado")
+    logger.info("   endpoint '/encendido' activado")
     
     return {
         "mensaje": "Sistema de automatización - API activa",
         "version": "1.0.0",
         "endpoints_disponibles": {
             "/generar-reporte": "GET - Genera y descarga reporte de población mundial",
-            "/generar-reporte-ahora": "GET - Ejecuta pipeline manualmente (sin esperar horario)",
+            "/generar-reporte-ahora": "GET - Encola el pipeline manualmente (sin esperar horario)",
+            "/trabajos": "POST - Encola el pipeline y devuelve el id del trabajo / GET - estado de la cola",
+            "/trabajos/{id}": "GET - Estado y etapa de un trabajo",
+            "/trabajos/{id}/resultado": "GET - Descarga el reporte de un trabajo completado",
             "/scheduler/estado": "GET - Consulta estado del scheduler",
-            "/scheduler/activar": "POST - Activa ejecución automática diaria",
+            "/scheduler/activar": "POST - Activa la ejecución automática de las tareas programadas",
+            "/scheduler/tareas": "GET / POST - Tareas programadas (cron, zona horaria, políticas)",
+            "/scheduler/tareas/{id_tarea}": "PUT / DELETE - Edita o elimina una tarea programada",
             "/scheduler/desactivar": "POST - Pausa ejecución automática",
-            "/health": "GET - health check del sistema",
+            "/browser-pool/estado": "GET - Consulta estado del pool de navegadores",
+            "/reportes/cache": "GET - Estadísticas de la caché de reportes (hits/misses)",
+            "/exportar/{formato}": "GET - Último dataset limpio en csv, ndjson, parquet o xlsx",
+            "/agregados": "GET - Agregados por continente y región del último reporte",
+            "/procesamiento/fallos": "GET - Valores no parseados por columna en la última limpieza",
+            "/dataset/catalogo": "GET - Ejecuciones guardadas en el dataset histórico",
+            "/dataset/pais/{pais}": "GET - Población de un país a lo largo de las ejecuciones",
+            "/dataset/continente/{continente}": "GET - Población de un continente a lo largo de las ejecuciones",
+            "/health": "GET - health check del sistema (desde memoria)",
+            "/health/live": "GET - liveness",
+            "/health/ready": "GET - readiness (503 si falta algún componente)",
+            "/health/deep": "GET - chequeo real de dependencias (limitado a uno cada 30 s)",
+            "/metrics": "GET - Métricas en formato Prometheus",
+            "/historial": "GET - Ejecuciones del pipeline (filtros: estado, desde, hasta; paginado con antes_de)",
+            "/historial/estadisticas": "GET - Tasa de éxito y duración p50/p95 por día",
+            "/historial/compactar": "POST - Pasa ejecuciones viejas a resumen diario",
+            "/perfiles": "GET - Perfiles de ejecución guardados (?perfilar=true en /trabajos)",
+            "/perfiles/{id}": "GET - Spans de un perfil (también /flame y /cprofile)",
             "/docs": "GET - Documentación interactiva"
         }
     }
@@ -79,38 +230,79 @@ def health_check():
     """
     Health check para validar el estado del sistema
     util para railway y monitoreo externo
+
+    Se arma desde el estado en memoria (sin disco): componentes, pool de
+    navegadores, ejecuciones en curso y últimas ejecuciones.
+    """
+    return {**resumen_salud(), "scheduler": obtener_estado_scheduler()}
+
+
+@app.get("/health/live")
+def health_live():
+    """Liveness: el proceso está vivo y atiende solicitudes."""
+    return estado_vivo()
+
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness: 200 si los componentes requeridos están listos, 503 si no."""
+    listo, detalle = estado_listo()
+    return JSONResponse(status_code=200 if listo else 503, content=detalle)
+
+
+@app.get("/health/deep")
+def health_deep():
+    """Prueba real de disco, historial, fuente y navegadores (resultado cacheado entre intervalos)."""
+    resultado = chequeo_profundo()
+    return JSONResponse(status_code=200 if resultado["status"] == "healthy" else 503, content=resultado)
+
+
+@app.get("/metrics")
+def metricas():
+    """Métricas del proceso en formato de exposición de texto de Prometheus."""
+    return Response(content=exportar_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/historial")
+def historial(
+    estado: str = None,
+    desde: str = None,
+    hasta: str = None,
+    limite: int = 50,
+    antes_de: int = None
+):
     """
-    logger.info("   health check solicitado")
+    Ejecuciones del pipeline, de la más reciente a la más vieja.
 
+    Args:
+        estado: 'EXITOSO' | 'FALLIDO'
+        desde / hasta: fechas 'YYYY-MM-DD' (inclusive)
+        limite: filas por página (máximo 500)
+        antes_de: valor 'siguiente' de la página anterior
+    """
+    logger.info(" consultando historial de ejecuciones")
     try:
-        Path("logs").mkdir(exist_ok=True)
-        Path("outputs").mkdir(exist_ok=True)
+        return consultar_ejecuciones(estado=estado, desde=desde, hasta=hasta, limite=limite, antes_de=antes_de)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
-        estado_scheduler = obtener_estado_scheduler()
 
-        "verifica historial de ejecuciones"
-        archivo_historial = None
+@app.get("/historial/estadisticas")
+def historial_estadisticas(desde: str = None, hasta: str = None):
+    """Tasa de éxito y p50/p95 de duración por día."""
+    logger.info(" consultando estadísticas del historial")
+    try:
+        return estadisticas_diarias(desde=desde, hasta=hasta)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
-        if archivo_historial.exists():
-            with open(archivo_historial, 'r') as f:
-                historial = json.load(f)
-                if historial:
-                    ultima_ejecucion = historial[-1]
 
-        return {
-            "status": "healthy",
-            "timestamp": str(__import__('datetime').datetime.now()),
-            "scheduler": estado_scheduler,
-            "ultima_ejecucion": ultima_ejecucion,
-            "carpeta_ok": True
-        }
+@app.post("/historial/compactar")
+def historial_compactar(dias_detalle: int):
+    """Resume por día las ejecuciones de más de dias_detalle días y borra su detalle."""
+    logger.info(f" compactando historial (detalle de {dias_detalle} días)")
+    return compactar(dias_detalle=dias_detalle)
 
-    except Exception as e:
-        logger.info(f"❌ healt check falló: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
 
 @app.get("/scheduler/estado")
 def estado_scheduler():
@@ -119,13 +311,138 @@ def estado_scheduler():
     return obtener_estado_scheduler()
 
 
+@app.get("/browser-pool/estado")
+def estado_browser_pool():
+    """Consulta el estado del pool de navegadores (lanzamientos, reciclajes, páginas activas)."""
+    logger.info(" consultando el estado del pool de navegadores")
+    return obtener_estado_pool()
+
+
+@app.get("/reportes/cache")
+def estado_cache_reportes():
+    """Estadísticas de la caché de reportes: hits, misses, evicciones y tamaño."""
+    logger.info(" consultando caché de reportes")
+    return obtener_estadisticas_cache()
+
+
+@app.get("/exportar/{formato}")
+def exportar(formato: str, request: Request):
+    """
+    Exporta el último dataset limpio. CSV y NDJSON se transmiten por bloques;
+    soporta If-None-Match para no reenviar datos que el cliente ya tiene.
+
+    Args:
+        formato: 'csv' | 'ndjson' | 'parquet' | 'xlsx'
+    """
+    from app.exporter import (
+        FORMATOS,
+        obtener_ultima_ejecucion,
+        etag_exportacion,
+        coincide_etag,
+        transmitir_csv,
+        transmitir_ndjson,
+        exportar_parquet,
+        exportar_xlsx
+    )
+
+    logger.info(f" exportación solicitada: {formato}")
+
+    if formato not in FORMATOS:
+        return {"error": f"formato no soportado: {formato}", "formatos": list(FORMATOS)}
+
+    entrada = obtener_ultima_ejecucion()
+    if entrada is None:
+        return {"error": "aún no hay datos, ejecuta el pipeline primero"}
+
+    etag = etag_exportacion(entrada, formato)
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    config = FORMATOS[formato]
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="poblacion_{entrada["run_id"]}.{config["extension"]}"'
+    }
+
+    if formato == "csv":
+        return StreamingResponse(transmitir_csv(entrada), media_type=config["media_type"], headers=headers)
+    if formato == "ndjson":
+        return StreamingResponse(transmitir_ndjson(entrada), media_type=config["media_type"], headers=headers)
+
+    contenido = exportar_parquet(entrada) if formato == "parquet" else exportar_xlsx(entrada)
+    return Response(content=contenido, media_type=config["media_type"], headers=headers)
+
+
+@app.get("/agregados")
+def agregados():
+    """Agregados por continente y región de los últimos datos procesados (desde caché)."""
+    from app.aggregator import obtener_ultimos_agregados
+
+    logger.info(" consultando agregados")
+    resultado = obtener_ultimos_agregados()
+
+    if resultado is None:
+        return {"error": "aún no hay agregados, ejecuta el pipeline primero"}
+
+    return resultado
+
+
+@app.get("/procesamiento/fallos")
+def procesamiento_fallos():
+    """Valores crudos que no se pudieron parsear en la última limpieza, por columna."""
+    from app.processor import obtener_fallos_parseo
+
+    logger.info(" consultando fallos de parseo")
+    return obtener_fallos_parseo()
+
+
+@app.get("/dataset/catalogo")
+def dataset_catalogo():
+    """Lista las ejecuciones guardadas en el dataset histórico."""
+    from app.dataset_store import obtener_catalogo
+
+    logger.info(" consultando catálogo del dataset")
+    catalogo = obtener_catalogo()
+    return {"total": len(catalogo), "ejecuciones": catalogo}
+
+
+@app.get("/dataset/pais/{pais}")
+def dataset_pais(pais: str, desde: str = None, hasta: str = None):
+    """
+    Población de un país en cada ejecución guardada.
+
+    Args:
+        desde / hasta: rango de fechas 'YYYY-MM-DD' (opcional)
+    """
+    from app.dataset_store import consultar_pais
+
+    logger.info(f" consultando histórico del país: {pais}")
+    serie = consultar_pais(pais, desde, hasta)
+    return {"pais": pais, "total": len(serie), "serie": serie}
+
+
+@app.get("/dataset/continente/{continente}")
+def dataset_continente(continente: str, desde: str = None, hasta: str = None):
+    """
+    Población total de un continente en cada ejecución guardada.
+
+    Args:
+        desde / hasta: rango de fechas 'YYYY-MM-DD' (opcional)
+    """
+    from app.dataset_store import consultar_continente
+
+    logger.info(f" consultando histórico del continente: {continente}")
+    serie = consultar_continente(continente, desde, hasta)
+    return {"continente": continente, "total": len(serie), "serie": serie}
+
+
 @app.post("/scheduler/activar")
 def activar():
     """Activa la ejecución automática del scheduler."""
     logger.info(" activando scheduler")
     activar_scheduler()
     return {
-        "mensaje": "Scheduler activado - se ejecutará a las 8:00 am diariamente",
+        "mensaje": "Scheduler activado - las tareas se ejecutarán según su programación",
         "estado": obtener_estado_scheduler()
     }
 
@@ -142,75 +459,343 @@ def desactivar():
     }
 
 
+@app.get("/scheduler/tareas")
+def tareas_programadas():
+    """Tareas programadas con su próxima ejecución."""
+    return {"tareas": listar_tareas()}
+
+
+@app.post("/scheduler/tareas")
+def crear_tarea_programada(
+    id_tarea: str,
+    cron: str,
+    zona: str = None,
+    motor: str = None,
+    habilitada: bool = True,
+    solapamiento: str = "saltar",
+    perdidas: str = "una"
+):
+    """
+    Agrega una tarea programada, efectiva sin reiniciar.
+
+    Args:
+        id_tarea: identificador de la tarea
+        cron: expresión cron de 5 campos (ej. '0 8 * * mon-fri') o @daily, @hourly...
+        zona: zona horaria IANA (ej. 'America/Lima'); vacío = hora local del servidor
+        motor: 'http' | 'playwright' (opcional)
+        solapamiento: si sigue corriendo al vencer: 'saltar' | 'encolar' | 'fusionar'
+        perdidas: ocurrencias vencidas (proceso detenido, pausa): 'saltar' | 'una' | 'todas'
+    """
+    logger.info(f" creando tarea programada: {id_tarea}")
+    try:
+        tarea = crear_tarea(id_tarea, cron, zona, motor, habilitada, solapamiento, perdidas)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return JSONResponse(status_code=201, content=tarea)
+
+
+@app.put("/scheduler/tareas/{id_tarea}")
+def editar_tarea_programada(
+    id_tarea: str,
+    request: Request,
+    cron: str = None,
+    zona: str = None,
+    motor: str = None,
+    habilitada: bool = None,
+    solapamiento: str = None,
+    perdidas: str = None
+):
+    """
+    Modifica los campos indicados de una tarea programada (los que no vienen
+    en la query quedan igual). ?zona= vacío vuelve a la hora local del
+    servidor y ?motor= vacío al motor por defecto.
+    """
+    logger.info(f" editando tarea programada: {id_tarea}")
+    valores = {
+        "cron": cron,
+        "zona": zona or None,
+        "motor": motor or None,
+        "habilitada": habilitada,
+        "solapamiento": solapamiento,
+        "perdidas": perdidas
+    }
+    try:
+        tarea = editar_tarea(
+            id_tarea,
+            **{campo: valor for campo, valor in valores.items() if campo in request.query_params}
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    if tarea is None:
+        return JSONResponse(status_code=404, content={"error": f"tarea no encontrada: {id_tarea}"})
+
+    return tarea
+
+
+@app.delete("/scheduler/tareas/{id_tarea}")
+def eliminar_tarea_programada(id_tarea: str):
+    """Elimina una tarea programada."""
+    logger.info(f" eliminando tarea programada: {id_tarea}")
+    if not eliminar_tarea(id_tarea):
+        return JSONResponse(status_code=404, content={"error": f"tarea no encontrada: {id_tarea}"})
+
+    return {"mensaje": f"tarea {id_tarea} eliminada"}
+
+
+def _respuesta_trabajo(trabajo: dict, nuevo: bool):
+    """Respuesta 202 con el id del trabajo y dónde consultarlo."""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "id": trabajo["id"],
+            "estado": trabajo["estado"],
+            "nuevo": nuevo,
+            "estado_url": f"/trabajos/{trabajo['id']}",
+            "resultado_url": f"/trabajos/{trabajo['id']}/resultado"
+        }
+    )
+
+
 @app.get("/generar-reporte-ahora")
-def generar_ahora():
-    """Ejecuta el pipeline inmediatamente, sin esperar el horario programado"""
+def generar_ahora(motor: str = None, perfilar: bool = None, cprofile: bool = None):
+    """
+    Encola el pipeline inmediatamente, sin esperar el horario programado.
+    Retorna el id del trabajo sin esperar a que termine.
+
+    Args:
+        motor: 'http' | 'playwright' (opcional, por defecto el configurado)
+        perfilar: guardar spans por etapa (ver /perfiles)
+        cprofile: además capturar cProfile
+    """
     logger.info(" ejecución manual del pipeline solicitada")
+    try:
+        trabajo, nuevo = enviar_trabajo(motor=motor, perfilar=perfilar, cprofile=cprofile)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
+    return _respuesta_trabajo(trabajo, nuevo)
+
+
+@app.post("/trabajos")
+def crear_trabajo(motor: str = None, perfilar: bool = None, cprofile: bool = None):
+    """
+    Encola una ejecución del pipeline; si ya hay una idéntica en curso,
+    devuelve ese mismo trabajo.
+
+    Args:
+        motor: 'http' | 'playwright' (opcional, por defecto el configurado)
+        perfilar: guardar spans por etapa (ver /perfiles)
+        cprofile: además capturar cProfile
+    """
+    logger.info(" trabajo de reporte solicitado")
     try:
-        ejecutar_pipeline()
+        trabajo, nuevo = enviar_trabajo(motor=motor, perfilar=perfilar, cprofile=cprofile)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
-        return {
-            "mensaje": "Pipeline ejecutado. Revisa outputs/ para el reporte.",
-            "detalle": "revisar outputs/ para el reporte o consultar logs/ para detalle"
-        }
-    
-    except exception as e:
-        logger.error(f"❌ Error de ejecución manual: {str(e)}")
+    return _respuesta_trabajo(trabajo, nuevo)
 
-        return{
-            "error": "Error al ejecutar pipeline",
-            "detalle": str(e)
-        }
 
+@app.get("/trabajos")
+def estado_trabajos():
+    """Trabajos por estado y los más recientes."""
+    return obtener_estado_trabajos()
 
-@app.get("/generar-reporte")
-def generar_reporte_completo():
+
+@app.get("/trabajos/{id_trabajo}")
+def estado_trabajo(id_trabajo: str):
+    """Estado y etapa actual de un trabajo."""
+    trabajo = obtener_trabajo(id_trabajo)
+
+    if trabajo is None:
+        return JSONResponse(status_code=404, content={"error": f"trabajo no encontrado: {id_trabajo}"})
+
+    return trabajo
+
+
+@app.get("/trabajos/{id_trabajo}/resultado")
+def resultado_trabajo(id_trabajo: str):
+    """Descarga el reporte de un trabajo completado."""
+    trabajo = obtener_trabajo(id_trabajo)
+
+    if trabajo is None:
+        return JSONResponse(status_code=404, content={"error": f"trabajo no encontrado: {id_trabajo}"})
+
+    if trabajo["estado"] == FALLIDO:
+        return JSONResponse(status_code=500, content={"error": trabajo["error"], "id": id_trabajo})
+
+    if trabajo["estado"] != COMPLETADO:
+        return JSONResponse(
+            status_code=202,
+            content={"id": id_trabajo, "estado": trabajo["estado"], "etapa": trabajo["etapa"]}
+        )
+
+    reporte = obtener_reporte(id_trabajo)
+    if reporte is None:
+        return JSONResponse(status_code=410, content={"error": "el reporte ya no está disponible", "id": id_trabajo})
+
+    return _respuesta_docx(*reporte)
+
+
+@app.get("/perfiles")
+def perfiles():
+    """Perfiles de ejecución guardados, del más reciente al más viejo."""
+    lista = listar_perfiles()
+    return {"total": len(lista), "perfiles": lista}
+
+
+@app.get("/perfiles/{id_perfil}")
+def perfil(id_perfil: str):
+    """Spans (y top de cProfile si se capturó) de una ejecución perfilada."""
+    resultado = obtener_perfil(id_perfil)
+
+    if resultado is None:
+        return JSONResponse(status_code=404, content={"error": f"perfil no encontrado: {id_perfil}"})
+
+    return resultado
+
+
+@app.get("/perfiles/{id_perfil}/flame")
+def perfil_flame(id_perfil: str):
+    """Pilas plegadas (collapsed stacks) para flamegraph.pl o speedscope."""
+    ruta = ruta_flame(id_perfil)
+
+    if ruta is None:
+        return JSONResponse(status_code=404, content={"error": f"perfil no encontrado: {id_perfil}"})
+
+    return FileResponse(path=ruta, filename=ruta.name, media_type="text/plain; charset=utf-8")
+
+
+@app.get("/perfiles/{id_perfil}/cprofile")
+def perfil_cprofile(id_perfil: str):
+    """Volcado cProfile (.prof) para snakeviz o pstats."""
+    ruta = ruta_cprofile(id_perfil)
+
+    if ruta is None:
+        return JSONResponse(status_code=404, content={"error": f"el perfil {id_perfil} no tiene cProfile"})
+
+    return FileResponse(path=ruta, filename=ruta.name, media_type="application/octet-stream")
+
+
+def _respuesta_docx(nombre_archivo: str, contenido: bytes, headers: dict = None) -> Response:
+    """DOCX servido desde memoria como descarga."""
+    return Response(
+        content=contenido,
+        media_type=MEDIA_TYPE_DOCX,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(nombre_archivo)}", **(headers or {})}
+    )
+
+
+def _servir_ultimo_reporte():
     """
-    endpiont principal: ejecutal el pipeline completo y devuelve el archivo
+    Stale-while-revalidate: devuelve el último reporte si todavía sirve. Solo
+    para el motor por defecto (los reportes no guardan con qué motor se
+    extrajeron; pedir un motor explícito siempre ejecuta el pipeline).
+
+    Returns:
+        Response: con cabecera Age; si está obsoleto, además encola un
+            refresco (un solo trabajo aunque lleguen varias solicitudes)
+        None: no hay reporte, es más viejo que SWR_MAX_OBSOLETO_SEG o se
+            borró mientras se buscaba (se genera uno nuevo)
     """
+    ultimo = ultimo_reporte()
+    if ultimo is None:
+        return None
 
-    logger.info("=" * 50)
-    logger.info("SOLICITUD DE GENERACIÓN DE REPORTE RECIBIDA")
-    logger.info("=" * 50)
+    ruta, edad = ultimo
+    if edad > SWR_MAX_OBSOLETO_SEG:
+        logger.info(f"   último reporte demasiado viejo ({edad:.0f} s), generando en vivo")
+        return None
 
+    #leerlo ya: si la evicción lo borra después del glob es un miss, no un error
     try:
-        #PASO 1: extraer
-        logger.info("extrayendo datos ...")
-        datos_raw = extraer_tabla_completa()
+        contenido = Path(ruta).read_bytes()
+    except FileNotFoundError:
+        logger.info(f"   el último reporte ya no existe ({ruta}), generando en vivo")
+        return None
+
+    headers = {"Age": str(int(edad))}
 
-        if not datos_raw:
-            logger.error("❌ no se pudieron extraer datos")
-            return {"error": "no se pudieron extraer datos de la web"}
+    if edad <= SWR_FRESCURA_SEG:
+        headers["X-Reporte-Estado"] = "fresco"
+    else:
+        trabajo, _ = enviar_trabajo()
+        headers["X-Reporte-Estado"] = "obsoleto"
+        headers["X-Reporte-Trabajo"] = trabajo["id"]
+        logger.info(f"   sirviendo reporte obsoleto ({edad:.0f} s), refresco en trabajo {trabajo['id']}")
 
-        #PASO 2: procesar
-        logger.info("procesando datos con polars...")
-        df_limpio = procesar_datos(datos_raw)
+    return _respuesta_docx(os.path.basename(ruta), contenido, headers)
 
-        if df_limpio is None or df_limpio.height == 0:
-            logger.error("❌ procesamiento falló")
-            return {"error": "Error al procesar datos"}
 
-        #PASO 3: generar reporte
-        logger.info("generando reporte")
-        ruta_reporte = crear_reporte(df_limpio)
+@app.get("/generar-reporte")
+def generar_reporte_completo(
+    motor: str = None,
+    persistir: bool = PERSISTIR_REPORTES,
+    fresco: bool = False,
+    esperar_seg: float = REPORTE_ESPERA_SEG
+):
+    """
+    endpiont principal: ejecutal el pipeline completo y devuelve el archivo
 
-        if not ruta_reporte or not os.path.exists(ruta_reporte):
-            logger.error("❌ el archivo no se generó correctamente")
-            return{"error": "el archivo no se generó correctamente"}
+    El pipeline corre como trabajo de la cola (misma deduplicación que
+    /trabajos): solicitudes simultáneas comparten una sola ejecución, que queda
+    en el historial y en /health como cualquier otra. El DOCX se responde
+    desde memoria apenas se genera; guardarlo en outputs/ sigue en segundo plano.
+
+    Args:
+        motor: 'http' | 'playwright' (opcional, por defecto el configurado)
+        persistir: guardar también en outputs/ (después de responder); sin
+            persistir, el reporte no queda en la caché de reportes
+        fresco: ignorar el último reporte y generar en vivo (sin stale-while-revalidate;
+            con un motor explícito tampoco se usa)
+        esperar_seg: tiempo máximo de espera; si el trabajo no terminó se
+            responde 202 con su id (descargar luego de /trabajos/{id}/resultado)
+    """
 
-        logger.info(f"reporte listo para descarga: {ruta_reporte}")
+    logger.info("=" * 50)
+    logger.info("SOLICITUD DE GENERACIÓN DE REPORTE RECIBIDA")
+    logger.info("=" * 50)
 
-        return FileResponse(
-            path= ruta_reporte,
-            filename= os.path.basename(ruta_reporte),
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    try:
+        if SWR_ACTIVO and not fresco and motor is None:
+            respuesta = _servir_ultimo_reporte()
+            if respuesta is not None:
+                return respuesta
+
+        trabajo, nuevo = enviar_trabajo(motor=motor, persistir=persistir)
+        logger.info(f"   esperando trabajo {trabajo['id']} (hasta {esperar_seg:.0f} s)")
+        trabajo = esperar_reporte(trabajo["id"], timeout=esperar_seg) or trabajo
+        reporte = obtener_reporte(trabajo["id"])
+
+        if trabajo["estado"] == FALLIDO:
+            logger.error(f"❌ trabajo {trabajo['id']} falló: {trabajo['error']}")
+            return JSONResponse(
+                status_code=500,
+                content={"error": "error al generar reporte", "detalle": trabajo["error"], "id": trabajo["id"]}
+            )
+
+        if reporte is None:
+            logger.info(f"   trabajo {trabajo['id']} sigue en curso, respondiendo 202")
+            return _respuesta_trabajo(trabajo, nuevo)
+
+        nombre_archivo, contenido = reporte
+        logger.info(f"reporte listo para descarga: {nombre_archivo}")
+
+        return _respuesta_docx(
+            nombre_archivo,
+            contenido,
+            {"Age": "0", "X-Reporte-Estado": "generado", "X-Reporte-Trabajo": trabajo["id"]}
         )
 
+    except ValueError as e:
+        logger.warning(f"⚠️    solicitud inválida: {e}")
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
     except Exception as e:
         logger.error(f"❌ Error crítico: {str(e)}, exc_info=True")
         return {
             "error": "error al generar reporte",
             "detalle": str(e)
         }
-
@@ -0,0 +1,127 @@
+#metrics.py
+
+import time
+import functools
+from threading import Lock
+
+#registro de métricas en proceso, expuesto en formato de texto de Prometheus
+#(los histogramas guardan buckets acumulables, así que p95/p99 se calculan
+#con histogram_quantile en lugar de promediar las últimas ejecuciones)
+
+PREFIJO = "reporte_"
+
+BUCKETS_ETAPA_SEG = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+BUCKETS_HTTP_SEG = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BUCKETS_FILAS = (0, 1, 5, 10, 25, 50, 100, 150, 200, 250, 300, 500)
+BUCKETS_BYTES = (16e3, 32e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 5e6)
+
+#nombre -> (tipo, ayuda, buckets)
+METRICAS = {
+    "etapa_duracion_segundos": (
+        "histogram", "duración de cada etapa del pipeline (extraccion, procesamiento, generacion)", BUCKETS_ETAPA_SEG
+    ),
+    "pipeline_duracion_segundos": ("histogram", "duración total de ejecutar_pipeline por estado", BUCKETS_ETAPA_SEG),
+    "filas_extraidas": ("histogram", "filas válidas por extracción", BUCKETS_FILAS),
+    "filas_con_error": ("histogram", "filas de la tabla que no se pudieron leer por extracción", BUCKETS_FILAS),
+    "filas_descartadas": ("histogram", "filas eliminadas por la limpieza en cada procesamiento", BUCKETS_FILAS),
+    "filas_no_parseadas_total": ("counter", "valores crudos que no se pudieron parsear, por columna", None),
+    "navegador_lanzamiento_segundos": ("histogram", "tiempo de arranque de chromium", BUCKETS_ETAPA_SEG),
+    "docx_bytes": ("histogram", "tamaño del DOCX generado", BUCKETS_BYTES),
+    "cache_consultas_total": ("counter", "consultas a cada caché por resultado (hit / miss)", None),
+    "fuente_obtenciones_total": ("counter", "obtenciones de la página fuente por origen", None),
+    "http_duracion_segundos": ("histogram", "latencia de los endpoints por ruta, método y código", BUCKETS_HTTP_SEG),
+    "programaciones_total": (
+        "counter", "ocurrencias del scheduler por tarea y resultado (lanzada, omitida, encolada, fusionada, perdida)", None
+    ),
+}
+
+_lock = Lock()
+_series = {nombre: {} for nombre in METRICAS}    #nombre -> {etiquetas: valor | histograma}
+
+
+def _clave_etiquetas(etiquetas: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def incrementar(nombre: str, valor: float = 1, **etiquetas):
+    """Suma valor a un contador."""
+    clave = _clave_etiquetas(etiquetas)
+
+    with _lock:
+        series = _series[nombre]
+        series[clave] = series.get(clave, 0) + valor
+
+
+def observar(nombre: str, valor: float, **etiquetas):
+    """Registra una observación en un histograma."""
+    buckets = METRICAS[nombre][2]
+    clave = _clave_etiquetas(etiquetas)
+
+    with _lock:
+        serie = _series[nombre].get(clave)
+        if serie is None:
+            serie = _series[nombre][clave] = {"buckets": [0] * len(buckets), "suma": 0.0, "cuenta": 0}
+
+        for i, limite in enumerate(buckets):
+            if valor <= limite:
+                serie["buckets"][i] += 1
+                break
+        serie["suma"] += valor
+        serie["cuenta"] += 1
+
+
+def cronometrar(nombre: str, **etiquetas):
+    """Decorador: observa en el histograma la duración de cada llamada."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                observar(nombre, time.perf_counter() - inicio, **etiquetas)
+        return envoltura
+    return decorador
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(clave: tuple, extra: tuple = ()) -> str:
+    pares = list(clave) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def exportar_prometheus() -> str:
+    """Todas las métricas en formato de exposición de texto de Prometheus."""
+    lineas = []
+
+    with _lock:
+        for nombre, (tipo, ayuda, buckets) in METRICAS.items():
+            completo = PREFIJO + nombre
+            lineas.append(f"# HELP {completo} {ayuda}")
+            lineas.append(f"# TYPE {completo} {tipo}")
+
+            for clave, valor in sorted(_series[nombre].items()):
+                if tipo == "counter":
+                    lineas.append(f"{completo}{_formatear_etiquetas(clave)} {_numero(valor)}")
+                    continue
+
+                acumulado = 0
+                for limite, cuenta in zip(buckets, valor["buckets"]):
+                    acumulado += cuenta
+                    lineas.append(
+                        f"{completo}_bucket{_formatear_etiquetas(clave, (('le', _numero(limite)),))} {acumulado}"
+                    )
+                lineas.append(f"{completo}_bucket{_formatear_etiquetas(clave, (('le', '+Inf'),))} {valor['cuenta']}")
+                lineas.append(f"{completo}_sum{_formatear_etiquetas(clave)} {_numero(valor['suma'])}")
+                lineas.append(f"{completo}_count{_formatear_etiquetas(clave)} {valor['cuenta']}")
+
+    return "\n".join(lineas) + "\n"
@@ -1,92 +1,272 @@
 #procesor.py
 
-from logging import Logger
-from sys import exception
+import json
+import hashlib
 import polars as pl
 from app.logger import configurar_logger
+from app.metrics import incrementar, observar
+from app.profiler import span
 
 logger = configurar_logger('processor')
 
-def procesar_datos(datos_crudos):
+
+def a_lazyframe(datos_crudos) -> pl.LazyFrame:
+    """
+    Normaliza la entrada del procesador a un LazyFrame sin copiar datos
+    cuando ya vienen en formato columnar.
+
+    Acepta:
+        - list[dict]: una entrada por país (formato del extractor)
+        - dict[str, list | pyarrow.Array]: arrays por columna
+        - pyarrow.Table, pl.DataFrame o pl.LazyFrame
+    """
+    if isinstance(datos_crudos, pl.LazyFrame):
+        return datos_crudos
+    if isinstance(datos_crudos, pl.DataFrame):
+        return datos_crudos.lazy()
+    if hasattr(datos_crudos, "to_batches"):
+        #pyarrow.Table
+        return pl.from_arrow(datos_crudos).lazy()
+    return pl.DataFrame(datos_crudos).lazy()
+
+
+def hash_dataframe(df: pl.DataFrame) -> str:
+    """
+    Hash de contenido de un DataFrame (esquema + filas en orden).
+    Sirve como clave de caché para todo lo que se deriva de los datos limpios;
+    incluye la versión de polars porque hash_rows no es estable entre versiones.
+    """
+    h = hashlib.sha256()
+    h.update(pl.__version__.encode())
+    h.update(str(df.schema).encode())
+    h.update(df.hash_rows(seed=0).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+#esquema declarativo de limpieza, una entrada por columna de salida:
+#  columna: nombre de la columna cruda (y de salida)
+#  tipo: 'texto' | 'entero' | 'decimal'
+#  reemplazos: {buscar: reemplazo} literales aplicados antes de parsear
+#  menos_unicode: convertir '−' (U+2212, usado por wikipedia) en '-'
+#  nulos: 'conservar' | 'descartar' (filtra la fila) | 'rellenar' (usa valor_nulo)
+#  orden: 'ascendente' | 'descendente' (columnas de orden del resultado, en el orden del esquema)
+ESQUEMA_LIMPIEZA = [
+    {"columna": "pais", "tipo": "texto"},
+    {"columna": "continente", "tipo": "texto"},
+    {"columna": "region", "tipo": "texto"},
+    {"columna": "poblacion_2023", "tipo": "entero", "reemplazos": {",": ""}},
+    {
+        "columna": "poblacion_2024",
+        "tipo": "entero",
+        "reemplazos": {",": ""},
+        "nulos": "descartar",
+        "orden": "descendente"
+    },
+    {
+        "columna": "cambio_porcentual",
+        "tipo": "decimal",
+        "reemplazos": {"%": "", "+": ""},
+        "menos_unicode": True
+    }
+]
+
+#subir al cambiar cómo se interpreta el esquema (_compilar_columna, compilar_esquema):
+#invalida los snapshots limpiados con la lógica anterior
+VERSION_LIMPIEZA = 1
+
+_TIPOS_POLARS = {
+    "texto": pl.Utf8,
+    "entero": pl.Int64,
+    "decimal": pl.Float64
+}
+
+#reporte de la última limpieza: {columna: filas cuyo valor no se pudo parsear}
+_ultimos_fallos = {}
+_ultimos_fallos_filas = 0
+
+
+def hash_esquema(esquema: list = None) -> str:
+    """Hash del esquema de limpieza (por defecto ESQUEMA_LIMPIEZA), estable entre procesos."""
+    contenido = json.dumps(ESQUEMA_LIMPIEZA if esquema is None else esquema, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _compilar_columna(regla: dict) -> pl.Expr:
+    """Expresión de limpieza de una columna según su regla."""
+    tipo = regla.get("tipo", "texto")
+    if tipo not in _TIPOS_POLARS:
+        raise ValueError(f"tipo desconocido en esquema de limpieza: {tipo} ({regla['columna']})")
+
+    expr = pl.col(regla["columna"])
+    if tipo == "texto" and not regla.get("reemplazos"):
+        return expr.alias(regla["columna"])
+
+    expr = expr.cast(pl.Utf8)
+    for buscar, reemplazo in regla.get("reemplazos", {}).items():
+        expr = expr.str.replace_all(buscar, reemplazo, literal=True)
+    if regla.get("menos_unicode"):
+        expr = expr.str.replace_all("−", "-", literal=True)
+
+    expr = expr.cast(_TIPOS_POLARS[tipo], strict=False)
+
+    if regla.get("nulos") == "rellenar":
+        expr = expr.fill_null(regla.get("valor_nulo"))
+
+    return expr.alias(regla["columna"])
+
+
+def compilar_esquema(esquema: list = None) -> dict:
+    """
+    Compila el esquema de limpieza en listas de expresiones para una sola pasada.
+
+    Returns:
+        dict: {
+            limpieza: [pl.Expr] para un único select,
+            filtro: pl.Expr combinado de columnas con nulos='descartar' (o None),
+            fallos: [pl.Expr] que cuentan valores presentes que no se pudieron parsear,
+            orden: [(columna, descendente)]
+        }
+    """
+    esquema = esquema or ESQUEMA_LIMPIEZA
+
+    limpieza = []
+    filtros = []
+    fallos = []
+    orden = []
+
+    for regla in esquema:
+        columna = regla["columna"]
+        expr = _compilar_columna(regla)
+        limpieza.append(expr)
+
+        if regla.get("nulos") == "descartar":
+            filtros.append(pl.col(columna).is_not_null())
+
+        if regla.get("orden"):
+            orden.append((columna, regla["orden"] == "descendente"))
+
+        if regla.get("tipo", "texto") != "texto":
+            #valor crudo presente pero nulo tras parsear (sin contar el relleno)
+            sin_relleno = _compilar_columna({**regla, "nulos": "conservar"})
+            fallos.append(
+                (pl.col(columna).is_not_null() & sin_relleno.is_null()).sum().alias(columna)
+            )
+
+    filtro = None
+    for condicion in filtros:
+        filtro = condicion if filtro is None else filtro & condicion
+
+    return {"limpieza": limpieza, "filtro": filtro, "fallos": fallos, "orden": orden}
+
+
+def ordenar(datos, esquema: list = None):
+    """Ordena un DataFrame o LazyFrame limpio por las columnas de orden del esquema."""
+    orden = compilar_esquema(esquema)["orden"]
+    if not orden:
+        return datos
+    columnas, descendente = zip(*orden)
+    return datos.sort(list(columnas), descending=list(descendente))
+
+
+def plan_fallos(lf: pl.LazyFrame, esquema: list = None) -> pl.LazyFrame:
+    """
+    Plan que cuenta, por columna numérica, los valores crudos presentes que no
+    se pudieron parsear, más el total de filas ('filas'). Se ejecuta junto al
+    plan de limpieza (pl.collect_all) para compartir el escaneo.
+    """
+    return lf.select([pl.len().alias("filas"), *compilar_esquema(esquema)["fallos"]])
+
+
+def registrar_fallos(conteo: dict):
+    """
+    Guarda y loguea los fallos de parseo de una limpieza (salida de plan_fallos)
+    y los suma al contador filas_no_parseadas_total por columna.
+    """
+    global _ultimos_fallos_filas
+
+    conteo = dict(conteo)
+    filas = conteo.pop("filas", 0)
+
+    _ultimos_fallos.clear()
+    _ultimos_fallos.update(conteo)
+    _ultimos_fallos_filas = filas
+
+    for columna, total in conteo.items():
+        if total:
+            incrementar("filas_no_parseadas_total", total, columna=columna)
+            logger.warning(f"⚠️    {columna}: {total} de {filas} valores no se pudieron parsear")
+
+
+def obtener_fallos_parseo() -> dict:
+    """
+    Fallos de parseo de la última limpieza (en el modo incremental, solo de
+    las filas que pasaron por el plan, no de las reutilizadas del snapshot;
+    ninguno si la fuente no cambió).
+
+    Returns:
+        dict: {filas, fallos: {columna: valores no parseados}}
+    """
+    return {"filas": _ultimos_fallos_filas, "fallos": dict(_ultimos_fallos)}
+
+
+def construir_plan(lf: pl.LazyFrame, conservar: list = (), esquema: list = None) -> pl.LazyFrame:
     """
-    Convierte datos crudos en DataFrame limpio.
+    Plan lazy de limpieza: una sola proyección con todas las columnas limpias,
+    filtro de nulos y orden del esquema. Nada se materializa hasta collect().
 
     Args:
-        datos_crudos: Lista de diccionarios con datos de países
-        
+        lf: datos crudos
+        conservar: columnas extra que se copian sin limpiar (ej. hashes internos)
+        esquema: reglas de limpieza (por defecto ESQUEMA_LIMPIEZA)
+    """
+    compilado = compilar_esquema(esquema)
+
+    plan = lf.select([*conservar, *compilado["limpieza"]])
+    if compilado["filtro"] is not None:
+        plan = plan.filter(compilado["filtro"])
+
+    return ordenar(plan, esquema)
+
+
+def procesar_datos(datos_crudos, esquema: list = None):
+    """
+    Convierte datos crudos en DataFrame limpio (sin snapshot: todas las filas
+    pasan por el plan de limpieza).
+
+    Args:
+        datos_crudos: Lista de diccionarios con datos de países, o datos
+            columnares (dict de listas/arrays de Arrow, tabla Arrow, DataFrame)
+        esquema: reglas de limpieza (por defecto ESQUEMA_LIMPIEZA)
+
     Returns:
         pl.DataFrame: DataFrame limpio y ordenado
         None: Si hay error crítico
     """
-    
+
     try:
         logger.info("=" * 60)
         logger.info("INICIANDO PROCESAMIENTO DE DATOS")
-        Logger.info("=" * 60)
+        logger.info("=" * 60)
 
-        if not datos_crudos:
+        if datos_crudos is None or (isinstance(datos_crudos, (list, dict)) and not datos_crudos):
             logger.error("❌ datos crudos está vacío o es None")
             return None
 
-        logger.info(" Creando DataFrame con polars")
-        df = pl.DataFrame(datos_crudos)
-        registros_iniciales = len(df)
-        logger.info(f"  registros cargados: {registros_iniciales}")
-
-        logger.info("limpienado columna 'población_2023'...")
-        df = df.with_columns([
-        pl.col("poblacion_2023")
-            .str.replace_all(",", "", literal=True)
-            .cast(pl.Int64, strict=False)
-            .alias("pob_2023_limpia")
-        ])
-
-        logger.info("limpienado columna 'población_2024'...")
-        df = df.with_columns([
-            pl.col("poblacion_2024")
-            .str.replace_all(",", "", literal=True)
-            .cast(pl.Int64, strict=False)
-            .alias("pob_2024_limpia")
-        ])
-
-        
-        df = df.with_columns([
-        pl.col("cambio_porcentual")
-            .str.replace_all("%", "", literal=True)
-            .str.replace_all("+", "", literal=True)
-            .str.replace_all("−", "-", literal=True)
-            .cast(pl.Float64, strict=False)
-            .alias("cambio_limpio")
-        ])
-
-        logger.info("reorganizando columnas finales...")
-        df = df.select([
-        "pais",
-        "continente", 
-        "region",
-        pl.col("pob_2023_limpia").alias("poblacion_2023"),
-        pl.col("pob_2024_limpia").alias("poblacion_2024"),
-        pl.col("cambio_limpio").alias("cambio_porcentual")
-        ])
-
-        logger.info("filtrando registros válidos...")
-        df_limpio = df.filter(
-            pl.col("poblacion_2024").is_not_null()
-        )
-        
-        registros_eliminados = len(df) - len(df_limpio)
-        tasa_retencion = (len(df_limpio)/registros_iniciales * 100) if registros_iniciales > 0 else 0
-
-        logger.info(f"   - Registros válidos: {len(df_limpio)}")
-        logger.info(f"   - Registros eliminados: {registros_eliminados}")
-        logger.info(f"   - tasa de retencion: {tasa_retencion}")
+        lf = a_lazyframe(datos_crudos)
 
-        logger.info("ordenando registro de población...")
-        df_limpio = df_limpio.sort("poblacion_2024", descending=True)
+        #limpieza y conteo de fallos de parseo comparten el escaneo
+        with span("plan_polars"):
+            df_limpio, fallos = pl.collect_all([construir_plan(lf, esquema=esquema), plan_fallos(lf, esquema)])
+        conteo = fallos.to_dicts()[0]
+        registrar_fallos(conteo)
+
+        registros_eliminados = conteo["filas"] - df_limpio.height
+        logger.info(f"   - Registros válidos: {df_limpio.height}")
+        logger.info(f"   - Registros eliminados: {registros_eliminados}")
+        observar("filas_descartadas", registros_eliminados)
 
-        #validar que hay datos luego de la limpieza
-        if len(df_limpio) == 0:
-            logger.error("❌    Crítico: no quedaron registros válidos después de ña limpieza")
+        if df_limpio.height == 0:
+            logger.error("❌    Crítico: no quedaron registros válidos después de la limpieza")
             return None
 
         logger.info("=" * 60)
@@ -95,14 +275,10 @@ def procesar_datos(datos_crudos):
 
         return df_limpio
 
-    except  exception as e:
-        logger.info("=" * 60)
-        logger.info("❌  ERROR CRÍTICO DE PROCESAMIENTO")
-        logger.info(f"   tipo: {type(e).__name__}")
-        logger.info(f"   detalle: {str(e)}")
-        logger.info("=" * 60)
+    except Exception as e:
+        logger.error("=" * 60)
+        logger.error("❌ ERROR EN PROCESAMIENTO DE DATOS")
+        logger.error(f"     tipo: {type(e).__name__}")
+        logger.error(f"     detalle: {str(e)}")
+        logger.error("=" * 60)
         return None
-        
-
-    
-
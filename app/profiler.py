@@ -0,0 +1,219 @@
+#profiler.py
+
+import os
+import io
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from app.logger import configurar_logger
+
+logger = configurar_logger('profiler')
+
+#perfiles guardados junto al historial de ejecuciones (logs/)
+PERFILES_DIR = Path(os.getenv("PERFILES_DIR", "logs/perfiles"))
+#perfilar todas las ejecuciones del pipeline (también las programadas)
+PERFILADO_POR_DEFECTO = os.getenv("PIPELINE_PERFILADO", "0") == "1"
+CPROFILE_POR_DEFECTO = os.getenv("PIPELINE_CPROFILE", "0") == "1"
+MAX_PERFILES = int(os.getenv("PERFILES_MAX", "50"))
+CPROFILE_TOP = 40
+
+#perfil activo y ruta de spans abiertos del contexto actual; sin perfil activo
+#span() no hace nada, así que el costo fuera del modo perfilado es una lectura
+_perfil_actual = ContextVar("perfil_actual", default=None)
+_ruta_actual = ContextVar("ruta_span", default=())
+
+#cProfile no admite dos perfiladores a la vez en el mismo proceso
+_lock_cprofile = threading.Lock()
+
+
+@contextmanager
+def span(nombre: str):
+    """
+    Mide un tramo del pipeline si hay un perfil activo en este contexto.
+    Los spans se anidan: 'generacion;docx_guardar'.
+    """
+    perfil = _perfil_actual.get()
+    if perfil is None:
+        yield
+        return
+
+    ruta = _ruta_actual.get() + (nombre,)
+    token = _ruta_actual.set(ruta)
+    inicio = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        _ruta_actual.reset(token)
+        with perfil["lock"]:
+            perfil["spans"].append({
+                "ruta": ";".join(ruta),
+                "inicio_ms": round((inicio - perfil["t0"]) * 1000, 3),
+                "duracion_ms": round((fin - inicio) * 1000, 3),
+                "hilo": threading.current_thread().name
+            })
+
+
+def iniciar_perfil(cprofile: bool = False) -> dict:
+    """
+    Activa un perfil en el contexto actual (y en los que se copien desde él).
+
+    Args:
+        cprofile: además capturar cProfile del hilo que llama
+
+    Returns:
+        dict: perfil, para pasar a finalizar_perfil
+    """
+    perfil = {
+        "id": datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6],
+        "inicio": datetime.now().isoformat(),
+        "t0": time.perf_counter(),
+        "spans": [],
+        "lock": threading.Lock(),
+        "cprofile": None
+    }
+
+    if cprofile:
+        import cProfile
+
+        if _lock_cprofile.acquire(blocking=False):
+            perfil["cprofile"] = cProfile.Profile()
+            perfil["cprofile"].enable()
+        else:
+            logger.warning("⚠️    ya hay un cProfile activo, este perfil solo tendrá spans")
+
+    perfil["token"] = _perfil_actual.set(perfil)
+    logger.info(f"⏱️  perfilado activo: {perfil['id']}")
+    return perfil
+
+
+def _pilas_plegadas(spans: list) -> str:
+    """
+    Formato 'collapsed stacks' (flamegraph.pl, speedscope): tiempo propio de
+    cada ruta de spans en microsegundos.
+    """
+    propio = {}
+    for s in spans:
+        propio[s["ruta"]] = propio.get(s["ruta"], 0) + s["duracion_ms"]
+
+    for s in spans:
+        padre = s["ruta"].rpartition(";")[0]
+        if padre in propio:
+            propio[padre] -= s["duracion_ms"]
+
+    return "\n".join(f"{ruta} {max(0, int(ms * 1000))}" for ruta, ms in sorted(propio.items())) + "\n"
+
+
+def finalizar_perfil(perfil: dict, estado: str = None) -> str:
+    """
+    Cierra el perfil y lo guarda en PERFILES_DIR:
+    <id>.json (spans), <id>.folded (flame) y <id>.prof (si hubo cProfile).
+
+    Returns:
+        str: id del perfil
+        None: si no se pudo guardar
+    """
+    _perfil_actual.reset(perfil["token"])
+    duracion_ms = round((time.perf_counter() - perfil["t0"]) * 1000, 3)
+    perfilador = perfil["cprofile"]
+
+    if perfilador is not None:
+        perfilador.disable()
+        _lock_cprofile.release()
+
+    try:
+        PERFILES_DIR.mkdir(parents=True, exist_ok=True)
+        base = PERFILES_DIR / perfil["id"]
+
+        resultado = {
+            "id": perfil["id"],
+            "inicio": perfil["inicio"],
+            "estado": estado,
+            "duracion_ms": duracion_ms,
+            "spans": sorted(perfil["spans"], key=lambda s: s["inicio_ms"]),
+            "cprofile": None
+        }
+
+        if perfilador is not None:
+            import pstats
+
+            perfilador.dump_stats(f"{base}.prof")
+
+            texto = io.StringIO()
+            pstats.Stats(perfilador, stream=texto).sort_stats("cumulative").print_stats(CPROFILE_TOP)
+            resultado["cprofile"] = {"archivo": f"{base}.prof", "top_acumulado": texto.getvalue()}
+
+        with open(f"{base}.json", 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        Path(f"{base}.folded").write_text(_pilas_plegadas(resultado["spans"]), encoding='utf-8')
+
+        _podar_perfiles()
+        logger.info(f"⏱️  perfil guardado: {base}.json ({len(resultado['spans'])} spans, {duracion_ms:.0f} ms)")
+        return perfil["id"]
+
+    except Exception as e:
+        logger.error(f"❌ no se pudo guardar el perfil {perfil['id']}: {e}")
+        return None
+
+
+def _podar_perfiles():
+    """Conserva solo los MAX_PERFILES perfiles más recientes."""
+    perfiles = sorted(PERFILES_DIR.glob("*.json"))
+    for viejo in perfiles[:max(0, len(perfiles) - MAX_PERFILES)]:
+        for extension in (".json", ".folded", ".prof"):
+            viejo.with_suffix(extension).unlink(missing_ok=True)
+
+
+def listar_perfiles() -> list:
+    """Resumen de los perfiles guardados, del más reciente al más viejo."""
+    resumen = []
+    for ruta in sorted(PERFILES_DIR.glob("*.json"), reverse=True):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            perfil = json.load(f)
+        resumen.append({
+            "id": perfil["id"],
+            "inicio": perfil["inicio"],
+            "estado": perfil["estado"],
+            "duracion_ms": perfil["duracion_ms"],
+            "spans": len(perfil["spans"]),
+            "cprofile": perfil["cprofile"] is not None
+        })
+    return resumen
+
+
+def _ruta_perfil(id_perfil: str, extension: str):
+    """Ruta de un archivo del perfil; None si el id no es válido o no existe."""
+    if not id_perfil or Path(id_perfil).name != id_perfil:
+        return None
+    ruta = PERFILES_DIR / f"{id_perfil}{extension}"
+    return ruta if ruta.exists() else None
+
+
+def obtener_perfil(id_perfil: str):
+    """
+    Returns:
+        dict: perfil guardado
+        None: si no existe
+    """
+    ruta = _ruta_perfil(id_perfil, ".json")
+    if ruta is None:
+        return None
+
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ruta_flame(id_perfil: str):
+    """Ruta del archivo de pilas plegadas del perfil, o None."""
+    return _ruta_perfil(id_perfil, ".folded")
+
+
+def ruta_cprofile(id_perfil: str):
+    """Ruta del volcado cProfile (.prof) del perfil, o None."""
+    return _ruta_perfil(id_perfil, ".prof")
@@ -0,0 +1,207 @@
+#report_cache.py
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from threading import Lock
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+from app.metrics import incrementar
+
+logger = configurar_logger('report_cache')
+
+OUTPUTS_DIR = Path("outputs")
+RUTA_INDICE = OUTPUTS_DIR / ".cache_reportes.json"
+
+#política de evicción sobre outputs/ (por edad primero, luego los menos usados)
+MAX_BYTES = int(float(os.getenv("REPORT_CACHE_MAX_MB", "200")) * 1024 * 1024)
+MAX_EDAD_SEG = float(os.getenv("REPORT_CACHE_MAX_DIAS", "30")) * 24 * 3600
+
+_lock_indice = Lock()
+_contadores = {"hits": 0, "misses": 0, "evicciones": 0}
+
+
+def _leer_indice() -> dict:
+    """Índice {clave: {ruta, creado, ultimo_uso, bytes, sha256}}."""
+    if not RUTA_INDICE.exists():
+        return {}
+
+    with open(RUTA_INDICE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_indice(indice: dict):
+    OUTPUTS_DIR.mkdir(exist_ok=True)
+    temporal = ruta_temporal(RUTA_INDICE)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    temporal.replace(RUTA_INDICE)
+
+
+def _hash_archivo(ruta) -> str:
+    return hashlib.sha256(Path(ruta).read_bytes()).hexdigest()
+
+
+def clave_reporte(df, diff: dict = None) -> str:
+    """
+    Clave de contenido: datos limpios + diff contra el snapshot anterior +
+    versión del generador + plantilla. El diff entra porque la sección de
+    cambios depende de él: los mismos datos después de otro snapshot
+    (A -> B -> A) son otro reporte.
+    """
+    #importes diferidos: polars y python-docx solo cuando ya hay un DataFrame
+    from app.processor import hash_dataframe
+    from app.generator import VERSION_GENERADOR
+    from app.docx_writer import version_plantilla
+
+    h = hashlib.sha256()
+    h.update(hash_dataframe(df).encode())
+    h.update(json.dumps(diff, sort_keys=True, default=str).encode())
+    h.update(VERSION_GENERADOR.encode())
+    h.update(version_plantilla().encode())
+    return h.hexdigest()
+
+
+def _coincide(entrada: dict) -> bool:
+    """El archivo de la entrada existe y es el mismo que se registró (tamaño y hash)."""
+    ruta = Path(entrada["ruta"])
+    try:
+        if ruta.stat().st_size != entrada["bytes"]:
+            return False
+        return _hash_archivo(ruta) == entrada.get("sha256")
+    except FileNotFoundError:
+        return False
+
+
+def buscar_reporte(clave: str):
+    """
+    Busca un reporte ya generado para la clave.
+
+    Returns:
+        str: ruta del DOCX existente
+        None: si no hay (miss) o el archivo ya no es el que se registró
+    """
+    with _lock_indice:
+        indice = _leer_indice()
+        entrada = indice.get(clave)
+
+        if entrada and _coincide(entrada):
+            _contadores["hits"] += 1
+            incrementar("cache_consultas_total", cache="reportes", resultado="hit")
+            entrada["ultimo_uso"] = time.time()
+            _escribir_indice(indice)
+            logger.info(f"📦 reporte en caché ({clave[:12]}): {entrada['ruta']}")
+            return entrada["ruta"]
+
+        _contadores["misses"] += 1
+        incrementar("cache_consultas_total", cache="reportes", resultado="miss")
+        if entrada:
+            #el archivo se borró o se reemplazó por fuera del índice
+            logger.warning(f"⚠️    entrada de caché inválida ({clave[:12]}): {entrada['ruta']}")
+            indice.pop(clave)
+            _escribir_indice(indice)
+
+    return None
+
+
+def registrar_reporte(clave: str, ruta: str):
+    """Asocia un DOCX recién generado a su clave y aplica la política de evicción."""
+    ahora = time.time()
+
+    with _lock_indice:
+        indice = _leer_indice()
+        indice[clave] = {
+            "ruta": ruta,
+            "creado": ahora,
+            "ultimo_uso": ahora,
+            "bytes": Path(ruta).stat().st_size,
+            "sha256": _hash_archivo(ruta)
+        }
+        _escribir_indice(indice)
+
+    aplicar_eviccion()
+
+
+def aplicar_eviccion(max_bytes: int = MAX_BYTES, max_edad_seg: float = MAX_EDAD_SEG) -> int:
+    """
+    Borra reportes de outputs/ más viejos que max_edad_seg y, si aún se supera
+    max_bytes, los de uso más antiguo hasta quedar por debajo.
+
+    Returns:
+        int: archivos eliminados
+    """
+    with _lock_indice:
+        indice = _leer_indice()
+        uso_por_ruta = {entrada["ruta"]: entrada["ultimo_uso"] for entrada in indice.values()}
+
+        archivos = []
+        for ruta in OUTPUTS_DIR.glob("*.docx"):
+            try:
+                info = ruta.stat()
+            except FileNotFoundError:
+                continue
+            #reportes fuera del índice (ej. del scheduler) cuentan por su mtime
+            ultimo_uso = uso_por_ruta.get(str(ruta), info.st_mtime)
+            archivos.append((ultimo_uso, info.st_size, ruta))
+
+        archivos.sort()
+        total_bytes = sum(tamaño for _, tamaño, _ in archivos)
+        limite_edad = time.time() - max_edad_seg
+        eliminados = []
+
+        for ultimo_uso, tamaño, ruta in archivos:
+            if ultimo_uso >= limite_edad and total_bytes <= max_bytes:
+                break
+            ruta.unlink(missing_ok=True)
+            total_bytes -= tamaño
+            eliminados.append(str(ruta))
+
+        if eliminados:
+            indice = {clave: entrada for clave, entrada in indice.items() if entrada["ruta"] not in eliminados}
+            _escribir_indice(indice)
+            _contadores["evicciones"] += len(eliminados)
+            logger.info(f"🧹 caché de reportes: {len(eliminados)} archivos eliminados")
+
+    return len(eliminados)
+
+
+def ultimo_reporte():
+    """
+    Reporte más reciente en outputs/ (de cualquier origen: API, trabajos o scheduler).
+
+    Returns:
+        tuple: (ruta, edad en segundos)
+        None: si no hay reportes
+    """
+    reportes = []
+    for ruta in OUTPUTS_DIR.glob("*.docx"):
+        try:
+            reportes.append((ruta.stat().st_mtime, ruta))
+        except FileNotFoundError:
+            #evictado entre el glob y el stat
+            continue
+
+    if not reportes:
+        return None
+
+    modificado, ruta = max(reportes)
+    return str(ruta), max(0.0, time.time() - modificado)
+
+
+def obtener_estadisticas_cache() -> dict:
+    """Contadores de hits/misses y tamaño actual de la caché de reportes."""
+    with _lock_indice:
+        indice = _leer_indice()
+        contadores = dict(_contadores)
+
+    consultas = contadores["hits"] + contadores["misses"]
+    return {
+        **contadores,
+        "tasa_hits": round(contadores["hits"] / consultas, 3) if consultas else None,
+        "entradas": len(indice),
+        "bytes": sum(entrada["bytes"] for entrada in indice.values()),
+        "max_bytes": MAX_BYTES,
+        "max_edad_dias": MAX_EDAD_SEG / (24 * 3600)
+    }
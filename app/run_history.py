@@ -0,0 +1,378 @@
+#run_history.py
+
+import os
+import json
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from app.logger import configurar_logger
+
+logger = configurar_logger('run_history')
+
+#historial de ejecuciones: solo se agregan filas (WAL permite escribir desde
+#el scheduler y la API mientras otros leen)
+HISTORIAL_DB = Path(os.getenv("HISTORIAL_DB", "logs/historial_ejecuciones.db"))
+#historial JSON anterior, se importa una vez si la base está vacía
+HISTORIAL_JSON = Path("logs/historial_ejecuciones.json")
+#días con detalle por ejecución; lo anterior se compacta a un resumen diario (0 = nunca)
+DIAS_DETALLE = int(os.getenv("HISTORIAL_DIAS_DETALLE", "0"))
+LIMITE_MAXIMO = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    duracion_segundos REAL,
+    error TEXT,
+    perfil TEXT,
+    run_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_timestamp ON ejecuciones (timestamp);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_estado ON ejecuciones (estado, timestamp);
+
+CREATE TABLE IF NOT EXISTS resumen_diario (
+    fecha TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    exitosos INTEGER NOT NULL,
+    duracion_p50 REAL,
+    duracion_p95 REAL,
+    duracion_max REAL
+);
+"""
+
+_COLUMNAS = ("id", "timestamp", "estado", "duracion_segundos", "error", "perfil", "run_id")
+
+_local = threading.local()
+_lock_init = threading.Lock()
+_inicializada = False
+_ultima_compactacion = None
+
+
+def _conexion() -> sqlite3.Connection:
+    """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+    conexion = getattr(_local, "conexion", None)
+    if conexion is not None:
+        return conexion
+
+    HISTORIAL_DB.parent.mkdir(parents=True, exist_ok=True)
+    conexion = sqlite3.connect(HISTORIAL_DB, timeout=10, isolation_level=None)
+    conexion.row_factory = sqlite3.Row
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    _local.conexion = conexion
+
+    _inicializar(conexion)
+    return conexion
+
+
+def _inicializar(conexion: sqlite3.Connection):
+    """Crea las tablas e importa el historial JSON anterior (una vez por proceso)."""
+    global _inicializada
+
+    with _lock_init:
+        if _inicializada:
+            return
+
+        conexion.executescript(_ESQUEMA)
+
+        vacia = conexion.execute("SELECT 1 FROM ejecuciones LIMIT 1").fetchone() is None
+        if vacia and HISTORIAL_JSON.exists():
+            _importar_json(conexion)
+
+        _inicializada = True
+
+
+def _importar_json(conexion: sqlite3.Connection):
+    """Migra logs/historial_ejecuciones.json y lo renombra a .migrado."""
+    try:
+        with open(HISTORIAL_JSON, 'r', encoding='utf-8') as f:
+            historial = json.load(f)
+
+        conexion.execute("BEGIN")
+        for registro in historial:
+            _insertar(conexion, registro)
+        conexion.execute("COMMIT")
+
+        HISTORIAL_JSON.replace(HISTORIAL_JSON.with_suffix(".json.migrado"))
+        logger.info(f"📦 historial JSON migrado a {HISTORIAL_DB} ({len(historial)} ejecuciones)")
+
+    except Exception as e:
+        if conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        logger.error(f"❌ no se pudo migrar el historial JSON: {e}")
+
+
+def _insertar(conexion: sqlite3.Connection, registro: dict):
+    timestamp = registro.get("timestamp") or datetime.now().isoformat()
+    conexion.execute(
+        "INSERT INTO ejecuciones (timestamp, fecha, estado, duracion_segundos, error, perfil, run_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            timestamp,
+            timestamp[:10],
+            registro.get("estado"),
+            registro.get("duracion_segundos"),
+            registro.get("error"),
+            registro.get("perfil"),
+            registro.get("run_id")
+        )
+    )
+
+
+def registrar_ejecucion(registro: dict):
+    """
+    Agrega una ejecución al historial.
+
+    Args:
+        registro: {timestamp, estado, duracion_segundos, error, perfil, run_id}
+    """
+    global _ultima_compactacion
+
+    _insertar(_conexion(), registro)
+
+    #compactar como mucho una vez por día, al registrar
+    hoy = datetime.now().date()
+    if DIAS_DETALLE > 0 and _ultima_compactacion != hoy:
+        _ultima_compactacion = hoy
+        try:
+            compactar()
+        except Exception as e:
+            logger.warning(f"⚠️    no se pudo compactar el historial: {e}")
+
+
+def _a_dict(fila) -> dict:
+    return {columna: fila[columna] for columna in _COLUMNAS}
+
+
+def ultima_ejecucion():
+    """
+    Última ejecución registrada (lectura por clave primaria, sin recorrer la tabla).
+
+    Returns:
+        dict: registro
+        None: si no hay ejecuciones
+    """
+    fila = _conexion().execute(
+        f"SELECT {', '.join(_COLUMNAS)} FROM ejecuciones ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    return _a_dict(fila) if fila else None
+
+
+def consultar_ejecuciones(
+    estado: str = None,
+    desde: str = None,
+    hasta: str = None,
+    limite: int = 50,
+    antes_de: int = None
+) -> dict:
+    """
+    Ejecuciones de la más reciente a la más vieja, paginadas por id.
+
+    Args:
+        estado: 'EXITOSO' | 'FALLIDO' | ...
+        desde / hasta: fechas 'YYYY-MM-DD' (inclusive)
+        limite: filas por página (máximo LIMITE_MAXIMO)
+        antes_de: id de corte (el 'siguiente' de la página anterior)
+
+    Returns:
+        dict: {ejecuciones, siguiente}; siguiente es None en la última página
+
+    Raises:
+        ValueError: si desde / hasta no son fechas 'YYYY-MM-DD'
+    """
+    desde = _validar_fecha(desde, "desde")
+    hasta = _validar_fecha(hasta, "hasta")
+    condiciones, parametros = [], []
+
+    if estado:
+        condiciones.append("estado = ?")
+        parametros.append(estado.upper())
+    if desde:
+        condiciones.append("timestamp >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("timestamp < ?")
+        parametros.append(_dia_siguiente(hasta))
+    if antes_de:
+        condiciones.append("id < ?")
+        parametros.append(antes_de)
+
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    filas = _conexion().execute(
+        f"SELECT {', '.join(_COLUMNAS)} FROM ejecuciones {where} ORDER BY id DESC LIMIT ?",
+        (*parametros, limite + 1)
+    ).fetchall()
+
+    ejecuciones = [_a_dict(fila) for fila in filas[:limite]]
+    siguiente = ejecuciones[-1]["id"] if len(filas) > limite else None
+    return {"ejecuciones": ejecuciones, "siguiente": siguiente}
+
+
+def _validar_fecha(fecha: str, nombre: str):
+    """
+    Normaliza un filtro de fecha a 'YYYY-MM-DD' (acepta también un timestamp ISO).
+
+    Raises:
+        ValueError: si no es una fecha válida
+    """
+    if not fecha:
+        return None
+    try:
+        return datetime.fromisoformat(fecha).date().isoformat()
+    except ValueError:
+        raise ValueError(f"{nombre} inválido: '{fecha}' (formato YYYY-MM-DD)") from None
+
+
+def _dia_siguiente(fecha: str) -> str:
+    """'YYYY-MM-DD' del día siguiente (límite exclusivo para filtrar por timestamp)."""
+    return (datetime.fromisoformat(fecha[:10]) + timedelta(days=1)).date().isoformat()
+
+
+def _percentil(valores: list, p: float):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return None
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+def _resumir(duraciones_por_fecha: dict, exitosos_por_fecha: dict) -> dict:
+    resumen = {}
+    for fecha, duraciones in duraciones_por_fecha.items():
+        duraciones = sorted(d for d in duraciones if d is not None)
+        resumen[fecha] = {
+            "total": len(duraciones_por_fecha[fecha]),
+            "exitosos": exitosos_por_fecha.get(fecha, 0),
+            "duracion_p50": _percentil(duraciones, 50),
+            "duracion_p95": _percentil(duraciones, 95),
+            "duracion_max": duraciones[-1] if duraciones else None
+        }
+    return resumen
+
+
+def _agrupar_por_fecha(filas) -> dict:
+    duraciones, exitosos = {}, {}
+    for fila in filas:
+        duraciones.setdefault(fila["fecha"], []).append(fila["duracion_segundos"])
+        if fila["estado"] == "EXITOSO":
+            exitosos[fila["fecha"]] = exitosos.get(fila["fecha"], 0) + 1
+    return _resumir(duraciones, exitosos)
+
+
+def estadisticas_diarias(desde: str = None, hasta: str = None) -> dict:
+    """
+    Tasa de éxito y p50/p95 de duración por día (detalle + días ya compactados).
+
+    Returns:
+        dict: {dias: [...], total, tasa_exito}
+
+    Raises:
+        ValueError: si desde / hasta no son fechas 'YYYY-MM-DD'
+    """
+    desde = _validar_fecha(desde, "desde") or "0000-01-01"
+    hasta = _validar_fecha(hasta, "hasta") or "9999-12-30"
+    conexion = _conexion()
+
+    filas = conexion.execute(
+        "SELECT fecha, estado, duracion_segundos FROM ejecuciones "
+        "WHERE timestamp >= ? AND timestamp < ?",
+        (desde, _dia_siguiente(hasta))
+    ).fetchall()
+    dias = _agrupar_por_fecha(filas)
+
+    for fila in conexion.execute(
+        "SELECT * FROM resumen_diario WHERE fecha >= ? AND fecha <= ?", (desde, hasta)
+    ).fetchall():
+        dias.setdefault(fila["fecha"], {k: fila[k] for k in fila.keys() if k != "fecha"})
+
+    lista = []
+    for fecha in sorted(dias):
+        dia = dias[fecha]
+        lista.append({
+            "fecha": fecha,
+            **dia,
+            "tasa_exito": round(dia["exitosos"] / dia["total"], 3) if dia["total"] else None
+        })
+
+    total = sum(dia["total"] for dia in lista)
+    exitosos = sum(dia["exitosos"] for dia in lista)
+    return {
+        "dias": lista,
+        "total": total,
+        "tasa_exito": round(exitosos / total, 3) if total else None
+    }
+
+
+def _combinar_resumen(existente, nuevo: dict) -> dict:
+    """
+    Suma un resumen nuevo a uno ya guardado para la misma fecha (ej. filas
+    importadas o registradas con fecha vieja después de compactar ese día).
+    Los percentiles ya no se pueden recalcular sin el detalle: se combinan
+    ponderados por cantidad de ejecuciones (aproximación).
+    """
+    if existente is None:
+        return nuevo
+
+    total = existente["total"] + nuevo["total"]
+
+    def ponderado(campo: str):
+        pares = [(r[campo], r["total"]) for r in (existente, nuevo) if r[campo] is not None]
+        peso = sum(cantidad for _, cantidad in pares)
+        return sum(valor * cantidad for valor, cantidad in pares) / peso if peso else None
+
+    maximos = [r["duracion_max"] for r in (existente, nuevo) if r["duracion_max"] is not None]
+    return {
+        "total": total,
+        "exitosos": existente["exitosos"] + nuevo["exitosos"],
+        "duracion_p50": ponderado("duracion_p50"),
+        "duracion_p95": ponderado("duracion_p95"),
+        "duracion_max": max(maximos) if maximos else None
+    }
+
+
+def compactar(dias_detalle: int = DIAS_DETALLE) -> dict:
+    """
+    Pasa las ejecuciones de más de dias_detalle días a resumen_diario y borra
+    su detalle. Con dias_detalle = 0 no borra nada (retención ilimitada). Un
+    día que ya tenía resumen se combina con el nuevo (ver _combinar_resumen).
+
+    Returns:
+        dict: {dias_compactados, filas_eliminadas}
+    """
+    if dias_detalle <= 0:
+        return {"dias_compactados": 0, "filas_eliminadas": 0}
+
+    limite = (datetime.now() - timedelta(days=dias_detalle)).date().isoformat()
+    conexion = _conexion()
+
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        filas = conexion.execute(
+            "SELECT fecha, estado, duracion_segundos FROM ejecuciones WHERE fecha < ?", (limite,)
+        ).fetchall()
+
+        for fecha, dia in _agrupar_por_fecha(filas).items():
+            existente = conexion.execute("SELECT * FROM resumen_diario WHERE fecha = ?", (fecha,)).fetchone()
+            dia = _combinar_resumen(existente, dia)
+            conexion.execute(
+                "INSERT OR REPLACE INTO resumen_diario "
+                "(fecha, total, exitosos, duracion_p50, duracion_p95, duracion_max) VALUES (?, ?, ?, ?, ?, ?)",
+                (fecha, dia["total"], dia["exitosos"], dia["duracion_p50"], dia["duracion_p95"], dia["duracion_max"])
+            )
+
+        eliminadas = conexion.execute("DELETE FROM ejecuciones WHERE fecha < ?", (limite,)).rowcount
+        conexion.execute("COMMIT")
+
+    except Exception:
+        conexion.execute("ROLLBACK")
+        raise
+
+    conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    dias = len({fila["fecha"] for fila in filas})
+    logger.info(f"🧹 historial compactado: {dias} días, {eliminadas} ejecuciones pasadas a resumen diario")
+    return {"dias_compactados": dias, "filas_eliminadas": eliminadas}
@@ -1,31 +1,109 @@
 # scheduler.py
 
-import schedule
+import os
+import re
+import json
 import time
-from datetime import datetime
-from threading import Thread, Event
+import uuid
+from pathlib import Path
+from datetime import datetime, timezone
+from threading import Thread, Event, Condition
+from concurrent.futures import ThreadPoolExecutor
 from app import logger
 
-from app.extractor import extraer_tabla_completa
-from app.processor import procesar_datos
-from app.generator import crear_reporte
-from app.logger import configurar_logger, log_ejecución_pipeline
+from app.archivos import ruta_temporal
+from app.logger import configurar_logger, log_ejecución_pipeline, fijar_contexto_log, restaurar_contexto_log, contexto_log
+from app.metrics import observar, incrementar
+from app.cron import Cron, obtener_zona
+from app.health import marcar_componente, registrar_inicio_ejecucion, registrar_etapa, registrar_fin_ejecucion
+from app.profiler import span, iniciar_perfil, finalizar_perfil, PERFILADO_POR_DEFECTO, CPROFILE_POR_DEFECTO
 
 logger = configurar_logger('scheduler')
 
+#tareas programadas simultáneas como máximo (cada una espera su trabajo; el
+#pipeline corre en la cola de app.jobs, acotada por JOBS_WORKERS)
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+#tareas creadas/editadas por la API; sobreviven reinicios
+PROGRAMACIONES_ARCHIVO = Path(os.getenv("SCHEDULER_ARCHIVO", "logs/programaciones.json"))
+#tarea por defecto cuando no hay archivo (zona vacía = hora local del servidor)
+CRON_POR_DEFECTO = os.getenv("SCHEDULER_CRON", "0 8 * * *")
+ZONA_POR_DEFECTO = os.getenv("SCHEDULER_ZONA") or None
+#atraso a partir del cual una ocurrencia cuenta como perdida
+TOLERANCIA_SEG = float(os.getenv("SCHEDULER_TOLERANCIA_SEG", "60"))
+MAX_RECUPERAR = int(os.getenv("SCHEDULER_MAX_RECUPERAR", "24"))
+MAX_PENDIENTES = int(os.getenv("SCHEDULER_MAX_PENDIENTES", "10"))
+#al detener: espera máxima a las ejecuciones en curso (después siguen en segundo plano)
+ESPERA_CIERRE_SEG = float(os.getenv("SCHEDULER_ESPERA_CIERRE_SEG", "10"))
+
+#políticas por tarea (ver _lanzar y _despachar)
+SOLAPAMIENTO = ("saltar", "encolar", "fusionar")
+PERDIDAS = ("saltar", "una", "todas")
+
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+_CAMPOS_PERSISTIDOS = ("id", "cron", "zona", "motor", "habilitada", "solapamiento", "perdidas", "ultima_programada")
+_ESPERA_MAXIMA_SEG = 300
+
+#valor por defecto de editar_tarea para "campo no indicado" (None borra zona / motor)
+SIN_CAMBIO = object()
+
 # Variables globales
 _scheduler_stop_event = Event()
 _scheduler_thread = None
-_scheduler_enabled = False  
+_scheduler_enabled = False
+_condicion = Condition()    #protege _tareas; el loop espera en ella
+_tareas = {}                #id -> tarea
+_executor = None
 
-def ejecutar_pipeline():
+def ejecutar_pipeline(
+    motor: str = None,
+    al_cambiar_etapa=None,
+    perfilar: bool = None,
+    cprofile: bool = None,
+    persistir: bool = True,
+    al_generar=None
+):
     """
     Ejecuta el pipeline completo de forma automática.
     Registra métricas de ejecución.
+
+    Args:
+        motor: motor de extracción ('http' | 'playwright'); None usa el por defecto
+        al_cambiar_etapa: callback opcional que recibe el nombre de cada etapa
+            ('extrayendo' | 'procesando' | 'generando') al empezarla
+        perfilar: medir cada etapa con spans y guardar el perfil junto al
+            historial (por defecto PIPELINE_PERFILADO)
+        cprofile: además capturar cProfile (por defecto PIPELINE_CPROFILE)
+        persistir: guardar el reporte en outputs/ y en la caché de reportes
+        al_generar: callback opcional que recibe (nombre_archivo, bytes) del
+            DOCX apenas está en memoria, antes de escribirlo en disco
+
+    Returns:
+        str: ruta del reporte generado (el nombre del archivo si persistir=False)
+        None: si alguna etapa falló
     """
+    #importes diferidos: playwright, polars y python-docx no se cargan al
+    #importar el scheduler (la API arranca sin esperarlos)
+    from app.extractor import extraer_tabla_completa, obtener_info_fuente
+    from app.snapshots import procesar_incremental
+    from app.dataset_store import guardar_en_dataset
+    from app.generator import crear_reporte_en_memoria, persistir_reporte
+    from app.aggregator import obtener_agregados
+    from app.report_cache import clave_reporte, buscar_reporte, registrar_reporte
+
     tiempo_inicio = time.time()
     estado = 'FALLIDO'
     mensaje_error = None
+    perfilar = PERFILADO_POR_DEFECTO if perfilar is None else perfilar
+    cprofile = CPROFILE_POR_DEFECTO if cprofile is None else cprofile
+    run_id = uuid.uuid4().hex[:12]
+    token_log = fijar_contexto_log(run_id=run_id)
+    perfil = iniciar_perfil(cprofile=cprofile) if perfilar or cprofile else None
+    registrar_inicio_ejecucion(run_id)
+
+    def etapa(nombre: str):
+        registrar_etapa(run_id, nombre)
+        if al_cambiar_etapa:
+            al_cambiar_etapa(nombre)
 
     try:
         logger.info("\n" + "=" * 50)
@@ -34,28 +112,76 @@ def ejecutar_pipeline():
         logger.info("=" * 50 + "\n")
         
         # PASO 1: Extraer
+        etapa("extrayendo")
         logger.info("📥 PASO 1/3: Extrayendo datos...")
-        datos_raw = extraer_tabla_completa()
+        with span("extraccion"):
+            datos_raw = extraer_tabla_completa(motor=motor)
         
         if not datos_raw:
             logger.error("❌ Extracción falló: datos_raw es None o esta vacío")
-            return
+            mensaje_error = "extracción sin datos"
+            return None
         
         logger.info(f"✅ Extraídos {len(datos_raw)} registros\n")
         
         # PASO 2: Procesar
+        etapa("procesando")
         logger.info("🔄 PASO 2/3: Procesando datos...")
-        df_limpio = procesar_datos(datos_raw)
+        info_fuente = obtener_info_fuente()
+        with span("procesamiento"):
+            df_limpio, diff = procesar_incremental(
+                datos_raw,
+                hash_fuente=info_fuente["hash"] if info_fuente else None
+            )
 
         if df_limpio is None or df_limpio.height == 0:
             logger.error(f"❌ procesamiento falló: DF vacío o None")
-            return
+            mensaje_error = "procesamiento sin datos"
+            return None
+
+        try:
+            with span("dataset_guardar"):
+                guardar_en_dataset(df_limpio, run_id=run_id)
+        except Exception as e:
+            logger.warning(f"⚠️    no se pudo guardar la ejecución en el dataset: {e}")
+
+        with span("agregados"):
+            agregados = obtener_agregados(df_limpio)
 
         logger.info("🔄 reporte generado: Procesando datos...")
 
-        # PASO 3: Generar reporte
-        logger.info("📄 Generando reporte...")
-        ruta_reporte = crear_reporte(df_limpio)
+        # PASO 3: Generar reporte (o reutilizar uno con los mismos datos y cambios)
+        etapa("generando")
+        clave = clave_reporte(df_limpio, diff)
+        ruta_reporte = buscar_reporte(clave)
+        reporte = None
+
+        if ruta_reporte is not None and al_generar:
+            try:
+                reporte = (os.path.basename(ruta_reporte), Path(ruta_reporte).read_bytes())
+            except FileNotFoundError:
+                #evictado entre la búsqueda y la lectura
+                ruta_reporte = None
+
+        if ruta_reporte is None:
+            logger.info("📄 Generando reporte...")
+            with span("generacion"):
+                reporte = crear_reporte_en_memoria(df_limpio, diff=diff, agregados=agregados, sufijo=run_id)
+
+            if not reporte:
+                mensaje_error = "no se generó el reporte"
+                return None
+
+        #el reporte en memoria se entrega antes de escribirlo: quien espera no paga el disco
+        if al_generar:
+            al_generar(*reporte)
+
+        if ruta_reporte is None and persistir:
+            with span("reporte_guardar"):
+                ruta_reporte = persistir_reporte(*reporte)
+            registrar_reporte(clave, ruta_reporte)
+
+        ruta_reporte = ruta_reporte or reporte[0]
         logger.info(f"✅ Reporte generado: {ruta_reporte}")
 
         estado = 'EXITOSO'
@@ -65,88 +191,566 @@ def ejecutar_pipeline():
         logger.info("✅ Pipeline completado exitosamente")
         logger.info(f"      duración total: {duracion:.2f} segundos")
         logger.info("=" * 50 + "\n")
-        
+
+        return ruta_reporte
+
     except Exception as e:
+        mensaje_error = f"{type(e).__name__}: {e}"
         logger.error("=" * 50)
         logger.error("❌ ERROR CRÍTICO EN PIPELINE AUTOMÁTICO")
         logger.error(f"     tipo: {type(e).__name__}")
         logger.error(f"     detalle: {str(e)}")
         logger.error("=" * 50)
+        return None
 
     finally:
-        #siempre regustrar la ejecución
-        duracion_final = time.time() - tiempo_inicio
-        log_ejecución_pipeline(
-            estado=estado,
-            duracion_seg=round(duracion_final,2),
-            error=mensaje_error
-        )
-        logger.info(f"   ejecución registrada en historial: {estado}")
+        #siempre regustrar la ejecución; el contexto de log se restaura aunque
+        #falle el registro (si no, el hilo queda con este run_id)
+        try:
+            duracion_final = time.time() - tiempo_inicio
+            observar("pipeline_duracion_segundos", duracion_final, estado=estado)
+            id_perfil = None
+            if perfil:
+                try:
+                    id_perfil = finalizar_perfil(perfil, estado=estado)
+                except Exception as e:
+                    logger.error(f"❌ no se pudo guardar el perfil de {run_id}: {type(e).__name__}: {e}")
+            registrar_fin_ejecucion(run_id, estado, round(duracion_final, 2), mensaje_error, perfil=id_perfil)
+            log_ejecución_pipeline(
+                estado=estado,
+                duracion_seg=round(duracion_final,2),
+                error=mensaje_error,
+                perfil=id_perfil,
+                run_id=run_id
+            )
+            logger.info(f"   ejecución registrada en historial: {estado}")
+        except Exception as e:
+            logger.error(f"❌ no se pudo registrar la ejecución {run_id} en el historial: {type(e).__name__}: {e}")
+        finally:
+            restaurar_contexto_log(token_log)
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    """Pool de hilos que siguen las tareas programadas (creado en el primer uso)."""
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=SCHEDULER_WORKERS, thread_name_prefix="programada")
+    return _executor
+
+
+def _construir_tarea(
+    id_tarea: str,
+    cron: str,
+    zona: str = None,
+    motor: str = None,
+    habilitada: bool = True,
+    solapamiento: str = "saltar",
+    perdidas: str = "una",
+    ultima_programada: str = None
+) -> dict:
+    """
+    Valida y arma una tarea programada.
+
+    Raises:
+        ValueError: si algún parámetro es inválido
+    """
+    if not _ID_VALIDO.match(id_tarea or ""):
+        raise ValueError(f"id de tarea inválido: '{id_tarea}' (letras, números, '-' o '_', hasta 40)")
+    if solapamiento not in SOLAPAMIENTO:
+        raise ValueError(f"solapamiento inválido: '{solapamiento}' (opciones: {', '.join(SOLAPAMIENTO)})")
+    if perdidas not in PERDIDAS:
+        raise ValueError(f"perdidas inválido: '{perdidas}' (opciones: {', '.join(PERDIDAS)})")
+    if motor not in (None, "http", "playwright", "async"):
+        raise ValueError(f"motor inválido: '{motor}' (opciones: http, playwright, async)")
+
+    expresion = Cron(cron)
+    tz = obtener_zona(zona)
+    #falla aquí (y no en el loop) si la expresión nunca ocurre, ej. 30 de febrero
+    expresion.siguiente(datetime.now(timezone.utc), tz)
+
+    return {
+        "id": id_tarea,
+        "cron": expresion.expresion,
+        "zona": zona,
+        "motor": motor,
+        "habilitada": habilitada,
+        "solapamiento": solapamiento,
+        "perdidas": perdidas,
+        "ultima_programada": ultima_programada,
+        "proxima": None,
+        "en_ejecucion": False,
+        "pendientes": 0,
+        "ejecuciones": 0,
+        "omitidas": 0,
+        "ultimo_estado": None,
+        "ultimo_fin": None,
+        "_cron": expresion,
+        "_zona": tz
+    }
+
+
+def _programar(tarea: dict, desde: datetime):
+    """Calcula la próxima ocurrencia de la tarea posterior a desde."""
+    tarea["proxima"] = tarea["_cron"].siguiente(desde, tarea["_zona"]) if tarea["habilitada"] else None
+
+
+def _publica(tarea: dict) -> dict:
+    copia = {k: v for k, v in tarea.items() if not k.startswith("_")}
+    copia["proxima"] = tarea["proxima"].isoformat() if tarea["proxima"] else None
+    return copia
+
+
+def _guardar_tareas():
+    """Persiste las tareas (llamar con _condicion tomada)."""
+    registros = [{campo: tarea[campo] for campo in _CAMPOS_PERSISTIDOS} for tarea in _tareas.values()]
+
+    try:
+        PROGRAMACIONES_ARCHIVO.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta_temporal(PROGRAMACIONES_ARCHIVO)
+        temporal.write_text(json.dumps(registros, ensure_ascii=False, indent=2), encoding="utf-8")
+        temporal.replace(PROGRAMACIONES_ARCHIVO)
+    except Exception as e:
+        logger.warning(f"⚠️    no se pudieron guardar las tareas programadas: {e}")
+
+
+def _cargar_tareas():
+    """
+    Carga las tareas guardadas; sin archivo crea la tarea diaria por defecto
+    (SCHEDULER_CRON en SCHEDULER_ZONA). Las que tienen ultima_programada
+    retoman desde ahí, así las ejecuciones perdidas mientras el proceso estuvo
+    detenido pasan por su política de perdidas.
+    """
+    registros = [{"id": "diario", "cron": CRON_POR_DEFECTO, "zona": ZONA_POR_DEFECTO}]
+
+    if PROGRAMACIONES_ARCHIVO.exists():
+        try:
+            registros = json.loads(PROGRAMACIONES_ARCHIVO.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"❌ no se pudo leer {PROGRAMACIONES_ARCHIVO}, usando la tarea por defecto: {e}")
+
+    ahora = datetime.now(timezone.utc)
+
+    with _condicion:
+        _tareas.clear()
+        for registro in registros:
+            try:
+                registro = dict(registro)
+                if not registro.get("id"):
+                    raise ValueError(f"registro sin id: {registro}")
+                tarea = _construir_tarea(registro.pop("id"), **registro)
+
+                desde = ahora
+                if tarea["ultima_programada"]:
+                    desde = datetime.fromisoformat(tarea["ultima_programada"])
+                    if desde.tzinfo is None:
+                        raise ValueError(f"ultima_programada sin zona horaria: {tarea['ultima_programada']}")
+            except (ValueError, TypeError) as e:
+                logger.warning(f"⚠️    tarea programada descartada: {e}")
+                continue
+
+            _programar(tarea, desde)
+            _tareas[tarea["id"]] = tarea
+
+
+def _correr_tarea(id_tarea: str, programada: datetime):
+    """
+    Envía el pipeline de una tarea a la cola de trabajos (app.jobs: mismos
+    workers y deduplicación que la API) y espera a que termine; repite
+    mientras tenga ejecuciones pendientes.
+    """
+    #app.jobs importa este módulo
+    from app.jobs import enviar_trabajo, esperar_trabajo, COMPLETADO
+
+    while True:
+        with _condicion:
+            tarea = _tareas.get(id_tarea)
+            if tarea is None:
+                return
+            if _scheduler_stop_event.is_set():
+                #quedó en la cola del pool al detener el scheduler: no se corre
+                tarea["pendientes"] = 0
+                tarea["en_ejecucion"] = False
+                _condicion.notify_all()
+                return
+            motor = tarea["motor"]
+
+        logger.info(f"▶️  tarea {id_tarea}: ejecución programada para {programada.isoformat()}")
+        try:
+            with contexto_log(tarea=id_tarea):
+                trabajo, _ = enviar_trabajo(motor=motor)
+                logger.info(f"   tarea {id_tarea}: trabajo {trabajo['id']}")
+                trabajo = esperar_trabajo(trabajo["id"]) or trabajo
+            ruta = trabajo["ruta"] if trabajo["estado"] == COMPLETADO else None
+        except Exception as e:
+            ruta = None
+            logger.error(f"❌ tarea {id_tarea}: {type(e).__name__}: {e}")
+
+        with _condicion:
+            tarea = _tareas.get(id_tarea)
+            if tarea is None:
+                return
+
+            tarea["ejecuciones"] += 1
+            tarea["ultimo_estado"] = "EXITOSO" if ruta else "FALLIDO"
+            tarea["ultimo_fin"] = datetime.now().isoformat()
+
+            if tarea["pendientes"] and not _scheduler_stop_event.is_set():
+                tarea["pendientes"] -= 1
+                logger.info(f"🔁 tarea {id_tarea}: corriendo ejecución pendiente ({tarea['pendientes']} más en cola)")
+                continue
+
+            tarea["pendientes"] = 0
+            tarea["en_ejecucion"] = False
+            #detener_scheduler puede estar esperando a que terminen
+            _condicion.notify_all()
+            return
+
+
+def _lanzar(tarea: dict, programada: datetime):
+    """
+    Envía una ocurrencia al pool según la política de solapamiento de la tarea
+    (llamar con _condicion tomada):
+        saltar: si ya está corriendo, se omite
+        encolar: corre al terminar la actual (hasta SCHEDULER_MAX_PENDIENTES)
+        fusionar: las que llegan mientras corre se juntan en una sola ejecución posterior
+    """
+    if not tarea["en_ejecucion"]:
+        tarea["en_ejecucion"] = True
+        _obtener_executor().submit(_correr_tarea, tarea["id"], programada)
+        incrementar("programaciones_total", tarea=tarea["id"], resultado="lanzada")
+        return
+
+    if tarea["solapamiento"] == "encolar" and tarea["pendientes"] < MAX_PENDIENTES:
+        tarea["pendientes"] += 1
+        resultado = "encolada"
+    elif tarea["solapamiento"] == "fusionar":
+        resultado = "fusionada" if tarea["pendientes"] else "encolada"
+        tarea["pendientes"] = 1
+    else:
+        tarea["omitidas"] += 1
+        resultado = "omitida"
+
+    incrementar("programaciones_total", tarea=tarea["id"], resultado=resultado)
+    logger.info(f"⏭️  tarea {tarea['id']} sigue corriendo: ocurrencia {resultado} (solapamiento '{tarea['solapamiento']}')")
+
+
+def _despachar(ahora: datetime):
+    """
+    Lanza las tareas vencidas (llamar con _condicion tomada). Las ocurrencias con
+    más de SCHEDULER_TOLERANCIA_SEG de atraso (proceso detenido, scheduler en
+    pausa) se tratan según la política de perdidas de la tarea:
+        saltar: se descartan
+        una: todas se juntan en una sola ejecución
+        todas: se lanzan todas (hasta SCHEDULER_MAX_RECUPERAR), sujetas al solapamiento
+    """
+    cambios = False
+
+    for tarea in _tareas.values():
+        if not tarea["habilitada"] or tarea["proxima"] is None or tarea["proxima"] > ahora:
+            continue
+
+        ocurrencias = [tarea["proxima"]]
+        while len(ocurrencias) <= MAX_RECUPERAR:
+            siguiente = tarea["_cron"].siguiente(ocurrencias[-1], tarea["_zona"])
+            if siguiente > ahora:
+                break
+            ocurrencias.append(siguiente)
+
+        a_tiempo = (ahora - ocurrencias[-1]).total_seconds() <= TOLERANCIA_SEG
+        perdidas = len(ocurrencias) - 1 if a_tiempo else len(ocurrencias)
+
+        if tarea["perdidas"] == "todas":
+            lanzar = ocurrencias
+        elif tarea["perdidas"] == "una" or a_tiempo:
+            lanzar = ocurrencias[-1:]
+        else:
+            lanzar = []
+
+        if perdidas:
+            logger.warning(
+                f"⚠️    tarea {tarea['id']}: {perdidas} ejecuciones perdidas desde "
+                f"{ocurrencias[0].isoformat()} (política '{tarea['perdidas']}')"
+            )
+            descartadas = len(ocurrencias) - len(lanzar)
+            if descartadas:
+                incrementar("programaciones_total", descartadas, tarea=tarea["id"], resultado="perdida")
+
+        for programada in lanzar:
+            _lanzar(tarea, programada)
+
+        tarea["ultima_programada"] = ocurrencias[-1].isoformat()
+        _programar(tarea, ahora)
+        cambios = True
+
+    if cambios:
+        _guardar_tareas()
+
+
+def _segundos_hasta_proxima(ahora: datetime):
+    """Espera hasta la tarea más próxima (None = hasta que algo la despierte)."""
+    if not _scheduler_enabled:
+        return None
+
+    proximas = [t["proxima"] for t in _tareas.values() if t["habilitada"] and t["proxima"]]
+    if not proximas:
+        return None
+
+    #tope por si el reloj del sistema salta (suspensión, ajuste de hora)
+    return min(max(0.0, (min(proximas) - ahora).total_seconds()), _ESPERA_MAXIMA_SEG)
 
 
 def iniciar_scheduler():
-    """Configura y ejecuta el scheduler en un loop."""
-    global _scheduler_enabled
-    
-    # Configurar tarea diaria
-    schedule.every().day.at("08:00").do(ejecutar_pipeline)
-    
-    logger.error("=" * 50)
+    """
+    Loop del scheduler: duerme hasta la próxima tarea vencida y se despierta
+    al instante al detenerlo, activarlo/pausarlo o editar las tareas.
+    Las tareas corren en el pool de workers, no en este hilo.
+    """
+    logger.info("=" * 50)
     logger.info("🕐 Scheduler iniciado")
-    logger.info("📅 Tarea programada: Diariamente a las 08:00 AM")
+    with _condicion:
+        for tarea in _tareas.values():
+            logger.info(f"📅 Tarea '{tarea['id']}': '{tarea['cron']}' ({tarea['zona'] or 'hora local'})")
     logger.info(f"📊 Estado: {'ACTIVO' if _scheduler_enabled else 'PAUSADO'}")
-    logger.error("=" * 50)
-    
-    while not _scheduler_stop_event.is_set():
-        if _scheduler_enabled:  # ← NUEVO: Solo ejecuta si está habilitado
-            schedule.run_pending()
-        time.sleep(60)
-    
+    logger.info("=" * 50)
+    marcar_componente("scheduler", True, "loop corriendo")
+
+    with _condicion:
+        while not _scheduler_stop_event.is_set():
+            ahora = datetime.now(timezone.utc)
+            if _scheduler_enabled:
+                try:
+                    _despachar(ahora)
+                except Exception as e:
+                    logger.error(f"❌ error despachando tareas programadas: {type(e).__name__}: {e}")
+
+            _condicion.wait(timeout=_segundos_hasta_proxima(ahora))
+
+    marcar_componente("scheduler", False, "detenido")
     logger.info("🛑 Scheduler detenido correctamente")
 
 
+def _despertar():
+    """Despierta el loop para que recalcule la próxima espera."""
+    with _condicion:
+        _condicion.notify_all()
+
+
 def iniciar_scheduler_background():
     """Inicia el scheduler en un thread de background."""
     global _scheduler_thread
-    
+
+    _cargar_tareas()
     _scheduler_stop_event.clear()
-    _scheduler_thread = Thread(target=iniciar_scheduler, daemon=True)
+    _scheduler_thread = Thread(target=iniciar_scheduler, name="scheduler", daemon=True)
     _scheduler_thread.start()
     logger.info("✅ Scheduler corriendo en background (thread daemon)")
 
 
 def detener_scheduler():
-    """Detiene el scheduler de forma limpia."""
-    global _scheduler_thread
-    
+    """
+    Detiene el scheduler: descarta lo que no empezó y espera a las ejecuciones
+    en curso hasta SCHEDULER_ESPERA_CIERRE_SEG; las que no terminan a tiempo
+    siguen en segundo plano (el cierre no queda bloqueado por un pipeline).
+    """
+    global _scheduler_thread, _executor
+
     if _scheduler_thread and _scheduler_thread.is_alive():
         logger.info("🛑 Deteniendo scheduler...")
         _scheduler_stop_event.set()
+        _despertar()
         _scheduler_thread.join(timeout=5)
         logger.info("✅ Scheduler detenido")
 
+    with _condicion:
+        executor, _executor = _executor, None
+
+    if executor is None:
+        return
+
+    #sin cancel_futures: lo que sigue en cola sale enseguida (ver _correr_tarea)
+    #y libera su tarea; cancelado quedaría marcado en_ejecucion
+    executor.shutdown(wait=False)
+
+    with _condicion:
+        terminadas = _condicion.wait_for(
+            lambda: not any(tarea["en_ejecucion"] for tarea in _tareas.values()),
+            timeout=ESPERA_CIERRE_SEG
+        )
+        en_curso = [tarea["id"] for tarea in _tareas.values() if tarea["en_ejecucion"]]
+
+    if not terminadas:
+        logger.warning(
+            f"⚠️    {len(en_curso)} ejecuciones programadas siguen en curso ({', '.join(en_curso)}); "
+            f"terminarán en segundo plano"
+        )
 
 
 def activar_scheduler():
-    """Activa la ejecución programada del scheduler."""
+    """
+    Activa la ejecución programada del scheduler. Lo que venció durante la
+    pausa se resuelve con la política de perdidas de cada tarea.
+    """
     global _scheduler_enabled
     _scheduler_enabled = True
-    logger.info("✅ Scheduler ACTIVADO - se ejecutará a las 8:00 am diariamente")
+    _despertar()
+    logger.info("✅ Scheduler ACTIVADO - las tareas se ejecutarán según su programación")
 
 
 def desactivar_scheduler():
     """Desactiva la ejecución programada del scheduler."""
     global _scheduler_enabled
     _scheduler_enabled = False
+    _despertar()
     logger.info("⏸️ Scheduler PAUSADO - no se ejcutará hasta ser reactivado")
 
 
+def listar_tareas() -> list:
+    """Tareas programadas con su próxima ejecución y estado."""
+    with _condicion:
+        return [_publica(tarea) for tarea in _tareas.values()]
+
+
+def obtener_tarea(id_tarea: str):
+    """
+    Returns:
+        dict: la tarea
+        None: si no existe
+    """
+    with _condicion:
+        tarea = _tareas.get(id_tarea)
+        return _publica(tarea) if tarea else None
+
+
+def crear_tarea(
+    id_tarea: str,
+    cron: str,
+    zona: str = None,
+    motor: str = None,
+    habilitada: bool = True,
+    solapamiento: str = "saltar",
+    perdidas: str = "una"
+) -> dict:
+    """
+    Agrega una tarea programada (efectiva de inmediato, sin reiniciar).
+
+    Args:
+        id_tarea: identificador (letras, números, '-' o '_')
+        cron: expresión de 5 campos o atajo (@daily, @hourly...)
+        zona: zona horaria IANA (ej. 'America/Lima'); None = hora local del servidor
+        motor: 'http' | 'playwright' | 'async' (None usa el por defecto)
+        solapamiento: 'saltar' | 'encolar' | 'fusionar'
+        perdidas: 'saltar' | 'una' | 'todas'
+
+    Raises:
+        ValueError: si ya existe o algún parámetro es inválido
+    """
+    tarea = _construir_tarea(id_tarea, cron, zona, motor, habilitada, solapamiento, perdidas)
+    _programar(tarea, datetime.now(timezone.utc))
+
+    with _condicion:
+        if id_tarea in _tareas:
+            raise ValueError(f"ya existe la tarea '{id_tarea}'")
+        _tareas[id_tarea] = tarea
+        _guardar_tareas()
+        _condicion.notify_all()
+
+    logger.info(f"📅 tarea '{id_tarea}' creada: '{tarea['cron']}' ({zona or 'hora local'})")
+    return _publica(tarea)
+
+
+def editar_tarea(
+    id_tarea: str,
+    cron: str = SIN_CAMBIO,
+    zona: str = SIN_CAMBIO,
+    motor: str = SIN_CAMBIO,
+    habilitada: bool = SIN_CAMBIO,
+    solapamiento: str = SIN_CAMBIO,
+    perdidas: str = SIN_CAMBIO
+):
+    """
+    Modifica los campos indicados de una tarea; los demás quedan igual
+    (SIN_CAMBIO). zona=None vuelve a la hora local y motor=None al motor por
+    defecto. Si cambia la programación, la próxima ejecución se calcula desde ahora.
+
+    Returns:
+        dict: la tarea actualizada
+        None: si no existe
+
+    Raises:
+        ValueError: si algún valor es inválido
+    """
+    cambios = {
+        campo: valor
+        for campo, valor in (
+            ("cron", cron),
+            ("zona", zona),
+            ("motor", motor),
+            ("habilitada", habilitada),
+            ("solapamiento", solapamiento),
+            ("perdidas", perdidas)
+        )
+        if valor is not SIN_CAMBIO
+    }
+
+    with _condicion:
+        actual = _tareas.get(id_tarea)
+        if actual is None:
+            return None
+
+        parametros = {campo: actual[campo] for campo in _CAMPOS_PERSISTIDOS if campo != "id"}
+        parametros.update(cambios)
+        tarea = _construir_tarea(id_tarea, **parametros)
+
+        #conserva el estado de ejecución de la tarea
+        for campo in ("en_ejecucion", "pendientes", "ejecuciones", "omitidas", "ultimo_estado", "ultimo_fin"):
+            tarea[campo] = actual[campo]
+
+        if {"cron", "zona", "habilitada"} & cambios.keys():
+            _programar(tarea, datetime.now(timezone.utc))
+        else:
+            tarea["proxima"] = actual["proxima"]
+
+        _tareas[id_tarea] = tarea
+        _guardar_tareas()
+        _condicion.notify_all()
+
+    logger.info(f"✏️  tarea '{id_tarea}' editada: {', '.join(cambios) or 'sin cambios'}")
+    return _publica(tarea)
+
+
+def eliminar_tarea(id_tarea: str) -> bool:
+    """
+    Quita una tarea (si está corriendo, la ejecución en curso termina igual).
+
+    Returns:
+        bool: False si no existía
+    """
+    with _condicion:
+        if _tareas.pop(id_tarea, None) is None:
+            return False
+        _guardar_tareas()
+        _condicion.notify_all()
+
+    logger.info(f"🗑️  tarea '{id_tarea}' eliminada")
+    return True
+
+
 def obtener_estado_scheduler():
-    """Retorna el estado actual del scheduler."""
-    proxima_ejecucion = str(schedule.next_run()) if schedule.jobs and _scheduler_enabled else "no programado (en pausa)"
-    
+    """Retorna el estado actual del scheduler y de sus tareas."""
+    tareas = listar_tareas()
+    proximas = [t["proxima"] for t in tareas if t["proxima"]]
+
+    if not _scheduler_enabled:
+        proxima_ejecucion = "no programado (en pausa)"
+    else:
+        #todas en UTC o con offset: se comparan como instantes
+        proxima_ejecucion = min(proximas, key=datetime.fromisoformat) if proximas else "sin tareas habilitadas"
+
     return {
         "activo": _scheduler_enabled,
         "thread_corriendo": _scheduler_thread.is_alive() if _scheduler_thread else False,
-        "proxima_ejecucion": proxima_ejecucion
-    }
\ No newline at end of file
+        "proxima_ejecucion": proxima_ejecucion,
+        "workers": SCHEDULER_WORKERS,
+        "tareas": tareas
+    }
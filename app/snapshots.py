@@ -0,0 +1,255 @@
+#snapshots.py
+
+import os
+import json
+import time
+import polars as pl
+from pathlib import Path
+from datetime import datetime
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+from app.processor import (
+    a_lazyframe,
+    construir_plan,
+    ordenar,
+    plan_fallos,
+    registrar_fallos,
+    hash_esquema,
+    VERSION_LIMPIEZA
+)
+from app.metrics import cronometrar, observar
+from app.profiler import span
+
+logger = configurar_logger('snapshots')
+
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", "cache/snapshots"))
+RUTA_SNAPSHOT = SNAPSHOT_DIR / "ultimo.parquet"
+RUTA_META = SNAPSHOT_DIR / "ultimo.json"
+
+#columnas limpias que definen el contenido de una fila
+COLUMNAS_LIMPIAS = ["pais", "continente", "region", "poblacion_2023", "poblacion_2024", "cambio_porcentual"]
+
+#columnas internas guardadas en el snapshot (no llegan al reporte)
+#  _hash_crudo: hash de la fila tal como vino del extractor
+#  _hash_fila: hash de la fila ya limpia
+COLUMNAS_INTERNAS = ["_hash_crudo", "_hash_fila"]
+
+
+def _hash_columnas(columnas) -> pl.Expr:
+    """Hash por fila de las columnas dadas (estable dentro de una misma versión de polars)."""
+    return pl.struct(columnas).hash()
+
+
+def cargar_snapshot():
+    """
+    Carga el último snapshot limpio guardado.
+
+    Returns:
+        tuple: (pl.DataFrame, meta) o (None, None) si no hay snapshot utilizable
+    """
+    if not RUTA_SNAPSHOT.exists() or not RUTA_META.exists():
+        return None, None
+
+    with open(RUTA_META, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    #los hashes de polars no son estables entre versiones
+    if meta.get("version_polars") != pl.__version__:
+        logger.warning("⚠️    snapshot creado con otra versión de polars, se ignora")
+        return None, None
+
+    #filas limpiadas con otras reglas: se reprocesa todo (incluida la fuente idéntica)
+    if meta.get("hash_esquema") != hash_esquema() or meta.get("version_limpieza") != VERSION_LIMPIEZA:
+        logger.warning("⚠️    snapshot creado con otro esquema o versión de limpieza, se ignora")
+        return None, None
+
+    return pl.read_parquet(RUTA_SNAPSHOT), meta
+
+
+def guardar_snapshot(df: pl.DataFrame, hash_fuente: str = None) -> dict:
+    """
+    Guarda el DataFrame limpio (con sus hashes por fila) como último snapshot.
+
+    Returns:
+        dict: metadatos guardados
+    """
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    temporal = ruta_temporal(RUTA_SNAPSHOT)
+    df.write_parquet(temporal)
+    temporal.replace(RUTA_SNAPSHOT)
+
+    meta = {
+        "fecha": datetime.now().isoformat(),
+        "filas": df.height,
+        "hash_fuente": hash_fuente,
+        "version_polars": pl.__version__,
+        "hash_esquema": hash_esquema(),
+        "version_limpieza": VERSION_LIMPIEZA
+    }
+    temporal = ruta_temporal(RUTA_META)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    temporal.replace(RUTA_META)
+
+    return meta
+
+
+def _unico_por_pais(df: pl.DataFrame, nombre: str) -> pl.DataFrame:
+    """Una fila por país (la primera, la de mayor población) para que el join no multiplique filas."""
+    unico = df.unique(subset="pais", keep="first", maintain_order=True)
+    if unico.height != df.height:
+        logger.warning(f"⚠️    snapshot {nombre}: {df.height - unico.height} filas con país repetido, se compara la primera")
+    return unico
+
+
+def calcular_diff(anterior: pl.DataFrame, actual: pl.DataFrame, meta_anterior: dict = None) -> dict:
+    """
+    Diferencias por país entre dos snapshots limpios (con columna _hash_fila).
+
+    Returns:
+        dict: {
+            fecha_anterior, agregados: [pais], eliminados: [pais],
+            cambiados: [{pais, poblacion_2024_anterior, poblacion_2024,
+                         cambio_porcentual_anterior, cambio_porcentual}],
+            total_cambios, sin_cambios, primera_ejecucion
+        }
+    """
+    if anterior is None:
+        return {
+            "fecha_anterior": None,
+            "agregados": [],
+            "eliminados": [],
+            "cambiados": [],
+            "total_cambios": 0,
+            "sin_cambios": False,
+            "primera_ejecucion": True
+        }
+
+    columnas = ["pais", "poblacion_2024", "cambio_porcentual", "_hash_fila"]
+    unidos = _unico_por_pais(actual.select(columnas), "actual").join(
+        _unico_por_pais(anterior.select(columnas), "anterior"),
+        on="pais",
+        how="full",
+        suffix="_anterior",
+        coalesce=True
+    )
+
+    agregados = unidos.filter(pl.col("_hash_fila_anterior").is_null())["pais"].to_list()
+    eliminados = unidos.filter(pl.col("_hash_fila").is_null())["pais"].to_list()
+    cambiados = (
+        unidos
+        .filter(
+            pl.col("_hash_fila").is_not_null()
+            & pl.col("_hash_fila_anterior").is_not_null()
+            & (pl.col("_hash_fila") != pl.col("_hash_fila_anterior"))
+        )
+        .sort("poblacion_2024", descending=True)
+        .select([
+            "pais",
+            "poblacion_2024_anterior",
+            "poblacion_2024",
+            "cambio_porcentual_anterior",
+            "cambio_porcentual"
+        ])
+        .to_dicts()
+    )
+
+    total = len(agregados) + len(eliminados) + len(cambiados)
+    return {
+        "fecha_anterior": meta_anterior.get("fecha") if meta_anterior else None,
+        "agregados": agregados,
+        "eliminados": eliminados,
+        "cambiados": cambiados,
+        "total_cambios": total,
+        "sin_cambios": total == 0,
+        "primera_ejecucion": False
+    }
+
+
+@cronometrar("etapa_duracion_segundos", etapa="procesamiento")
+def procesar_incremental(datos_crudos, hash_fuente: str = None):
+    """
+    Procesa los datos crudos reutilizando el snapshot anterior: solo las filas
+    crudas nuevas o modificadas pasan por el plan de limpieza.
+
+    Args:
+        datos_crudos: mismo formato que acepta processor.a_lazyframe
+        hash_fuente: hash del html de origen; si coincide con el del snapshot
+            se reutiliza tal cual sin procesar nada
+
+    Returns:
+        tuple: (pl.DataFrame limpio, diff) o (None, None) si hay error crítico
+    """
+    try:
+        logger.info("=" * 60)
+        logger.info("PROCESAMIENTO INCREMENTAL")
+        logger.info("=" * 60)
+        inicio = time.time()
+
+        anterior, meta_anterior = cargar_snapshot()
+
+        #día sin cambios: misma fuente que el snapshot, nada que recalcular
+        if anterior is not None and hash_fuente and meta_anterior.get("hash_fuente") == hash_fuente:
+            logger.info(f"📦 fuente idéntica al snapshot del {meta_anterior['fecha']}: sin recalcular")
+            #nada pasó por el plan: que obtener_fallos_parseo no muestre la corrida anterior
+            registrar_fallos({"filas": 0})
+            diff = calcular_diff(anterior, anterior, meta_anterior)
+            return anterior.drop(COLUMNAS_INTERNAS), diff
+
+        if datos_crudos is None or (isinstance(datos_crudos, (list, dict)) and not datos_crudos):
+            logger.error("❌ datos crudos está vacío o es None")
+            return None, None
+
+        crudo = a_lazyframe(datos_crudos).with_columns(
+            _hash_columnas(pl.all()).alias("_hash_crudo")
+        ).collect()
+
+        if anterior is not None:
+            reutilizadas = anterior.join(crudo.select("_hash_crudo"), on="_hash_crudo", how="semi")
+            pendientes = crudo.join(anterior.select("_hash_crudo"), on="_hash_crudo", how="anti")
+        else:
+            reutilizadas = None
+            pendientes = crudo
+
+        logger.info(f"  filas crudas: {crudo.height}")
+        logger.info(f"  - reutilizadas del snapshot: {reutilizadas.height if reutilizadas is not None else 0}")
+        logger.info(f"  - a procesar (nuevas o modificadas): {pendientes.height}")
+
+        #limpieza y conteo de fallos de parseo comparten el escaneo
+        with span("plan_polars"):
+            nuevas, fallos = pl.collect_all([
+                construir_plan(pendientes.lazy(), conservar=["_hash_crudo"]),
+                plan_fallos(pendientes.lazy())
+            ])
+        registrar_fallos(fallos.to_dicts()[0])
+        observar("filas_descartadas", pendientes.height - nuevas.height)
+        partes = [nuevas] if reutilizadas is None else [reutilizadas.select(nuevas.columns), nuevas]
+
+        df = (
+            ordenar(pl.concat(partes))
+            .with_columns(_hash_columnas(COLUMNAS_LIMPIAS).alias("_hash_fila"))
+        )
+
+        if df.height == 0:
+            logger.error("❌    Crítico: no quedaron registros válidos después de la limpieza")
+            return None, None
+
+        diff = calcular_diff(anterior, df, meta_anterior)
+        with span("snapshot_guardar"):
+            guardar_snapshot(df, hash_fuente)
+
+        logger.info(f"  cambios desde el último snapshot: {diff['total_cambios']} "
+                    f"(+{len(diff['agregados'])} / -{len(diff['eliminados'])} / ~{len(diff['cambiados'])})")
+        logger.info(f"  duración: {time.time() - inicio:.3f} segundos")
+        logger.info("=" * 60)
+
+        return df.drop(COLUMNAS_INTERNAS), diff
+
+    except Exception as e:
+        logger.error("=" * 60)
+        logger.error("❌ ERROR EN PROCESAMIENTO INCREMENTAL")
+        logger.error(f"     tipo: {type(e).__name__}")
+        logger.error(f"     detalle: {str(e)}")
+        logger.error("=" * 60)
+        return None, None
@@ -0,0 +1,214 @@
+#source_cache.py
+
+import os
+import json
+import time
+import hashlib
+import requests
+from pathlib import Path
+from datetime import datetime
+from app.logger import configurar_logger
+from app.archivos import ruta_temporal
+
+logger = configurar_logger('source_cache')
+
+#configuración (sobrescribible por variables de entorno)
+CACHE_DIR = Path(os.getenv("SOURCE_CACHE_DIR", "cache/fuente"))
+CACHE_TTL_SEG = float(os.getenv("SOURCE_CACHE_TTL", str(6 * 3600)))
+CACHE_OFFLINE = os.getenv("SOURCE_CACHE_OFFLINE", "0") == "1"
+
+HTTP_HEADERS = {"User-Agent": "report-automation/1.0 (reporte de población mundial)"}
+HTTP_TIMEOUT_SEG = 30
+
+
+def _clave(url: str) -> str:
+    """Nombre de archivo estable para una url."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _rutas(url: str) -> tuple:
+    """Rutas de (html, metadatos, filas parseadas) para una url."""
+    clave = _clave(url)
+    return (
+        CACHE_DIR / f"{clave}.html",
+        CACHE_DIR / f"{clave}.json",
+        CACHE_DIR / f"{clave}.filas.json"
+    )
+
+
+def _leer_meta(url: str):
+    """Carga los metadatos guardados de una url, o None si no hay caché."""
+    ruta_html, ruta_meta, _ = _rutas(url)
+    if not ruta_meta.exists() or not ruta_html.exists():
+        return None
+
+    with open(ruta_meta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _guardar_meta(url: str, meta: dict):
+    """Escribe metadatos de forma atómica (archivo temporal + rename)."""
+    _, ruta_meta, _ = _rutas(url)
+    temporal = ruta_temporal(ruta_meta)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    temporal.replace(ruta_meta)
+
+
+def _guardar_contenido(url: str, contenido: bytes, etag: str = None, last_modified: str = None) -> dict:
+    """Guarda el html y sus validadores; retorna los metadatos nuevos."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    ruta_html, _, _ = _rutas(url)
+
+    temporal = ruta_temporal(ruta_html)
+    temporal.write_bytes(contenido)
+    temporal.replace(ruta_html)
+
+    ahora = time.time()
+    meta = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "hash": hashlib.sha256(contenido).hexdigest(),
+        "bytes": len(contenido),
+        "descargado": ahora,
+        "validado": ahora,
+        "descargado_iso": datetime.fromtimestamp(ahora).isoformat()
+    }
+    _guardar_meta(url, meta)
+    return meta
+
+
+def leer_contenido(url: str):
+    """
+    Retorna el html cacheado de una url.
+
+    Returns:
+        bytes: contenido guardado
+        None: si no hay caché
+    """
+    ruta_html, _, _ = _rutas(url)
+    return ruta_html.read_bytes() if ruta_html.exists() else None
+
+
+def obtener_fuente(url: str, ttl_seg: float = None, offline: bool = None):
+    """
+    Obtiene el html de una url pasando por la caché en disco.
+
+    - dentro del TTL: no toca la red
+    - fuera del TTL: GET condicional (If-None-Match / If-Modified-Since)
+    - sin red o en modo offline: sirve la copia guardada
+
+    Args:
+        url: página a descargar
+        ttl_seg: segundos en que la copia se considera fresca (por defecto SOURCE_CACHE_TTL)
+        offline: no usar la red (por defecto SOURCE_CACHE_OFFLINE)
+
+    Returns:
+        dict: {hash, cambiado, origen, contenido}; 'contenido' es None cuando
+            no hizo falta leerlo (usar leer_contenido si se necesita)
+        None: si no hay red ni copia en caché
+    """
+    ttl_seg = CACHE_TTL_SEG if ttl_seg is None else ttl_seg
+    offline = CACHE_OFFLINE if offline is None else offline
+    meta = _leer_meta(url)
+
+    if offline:
+        if meta is None:
+            logger.error(f"❌ modo offline sin copia en caché para: {url}")
+            return None
+        logger.info("📦 modo offline: usando copia en caché")
+        return {"hash": meta["hash"], "cambiado": False, "origen": "offline", "contenido": None}
+
+    if meta is not None and time.time() - meta["validado"] < ttl_seg:
+        edad = time.time() - meta["validado"]
+        logger.info(f"📦 fuente en caché fresca (edad {edad:.0f}s < TTL {ttl_seg:.0f}s)")
+        return {"hash": meta["hash"], "cambiado": False, "origen": "cache", "contenido": None}
+
+    headers = dict(HTTP_HEADERS)
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        logger.info(f"descargando (http): {url}")
+        respuesta = requests.get(url, headers=headers, timeout=HTTP_TIMEOUT_SEG)
+
+        if respuesta.status_code == 304 and meta is not None:
+            logger.info("📦 fuente sin cambios (304 Not Modified)")
+            meta["validado"] = time.time()
+            _guardar_meta(url, meta)
+            return {"hash": meta["hash"], "cambiado": False, "origen": "304", "contenido": None}
+
+        respuesta.raise_for_status()
+
+    except Exception as e:
+        if meta is None:
+            raise
+        logger.warning(f"⚠️    red no disponible ({type(e).__name__}), usando copia en caché")
+        return {"hash": meta["hash"], "cambiado": False, "origen": "offline", "contenido": None}
+
+    contenido = respuesta.content
+    logger.info(f"  descargados {len(contenido) / 1024:.1f} KB")
+
+    hash_anterior = meta["hash"] if meta else None
+    meta_nueva = _guardar_contenido(
+        url,
+        contenido,
+        etag=respuesta.headers.get("ETag"),
+        last_modified=respuesta.headers.get("Last-Modified")
+    )
+    cambiado = meta_nueva["hash"] != hash_anterior
+
+    if not cambiado:
+        logger.info("📦 contenido descargado idéntico al guardado (mismo hash)")
+
+    return {"hash": meta_nueva["hash"], "cambiado": cambiado, "origen": "red", "contenido": contenido}
+
+
+def leer_filas(url: str, hash_fuente: str):
+    """
+    Retorna las filas ya parseadas para una versión concreta de la fuente.
+
+    Returns:
+        list[dict]: filas guardadas
+        None: si no hay filas para ese hash
+    """
+    _, _, ruta_filas = _rutas(url)
+    if not ruta_filas.exists():
+        return None
+
+    with open(ruta_filas, 'r', encoding='utf-8') as f:
+        guardado = json.load(f)
+
+    return guardado["filas"] if guardado.get("hash") == hash_fuente else None
+
+
+def guardar_filas(url: str, hash_fuente: str, filas: list):
+    """Guarda las filas parseadas asociadas al hash de la fuente."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _, _, ruta_filas = _rutas(url)
+
+    temporal = ruta_temporal(ruta_filas)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({"hash": hash_fuente, "filas": filas}, f, ensure_ascii=False)
+    temporal.replace(ruta_filas)
+
+
+def importar_fixture(ruta_html: str, url: str) -> dict:
+    """
+    Carga un html local como copia en caché de una url (para correr sin red).
+
+    Args:
+        ruta_html: archivo html a importar
+        url: url a la que se asocia
+
+    Returns:
+        dict: metadatos guardados
+    """
+    contenido = Path(ruta_html).read_bytes()
+    meta = _guardar_contenido(url, contenido)
+    logger.info(f"📦 fixture importado para {url} ({len(contenido) / 1024:.1f} KB)")
+    return meta
@@ -0,0 +1,24 @@
+#conftest.py
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def directorio_temporal(tmp_path, monkeypatch):
+    """Cada test corre en un directorio vacío (cache/, outputs/ y logs/ son rutas relativas)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def trabajos_limpios():
+    """Cola de trabajos vacía al terminar el test (el pool es global del proceso)."""
+    from app import jobs
+
+    yield
+    jobs.detener_trabajos()
+    jobs._trabajos.clear()
+    jobs._en_curso.clear()
+    jobs._terminados.clear()
+    jobs._listos.clear()
+    jobs._reportes.clear()
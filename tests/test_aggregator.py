@@ -0,0 +1,67 @@
+#test_aggregator.py
+
+import math
+import polars as pl
+import pytest
+from app import aggregator
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia(monkeypatch):
+    monkeypatch.setattr(aggregator, "_cache", {})
+    monkeypatch.setattr(aggregator, "_ultima_clave", None)
+
+
+@pytest.fixture
+def df():
+    return pl.DataFrame({
+        "pais": ["China", "India", "Japón", "Perú", "Chile", "Francia"],
+        "continente": ["Asia", "Asia", "Asia", "América", "América", "Europa"],
+        "region": ["Este", "Sur", "Este", "Sudamérica", "Sudamérica", "Oeste"],
+        "poblacion_2024": [1_400, 1_450, 124, 34, 19, 68],
+        "cambio_porcentual": [-0.1, 0.9, -0.5, 1.0, 0.4, None]
+    })
+
+
+def test_agregados_por_nivel(df):
+    agregados = aggregator.calcular_agregados(df, top_n=2)
+
+    assert agregados["global"]["poblacion_total"] == 3_095
+    assert agregados["global"]["paises"] == 6
+    assert agregados["global"]["top"] == ["India", "China"]
+
+    asia = next(c for c in agregados["continentes"] if c["continente"] == "Asia")
+    assert asia["paises"] == 3
+    assert asia["top"] == ["India", "China"]
+    assert {r["region"] for r in agregados["regiones"]} == {"Este", "Sur", "Sudamérica", "Oeste"}
+
+
+def test_cambio_ponderado_ignora_nulos(df):
+    continentes = {c["continente"]: c for c in aggregator.calcular_agregados(df)["continentes"]}
+
+    #Europa no tiene ningún cambio informado
+    assert continentes["Europa"]["cambio_ponderado"] is None or math.isnan(continentes["Europa"]["cambio_ponderado"])
+    america = continentes["América"]
+    assert america["cambio_ponderado"] == pytest.approx((1.0 * 34 + 0.4 * 19) / 53)
+
+
+def test_top_n_es_parte_de_la_clave(df):
+    por_defecto = aggregator.obtener_agregados(df)
+    top_3 = aggregator.obtener_agregados(df, top_n=3)
+
+    assert len(por_defecto["global"]["top"]) == 5
+    assert len(top_3["global"]["top"]) == 3
+    assert len(list(aggregator.AGREGADOS_DIR.glob("*.json"))) == 2
+
+
+def test_cache_en_memoria_y_disco(df, monkeypatch):
+    primera = aggregator.obtener_agregados(df, top_n=2)
+    assert aggregator.obtener_agregados(df, top_n=2) is primera
+
+    #sin memoria, se lee del disco sin recalcular
+    monkeypatch.setattr(aggregator, "_cache", {})
+    monkeypatch.setattr(aggregator, "calcular_agregados", lambda *a, **k: pytest.fail("recalculó"))
+    desde_disco = aggregator.obtener_agregados(df, top_n=2)
+
+    assert desde_disco["global"]["top"] == primera["global"]["top"]
+    assert aggregator.obtener_ultimos_agregados() is desde_disco
@@ -0,0 +1,54 @@
+#test_browser_pool.py
+
+import time
+import pytest
+from app import browser_pool
+
+
+@pytest.fixture(autouse=True)
+def pool_limpio():
+    yield
+    browser_pool.detener_pool(timeout=1)
+
+
+def _esperar(condicion, limite: float = 2):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condicion()
+
+
+def test_pool_sin_navegadores_se_desactiva_y_limpia(monkeypatch):
+    #playwright no arranca en ningún hilo
+    monkeypatch.setattr(browser_pool, "_trabajador", lambda indice, max_usos: browser_pool._retirar_trabajador(indice))
+
+    browser_pool.iniciar_pool(tamaño=2)
+
+    assert _esperar(lambda: not browser_pool.pool_activo())
+    assert browser_pool._trabajadores == []
+    with pytest.raises(RuntimeError):
+        browser_pool.ejecutar_con_pagina(lambda page: None, timeout=1)
+
+    browser_pool.detener_pool()
+    assert browser_pool._cola_tareas.empty()
+
+
+def test_detener_no_deja_cierres_sobrantes(monkeypatch):
+    #uno de los dos hilos muere al iniciar; el otro atiende la cola hasta el None
+    def trabajador(indice, max_usos):
+        if indice == 0:
+            browser_pool._retirar_trabajador(indice)
+            return
+        while browser_pool._cola_tareas.get() is not None:
+            pass
+
+    monkeypatch.setattr(browser_pool, "_trabajador", trabajador)
+
+    browser_pool.iniciar_pool(tamaño=2)
+    assert browser_pool.pool_activo()
+
+    browser_pool.detener_pool(timeout=1)
+
+    assert not browser_pool.pool_activo()
+    assert browser_pool._trabajadores == []
+    assert browser_pool._cola_tareas.empty()
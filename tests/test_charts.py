@@ -0,0 +1,42 @@
+#test_charts.py
+
+import os
+import time
+import polars as pl
+from app import charts
+
+
+def _df():
+    return pl.DataFrame({"pais": ["A", "B"], "poblacion_2024": [20, 10], "cambio_porcentual": [1.0, -0.5]})
+
+
+AGREGADOS = {"continentes": [{"continente": "Asia", "poblacion_total": 30}]}
+
+
+def test_render_local_que_falla_omite_el_grafico(monkeypatch):
+    def sin_pool():
+        raise RuntimeError("sin procesos")
+
+    def render_roto(tipo, datos):
+        if tipo == "top":
+            raise ValueError("matplotlib roto")
+        return b"png"
+
+    monkeypatch.setattr(charts, "_obtener_pool", sin_pool)
+    monkeypatch.setattr(charts, "_renderizar", render_roto)
+
+    graficos = charts.recolectar_graficos(charts.enviar_graficos(_df(), AGREGADOS))
+
+    assert sorted(graficos) == ["continentes", "crecimiento"]
+
+
+def test_podar_por_edad_y_por_tamaño():
+    charts.GRAFICOS_DIR.mkdir(parents=True)
+    ahora = time.time()
+    for nombre, edad_dias in (("viejo", 40), ("medio", 2), ("nuevo", 1)):
+        ruta = charts.GRAFICOS_DIR / f"{nombre}.png"
+        ruta.write_bytes(b"x" * 100)
+        os.utime(ruta, (ahora - edad_dias * 86400, ahora - edad_dias * 86400))
+
+    assert charts.podar_graficos(max_bytes=150) == 2
+    assert [ruta.name for ruta in charts.GRAFICOS_DIR.glob("*.png")] == ["nuevo.png"]
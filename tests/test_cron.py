@@ -0,0 +1,76 @@
+#test_cron.py
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import pytest
+from app.cron import Cron, obtener_zona
+
+NUEVA_YORK = ZoneInfo("America/New_York")
+
+
+def _local(*args, fold: int = 0) -> datetime:
+    return datetime(*args, tzinfo=NUEVA_YORK, fold=fold)
+
+
+def test_hora_inexistente_se_corre_hacia_adelante():
+    #2026-03-08: de 02:00 se salta a 03:00
+    siguiente = Cron("30 2 * * *").siguiente(_local(2026, 3, 8, 0, 0), NUEVA_YORK)
+
+    assert siguiente == _local(2026, 3, 8, 3, 30)
+    assert siguiente.utcoffset() == timedelta(hours=-4)
+
+
+def test_hora_repetida_corre_una_sola_vez():
+    #2026-11-01: 01:00-01:59 ocurre dos veces (EDT y luego EST)
+    cron = Cron("30 1 * * *")
+    primera = cron.siguiente(_local(2026, 11, 1, 0, 0), NUEVA_YORK)
+    segunda = cron.siguiente(primera, NUEVA_YORK)
+
+    assert primera == _local(2026, 11, 1, 1, 30)
+    assert primera.utcoffset() == timedelta(hours=-4)
+    assert segunda == _local(2026, 11, 2, 1, 30)
+
+
+def test_horario_diario_sigue_el_cambio_de_hora():
+    cron = Cron("0 8 * * *")
+    invierno = cron.siguiente(_local(2026, 1, 10, 9, 0), NUEVA_YORK)
+    verano = cron.siguiente(_local(2026, 7, 10, 9, 0), NUEVA_YORK)
+
+    assert (invierno.hour, verano.hour) == (8, 8)
+    assert invierno.utcoffset() != verano.utcoffset()
+
+
+def test_dia_del_mes_o_dia_de_la_semana():
+    #ambos restringidos: basta con uno (día 15 o lunes)
+    cron = Cron("0 0 15 * mon")
+    utc = ZoneInfo("UTC")
+
+    assert cron.siguiente(datetime(2026, 2, 1, tzinfo=utc), utc).day == 2      #lunes
+    assert cron.siguiente(datetime(2026, 2, 9, tzinfo=utc), utc).day == 15     #domingo 15
+    assert cron.siguiente(datetime(2026, 2, 15, tzinfo=utc), utc).day == 16    #lunes
+
+
+def test_dia_libre_exige_el_otro_campo():
+    utc = ZoneInfo("UTC")
+
+    assert Cron("0 0 * * 1").siguiente(datetime(2026, 2, 3, tzinfo=utc), utc).day == 9
+    assert Cron("0 0 15 * *").siguiente(datetime(2026, 2, 3, tzinfo=utc), utc).day == 15
+
+
+@pytest.mark.parametrize("expresion", ["* * *", "60 * * * *", "0 0 30 2 *", "*/0 * * * *"])
+def test_expresiones_invalidas(expresion):
+    with pytest.raises(ValueError):
+        Cron(expresion).siguiente(datetime(2026, 1, 1, tzinfo=ZoneInfo("UTC")), ZoneInfo("UTC"))
+
+
+def test_zona_local_desde_tz(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    zona = obtener_zona(None)
+
+    assert datetime(2026, 1, 1, tzinfo=zona).utcoffset() == timedelta(hours=-5)
+    assert datetime(2026, 7, 1, tzinfo=zona).utcoffset() == timedelta(hours=-4)
+
+
+def test_zona_desconocida():
+    with pytest.raises(ValueError):
+        obtener_zona("Marte/Olympus")
@@ -0,0 +1,46 @@
+#test_dataset_store.py
+
+from threading import Thread
+import polars as pl
+from app import dataset_store
+
+
+def test_ejecuciones_simultaneas_no_se_pisan():
+    df = pl.DataFrame({"pais": ["Perú"], "poblacion_2024": [34_000_000]})
+    hilos = [Thread(target=dataset_store.guardar_en_dataset, args=(df, "mismo")) for _ in range(4)]
+
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    catalogo = dataset_store.obtener_catalogo()
+    assert len({entrada["ruta"] for entrada in catalogo}) == 4
+    assert sorted(e["run_id"] for e in catalogo) == ["mismo", "mismo_2", "mismo_3", "mismo_4"]
+    assert not list(dataset_store.DATASET_DIR.rglob("*.tmp"))
+    assert dataset_store.escanear_dataset().collect().height == 4
+
+
+def test_pipeline_guarda_con_su_run_id(monkeypatch):
+    from app import scheduler, extractor, aggregator
+
+    iniciadas = []
+    fila = {
+        "pais": "Perú",
+        "poblacion_2023": "34,000,000",
+        "poblacion_2024": "34,500,000",
+        "cambio_porcentual": "+1.0%",
+        "continente": "América",
+        "region": "Sudamérica"
+    }
+
+    def agregados_rotos(df):
+        raise RuntimeError("cortar el pipeline después del dataset")
+
+    monkeypatch.setattr(extractor, "extraer_tabla_completa", lambda motor=None: [fila])
+    monkeypatch.setattr(aggregator, "obtener_agregados", agregados_rotos)
+    monkeypatch.setattr(scheduler, "registrar_inicio_ejecucion", lambda run_id: iniciadas.append(run_id))
+
+    scheduler.ejecutar_pipeline()
+
+    assert [entrada["run_id"] for entrada in dataset_store.obtener_catalogo()] == iniciadas
@@ -0,0 +1,62 @@
+#test_exporter.py
+
+import io
+import json
+import polars as pl
+from app import exporter
+from app.dataset_store import guardar_en_dataset
+from app.snapshots import COLUMNAS_LIMPIAS
+
+
+def _entrada(filas: int) -> dict:
+    df = pl.DataFrame({
+        "pais": [f"país {i}" for i in range(filas)],
+        "continente": ["Asia"] * filas,
+        "region": ["Asia oriental"] * filas,
+        "poblacion_2023": list(range(filas)),
+        "poblacion_2024": list(range(filas)),
+        "cambio_porcentual": [0.5] * filas
+    }, schema_overrides={"poblacion_2023": pl.Int64, "poblacion_2024": pl.Int64})
+    guardar_en_dataset(df, run_id="prueba")
+    return exporter.obtener_ultima_ejecucion()
+
+
+def test_csv_por_bloques_un_solo_encabezado():
+    bloques = list(exporter.transmitir_csv(_entrada(25), filas_por_bloque=10))
+    df = pl.read_csv(io.BytesIO(b"".join(bloques)))
+
+    assert len(bloques) == 3
+    assert df.columns == COLUMNAS_LIMPIAS
+    assert df["pais"].to_list() == [f"país {i}" for i in range(25)]
+
+
+def test_csv_vacio_solo_encabezado():
+    contenido = b"".join(exporter.transmitir_csv(_entrada(0)))
+
+    assert contenido.decode("utf-8").strip() == ",".join(COLUMNAS_LIMPIAS)
+
+
+def test_ndjson_por_bloques():
+    bloques = list(exporter.transmitir_ndjson(_entrada(25), filas_por_bloque=10))
+    lineas = b"".join(bloques).decode("utf-8").splitlines()
+
+    assert len(bloques) == 3
+    assert [json.loads(linea)["poblacion_2024"] for linea in lineas] == list(range(25))
+
+
+def test_if_none_match():
+    etag = '"abc"'
+
+    assert exporter.coincide_etag('"abc"', etag)
+    assert exporter.coincide_etag('"x", W/"abc"', etag)
+    assert exporter.coincide_etag("*", etag)
+    assert not exporter.coincide_etag('"x", "y"', etag)
+    assert not exporter.coincide_etag(None, etag)
+
+
+def test_etag_debil_para_formatos_reescritos():
+    entrada = _entrada(1)
+
+    assert exporter.etag_exportacion(entrada, "csv").startswith('"')
+    assert exporter.etag_exportacion(entrada, "xlsx").startswith('W/"')
+    assert exporter.coincide_etag(exporter.etag_exportacion(entrada, "xlsx"), exporter.etag_exportacion(entrada, "xlsx"))
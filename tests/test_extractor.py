@@ -0,0 +1,86 @@
+#test_extractor.py
+
+import os
+import pytest
+from app import extractor
+
+
+def test_perfil_ligero_no_bloquea_estilos():
+    #innerText depende del css: sin estilos cambia el texto de las celdas
+    assert "stylesheet" not in extractor.PERFILES_CARGA["ligero"]["bloquear"]
+
+
+def test_comparar_filas():
+    a = [{"pais": "Perú", "poblacion_2024": "34,000,000"}, {"pais": "Chile"}]
+    b = [{"pais": "Perú", "poblacion_2024": "34,000,000[a]"}, {"pais": "Chile"}]
+
+    assert extractor._comparar_filas(a, a) == []
+    assert extractor._comparar_filas(a, b) == [{"fila": 0, "a": a[0], "b": b[0]}]
+
+
+@pytest.mark.skipif(
+    os.getenv("EXTRACTOR_TEST_NAVEGADOR") != "1",
+    reason="requiere chromium y acceso a wikipedia (EXTRACTOR_TEST_NAVEGADOR=1)"
+)
+def test_perfil_ligero_extrae_lo_mismo_que_completo():
+    resultado = extractor.comparar_perfiles_carga("ligero", usar_pool=False)
+
+    assert resultado["filas_perfil"] > 0
+    assert resultado["iguales"], resultado["diferencias"]
+
+
+def test_motor_async_usa_el_extractor_multifuente(monkeypatch):
+    from app import async_extractor
+
+    llamadas = []
+
+    def extraer_fuentes(fuentes, **kwargs):
+        llamadas.append((fuentes, kwargs))
+        return {"poblacion_onu": {"estado": "EXITOSO", "datos": [{"pais": "Perú"}], "filas_invalidas": 1, "error": None}}
+
+    monkeypatch.setattr(async_extractor, "extraer_fuentes", extraer_fuentes)
+
+    assert extractor.extraer_tabla_completa(motor="async") == [{"pais": "Perú"}]
+    assert llamadas[0][0] == [async_extractor.FUENTE_POBLACION_ONU]
+
+
+def test_fuente_incompleta_es_invalida():
+    from app.async_extractor import _validar_fuente
+
+    with pytest.raises(ValueError, match="selector"):
+        _validar_fuente({"nombre": "x", "url": "https://ejemplo.org", "columnas": {"pais": 0}})
+
+
+def test_parsear_html_sin_red():
+    from pathlib import Path
+
+    contenido = (Path(__file__).parent / "fixtures" / "tabla_poblacion.html").read_bytes()
+    datos, errores = extractor.parsear_html(contenido)
+
+    assert errores == 0
+    assert [fila["pais"] for fila in datos] == ["India[a]", "Perú"]
+    assert datos[1] == {
+        "pais": "Perú",
+        "poblacion_2023": "34,352,719",
+        "poblacion_2024": "34,683,444",
+        "cambio_porcentual": "−1.0%",
+        "continente": "América",
+        "region": "Sudamérica"
+    }
+
+
+def test_motor_o_perfil_desconocido_es_error():
+    with pytest.raises(ValueError, match="motor"):
+        extractor.extraer_tabla_completa(motor="curl")
+    with pytest.raises(ValueError, match="perfil"):
+        extractor.extraer_tabla_completa(motor="http", perfil="turbo")
+
+
+def test_api_rechaza_motor_desconocido(trabajos_limpios):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    cliente = TestClient(app)
+
+    assert cliente.post("/trabajos", params={"motor": "curl"}).status_code == 400
+    assert cliente.get("/generar-reporte", params={"motor": "curl"}).status_code == 400
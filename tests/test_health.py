@@ -0,0 +1,47 @@
+#test_health.py
+
+import pytest
+from app import health, scheduler
+
+
+@pytest.fixture(autouse=True)
+def estado_limpio(monkeypatch):
+    monkeypatch.setattr(health, "_ultima_ejecucion", None)
+    monkeypatch.setattr(health, "_ultimo_exito", None)
+    monkeypatch.setattr(health, "_ejecuciones_en_curso", {})
+
+
+def test_historial_y_ejecucion_en_vivo_con_la_misma_forma():
+    fila_historial = {
+        "id": 7,
+        "timestamp": "2026-01-01T08:00:00",
+        "estado": "EXITOSO",
+        "duracion_segundos": 12.5,
+        "error": None,
+        "perfil": None,
+        "run_id": "abc"
+    }
+    health.cargar_ultimas_ejecuciones(fila_historial, fila_historial)
+    cargada = health._ultima_ejecucion
+
+    health.registrar_inicio_ejecucion("def")
+    health.registrar_fin_ejecucion("def", "FALLIDO", 3.0, "sin datos")
+
+    assert set(cargada) == set(health._ultima_ejecucion) == set(health.CAMPOS_EJECUCION)
+    assert cargada["run_id"] == "abc"
+    assert health._ultimo_exito["run_id"] == "abc"
+    assert health._ultima_ejecucion["estado"] == "FALLIDO"
+
+
+def test_pipeline_registra_inicio_y_fin(monkeypatch):
+    from app import extractor
+
+    en_curso = []
+    monkeypatch.setattr(extractor, "extraer_tabla_completa", lambda motor=None: en_curso.append(dict(health._ejecuciones_en_curso)))
+
+    scheduler.ejecutar_pipeline()
+
+    assert len(en_curso[0]) == 1
+    assert health._ejecuciones_en_curso == {}
+    assert health._ultima_ejecucion["estado"] == "FALLIDO"
+    assert health._ultima_ejecucion["run_id"] in en_curso[0]
@@ -0,0 +1,167 @@
+#test_jobs.py
+
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Event, Thread
+import pytest
+from fastapi.testclient import TestClient
+from app import jobs
+from app.main import app
+
+
+pytestmark = pytest.mark.usefixtures("trabajos_limpios")
+
+
+def _pipeline_falso(llamadas: list, liberar: Event = None, ruta: str = "outputs/reporte.docx", guardado: Event = None):
+    def ejecutar_pipeline(motor=None, al_cambiar_etapa=None, perfilar=None, cprofile=None, persistir=True, al_generar=None):
+        llamadas.append(motor)
+        if liberar is not None:
+            liberar.wait(5)
+        if ruta is None:
+            return None
+        if al_generar:
+            al_generar(Path(ruta).name, b"docx")
+        if not persistir:
+            return Path(ruta).name
+        if guardado is not None:
+            guardado.wait(5)
+        Path(ruta).parent.mkdir(exist_ok=True)
+        Path(ruta).write_bytes(b"docx")
+        return ruta
+    return ejecutar_pipeline
+
+
+def test_generar_reporte_pasa_por_la_cola(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso(llamadas))
+
+    respuesta = TestClient(app).get("/generar-reporte", params={"fresco": True})
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == b"docx"
+    assert respuesta.headers["X-Reporte-Trabajo"] in jobs._trabajos
+    assert llamadas == [None]
+
+
+def test_solicitudes_simultaneas_comparten_trabajo(monkeypatch):
+    llamadas = []
+    liberar = Event()
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso(llamadas, liberar))
+    cliente = TestClient(app)
+    respuestas = []
+
+    hilos = [
+        Thread(target=lambda: respuestas.append(cliente.get("/generar-reporte", params={"fresco": True})))
+        for _ in range(3)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(0.3)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join()
+
+    assert llamadas == [None]
+    assert [r.status_code for r in respuestas] == [200, 200, 200]
+    assert len({r.headers["X-Reporte-Trabajo"] for r in respuestas}) == 1
+
+
+def test_trabajo_fallido_y_espera_vencida(monkeypatch):
+    liberar = Event()
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso([], liberar, ruta=None))
+    cliente = TestClient(app)
+
+    pendiente = cliente.get("/generar-reporte", params={"fresco": True, "esperar_seg": 0.05})
+    assert pendiente.status_code == 202
+
+    liberar.set()
+    jobs.esperar_trabajo(pendiente.json()["id"], timeout=5)
+    assert cliente.get(f"/trabajos/{pendiente.json()['id']}").json()["estado"] == jobs.FALLIDO
+
+    fallido = cliente.get("/generar-reporte", params={"fresco": True})
+    assert fallido.status_code == 500
+
+
+def test_reporte_se_responde_antes_de_guardarse(monkeypatch):
+    guardado = Event()
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso([], guardado=guardado))
+    cliente = TestClient(app)
+
+    respuesta = cliente.get("/generar-reporte", params={"fresco": True})
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == b"docx"
+    assert "reporte.docx" in respuesta.headers["Content-Disposition"]
+    assert not Path("outputs/reporte.docx").exists()
+
+    guardado.set()
+    id_trabajo = respuesta.headers["X-Reporte-Trabajo"]
+    assert jobs.esperar_trabajo(id_trabajo, timeout=5)["ruta"] == "outputs/reporte.docx"
+    assert Path("outputs/reporte.docx").read_bytes() == b"docx"
+
+
+def test_sin_persistir_no_escribe_en_outputs(monkeypatch):
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso([]))
+    cliente = TestClient(app)
+
+    respuesta = cliente.get("/generar-reporte", params={"fresco": True, "persistir": False})
+    id_trabajo = respuesta.headers["X-Reporte-Trabajo"]
+    jobs.esperar_trabajo(id_trabajo, timeout=5)
+
+    assert respuesta.content == b"docx"
+    assert not Path("outputs").exists()
+    assert cliente.get(f"/trabajos/{id_trabajo}/resultado").content == b"docx"
+
+
+def test_motor_none_y_motor_por_defecto_comparten_trabajo(monkeypatch):
+    from app.extractor import MOTOR_POR_DEFECTO
+
+    liberar = Event()
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso([], liberar))
+
+    primero, nuevo = jobs.enviar_trabajo(motor=None)
+    segundo, unido = jobs.enviar_trabajo(motor=MOTOR_POR_DEFECTO)
+    liberar.set()
+
+    assert nuevo and not unido
+    assert segundo["id"] == primero["id"]
+
+
+def test_detener_cancela_la_cola_sin_esperar_de_mas(monkeypatch):
+    liberar = Event()
+    monkeypatch.setattr(jobs, "JOBS_WORKERS", 1)
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso([], liberar))
+
+    corriendo, _ = jobs.enviar_trabajo(motor="http")
+    en_cola, _ = jobs.enviar_trabajo(motor="playwright")
+
+    inicio = time.monotonic()
+    jobs.detener_trabajos(timeout=0.2)
+    assert time.monotonic() - inicio < 2
+
+    cancelado = jobs.esperar_trabajo(en_cola["id"], timeout=0)
+    assert cancelado["estado"] == jobs.FALLIDO
+    assert en_cola["id"] not in jobs._en_curso.values()
+    assert en_cola["id"] not in jobs._terminados
+
+    liberar.set()
+    assert jobs.esperar_trabajo(corriendo["id"], timeout=5)["estado"] == jobs.COMPLETADO
+
+
+def test_tarea_programada_corre_en_la_cola(monkeypatch):
+    from app import scheduler
+
+    llamadas = []
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", _pipeline_falso(llamadas))
+    monkeypatch.setattr(scheduler, "_tareas", {})
+    tarea = scheduler._construir_tarea("t", "0 * * * *", zona="UTC", motor="http")
+    tarea["en_ejecucion"] = True
+    scheduler._tareas["t"] = tarea
+
+    scheduler._correr_tarea("t", datetime.now(timezone.utc))
+
+    assert llamadas == ["http"]
+    assert tarea["ultimo_estado"] == "EXITOSO"
+    assert tarea["en_ejecucion"] is False
+    assert len(jobs._trabajos) == 1
@@ -0,0 +1,71 @@
+#test_logger.py
+
+import logging
+from pathlib import Path
+from app import logger as modulo_logger
+from app import scheduler
+
+
+def _leer_log() -> str:
+    ruta = Path("logs/app.log")
+    return ruta.read_text(encoding="utf-8") if ruta.exists() else ""
+
+
+def test_logging_se_recrea_despues_de_detener():
+    log = modulo_logger.configurar_logger("prueba_logger")
+
+    modulo_logger.detener_logging()
+    assert modulo_logger._handler_cola is None
+    assert log.handlers == []
+
+    modulo_logger.iniciar_logging()
+    log.info("después del reinicio")
+    modulo_logger.detener_logging()
+
+    assert "después del reinicio" in _leer_log()
+    modulo_logger.iniciar_logging()
+    assert len(log.handlers) == 1
+    assert len(logging.getLogger("scheduler").handlers) == 1
+
+
+def test_configurar_logger_no_duplica_handler():
+    log = modulo_logger.configurar_logger("prueba_logger")
+    modulo_logger.configurar_logger("prueba_logger")
+
+    assert len(log.handlers) == 1
+
+
+def test_pipeline_restaura_contexto_si_falla_el_historial(monkeypatch):
+    from app import extractor
+
+    def historial_roto(**registro):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(extractor, "extraer_tabla_completa", lambda motor=None: [])
+    monkeypatch.setattr(scheduler, "log_ejecución_pipeline", historial_roto)
+
+    assert scheduler.ejecutar_pipeline() is None
+    assert modulo_logger._contexto_log.get() == {}
+
+
+def test_traza_de_excepcion_llega_al_json(monkeypatch):
+    import json
+
+    monkeypatch.setattr(modulo_logger, "LOG_FORMATO", "json")
+    modulo_logger.detener_logging()
+    modulo_logger.iniciar_logging()
+    log = modulo_logger.configurar_logger("prueba_logger")
+
+    try:
+        raise ValueError("fallo de prueba")
+    except ValueError:
+        log.exception("algo falló")
+
+    modulo_logger.detener_logging()
+    monkeypatch.setattr(modulo_logger, "LOG_FORMATO", "texto")
+    modulo_logger.iniciar_logging()
+
+    registro = [json.loads(linea) for linea in _leer_log().splitlines() if "algo falló" in linea][0]
+    assert registro["mensaje"] == "algo falló"
+    assert "ValueError: fallo de prueba" in registro["excepcion"]
+    assert "Traceback" in registro["excepcion"]
@@ -0,0 +1,68 @@
+#test_processor.py
+
+import polars as pl
+from app import processor, snapshots
+
+
+def _fila(pais: str, poblacion_2024: str, poblacion_2023: str = "1,000") -> dict:
+    return {
+        "pais": pais,
+        "poblacion_2023": poblacion_2023,
+        "poblacion_2024": poblacion_2024,
+        "cambio_porcentual": "−0.5%",
+        "continente": "Asia",
+        "region": "Asia oriental"
+    }
+
+
+def test_plan_limpia_y_ordena_segun_esquema():
+    crudo = pl.DataFrame([_fila("A", "10,000"), _fila("B", "30,000"), _fila("C", "n/d")])
+    df = processor.construir_plan(crudo.lazy()).collect()
+
+    assert df["pais"].to_list() == ["B", "A"]
+    assert df["poblacion_2024"].dtype == pl.Int64
+    assert df["cambio_porcentual"].to_list() == [-0.5, -0.5]
+
+
+def test_orden_ascendente_desde_esquema():
+    esquema = [{"columna": "pais", "tipo": "texto", "orden": "ascendente"}]
+    df = processor.ordenar(pl.DataFrame({"pais": ["b", "c", "a"]}), esquema)
+
+    assert df["pais"].to_list() == ["a", "b", "c"]
+
+
+def test_procesar_incremental_cuenta_fallos_de_parseo():
+    filas = [_fila("A", "10,000", poblacion_2023="abc"), _fila("B", "x"), _fila("C", "5,000")]
+    df, _ = snapshots.procesar_incremental(filas)
+
+    fallos = processor.obtener_fallos_parseo()
+    assert df["pais"].to_list() == ["A", "C"]
+    assert fallos["filas"] == 3
+    assert fallos["fallos"]["poblacion_2023"] == 1
+    assert fallos["fallos"]["poblacion_2024"] == 1
+    assert fallos["fallos"]["cambio_porcentual"] == 0
+
+
+def test_fallos_solo_de_filas_nuevas():
+    snapshots.procesar_incremental([_fila("A", "10,000", poblacion_2023="abc")])
+    snapshots.procesar_incremental([_fila("A", "10,000", poblacion_2023="abc"), _fila("B", "2,000")])
+
+    fallos = processor.obtener_fallos_parseo()
+    assert fallos["filas"] == 1
+    assert fallos["fallos"]["poblacion_2023"] == 0
+
+
+def test_procesar_datos_limpia_y_registra_fallos():
+    df = processor.procesar_datos([_fila("A", "10,000"), _fila("B", "30,000"), _fila("C", "n/d")])
+
+    assert df["pais"].to_list() == ["B", "A"]
+    assert processor.obtener_fallos_parseo()["fallos"]["poblacion_2024"] == 1
+
+
+def test_fuente_identica_no_deja_fallos_viejos():
+    filas = [_fila("A", "10,000", poblacion_2023="abc")]
+    snapshots.procesar_incremental(filas, hash_fuente="h1")
+    assert processor.obtener_fallos_parseo()["fallos"]["poblacion_2023"] == 1
+
+    snapshots.procesar_incremental(filas, hash_fuente="h1")
+    assert processor.obtener_fallos_parseo() == {"filas": 0, "fallos": {}}
@@ -0,0 +1,58 @@
+#test_report_cache.py
+
+import polars as pl
+from pathlib import Path
+from app import report_cache
+from app.generator import nombre_reporte
+
+
+def _df() -> pl.DataFrame:
+    return pl.DataFrame({"pais": ["Perú", "Chile"], "poblacion_2024": [34_000_000, 19_000_000]})
+
+
+def _reporte(nombre: str, contenido: bytes) -> str:
+    report_cache.OUTPUTS_DIR.mkdir(exist_ok=True)
+    ruta = report_cache.OUTPUTS_DIR / nombre
+    ruta.write_bytes(contenido)
+    return str(ruta)
+
+
+def test_clave_depende_del_diff():
+    sin_cambios = {"primera_ejecucion": False, "sin_cambios": True, "fecha_anterior": "2026-01-01"}
+    con_cambios = {**sin_cambios, "sin_cambios": False, "cambiados": [{"pais": "Perú"}]}
+
+    assert report_cache.clave_reporte(_df(), sin_cambios) == report_cache.clave_reporte(_df(), dict(sin_cambios))
+    assert report_cache.clave_reporte(_df(), sin_cambios) != report_cache.clave_reporte(_df(), con_cambios)
+    assert report_cache.clave_reporte(_df()) != report_cache.clave_reporte(_df(), sin_cambios)
+
+
+def test_hit_y_miss():
+    ruta = _reporte("a.docx", b"reporte a")
+    report_cache.registrar_reporte("clave-a", ruta)
+
+    assert report_cache.buscar_reporte("clave-a") == ruta
+    assert report_cache.buscar_reporte("clave-b") is None
+
+
+def test_archivo_reemplazado_es_miss():
+    ruta = _reporte("a.docx", b"reporte a")
+    report_cache.registrar_reporte("clave-a", ruta)
+
+    #otro reporte con el mismo nombre y tamaño pisó el archivo
+    Path(ruta).write_bytes(b"reporte b")
+
+    assert report_cache.buscar_reporte("clave-a") is None
+    assert "clave-a" not in report_cache._leer_indice()
+
+
+def test_archivo_borrado_es_miss():
+    ruta = _reporte("a.docx", b"reporte a")
+    report_cache.registrar_reporte("clave-a", ruta)
+    Path(ruta).unlink()
+
+    assert report_cache.buscar_reporte("clave-a") is None
+
+
+def test_nombres_no_chocan_en_el_mismo_segundo():
+    assert nombre_reporte() != nombre_reporte()
+    assert nombre_reporte("abc123").endswith("_abc123.docx")
@@ -0,0 +1,85 @@
+#test_run_history.py
+
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app import run_history
+
+
+@pytest.fixture(autouse=True)
+def base_temporal(tmp_path, monkeypatch):
+    """Base nueva por test (la conexión se cachea por hilo y la inicialización por proceso)."""
+    monkeypatch.setattr(run_history, "HISTORIAL_DB", tmp_path / "historial.db")
+    monkeypatch.setattr(run_history, "_inicializada", False)
+    _cerrar_conexion()
+    yield
+    _cerrar_conexion()
+
+
+def _cerrar_conexion():
+    conexion = getattr(run_history._local, "conexion", None)
+    if conexion is not None:
+        conexion.close()
+        run_history._local.conexion = None
+
+
+def _registrar(dia: str, duraciones: list, estado: str = "EXITOSO"):
+    for i, duracion in enumerate(duraciones):
+        run_history.registrar_ejecucion({
+            "timestamp": f"{dia}T10:00:{i:02d}",
+            "estado": estado,
+            "duracion_segundos": duracion,
+            "run_id": f"{dia}-{i}"
+        })
+
+
+def test_paginacion_por_id():
+    _registrar("2026-01-01", list(range(5)))
+
+    primera = run_history.consultar_ejecuciones(limite=2)
+    segunda = run_history.consultar_ejecuciones(limite=2, antes_de=primera["siguiente"])
+    ultima = run_history.consultar_ejecuciones(limite=2, antes_de=segunda["siguiente"])
+
+    ids = [e["id"] for pagina in (primera, segunda, ultima) for e in pagina["ejecuciones"]]
+    assert ids == [5, 4, 3, 2, 1]
+    assert ultima["siguiente"] is None
+
+
+def test_percentiles_por_dia():
+    _registrar("2026-01-01", [float(d) for d in range(1, 21)])
+    _registrar("2026-01-01", [None], estado="FALLIDO")
+
+    dia = run_history.estadisticas_diarias()["dias"][0]
+
+    assert dia["total"] == 21
+    assert dia["exitosos"] == 20
+    assert dia["duracion_p50"] == 10.0
+    assert dia["duracion_p95"] == 19.0
+    assert dia["duracion_max"] == 20.0
+
+
+def test_compactar_combina_con_el_resumen_existente():
+    dia = (datetime.now() - timedelta(days=10)).date().isoformat()
+    _registrar(dia, [1.0, 3.0])
+    assert run_history.compactar(dias_detalle=5) == {"dias_compactados": 1, "filas_eliminadas": 2}
+
+    #más ejecuciones de ese mismo día llegan después (ej. importadas)
+    _registrar(dia, [5.0, 7.0], estado="FALLIDO")
+    run_history.compactar(dias_detalle=5)
+
+    resumen = run_history.estadisticas_diarias(desde=dia, hasta=dia)["dias"]
+    assert run_history.consultar_ejecuciones()["ejecuciones"] == []
+    assert len(resumen) == 1
+    assert resumen[0]["total"] == 4
+    assert resumen[0]["exitosos"] == 2
+    assert resumen[0]["duracion_max"] == 7.0
+
+
+def test_fecha_invalida_es_400():
+    from app.main import app
+
+    cliente = TestClient(app)
+
+    assert cliente.get("/historial", params={"hasta": "mañana"}).status_code == 400
+    assert cliente.get("/historial/estadisticas", params={"hasta": "2026-13-01"}).status_code == 400
+    assert cliente.get("/historial", params={"hasta": "2026-01-31"}).status_code == 200
@@ -0,0 +1,151 @@
+#test_scheduler.py
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app import scheduler
+
+INICIO = datetime(2026, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+
+class PoolFalso:
+    """Registra lo que se envía sin correrlo (la tarea queda 'en ejecución')."""
+
+    def __init__(self):
+        self.enviadas = []
+
+    def submit(self, funcion, id_tarea, programada):
+        self.enviadas.append(programada)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    falso = PoolFalso()
+    monkeypatch.setattr(scheduler, "_obtener_executor", lambda: falso)
+    monkeypatch.setattr(scheduler, "_tareas", {})
+    return falso
+
+
+def _tarea(perdidas: str = "una", solapamiento: str = "saltar") -> dict:
+    tarea = scheduler._construir_tarea("t", "0 * * * *", zona="UTC", perdidas=perdidas, solapamiento=solapamiento)
+    tarea["proxima"] = INICIO
+    scheduler._tareas["t"] = tarea
+    return tarea
+
+
+def _despachar(atraso_seg: float):
+    #tres horas perdidas (00:00, 01:00, 02:00) más la de las 03:00
+    with scheduler._condicion:
+        scheduler._despachar(INICIO + timedelta(hours=3, seconds=atraso_seg))
+
+
+def test_perdidas_saltar_a_tiempo_corre_solo_la_actual(pool):
+    tarea = _tarea(perdidas="saltar")
+    _despachar(10)
+
+    assert pool.enviadas == [INICIO + timedelta(hours=3)]
+    assert tarea["proxima"] == INICIO + timedelta(hours=4)
+    assert tarea["ultima_programada"] == (INICIO + timedelta(hours=3)).isoformat()
+
+
+def test_perdidas_saltar_atrasada_no_corre(pool):
+    _tarea(perdidas="saltar")
+    _despachar(300)
+
+    assert pool.enviadas == []
+
+
+def test_perdidas_una_junta_todo_en_una(pool):
+    _tarea(perdidas="una")
+    _despachar(300)
+
+    assert pool.enviadas == [INICIO + timedelta(hours=3)]
+
+
+@pytest.mark.parametrize("solapamiento, pendientes, omitidas", [
+    ("saltar", 0, 3),
+    ("encolar", 3, 0),
+    ("fusionar", 1, 0)
+])
+def test_perdidas_todas_segun_solapamiento(pool, solapamiento, pendientes, omitidas):
+    tarea = _tarea(perdidas="todas", solapamiento=solapamiento)
+    _despachar(10)
+
+    #la primera se lanza; las otras tres llegan mientras corre
+    assert pool.enviadas == [INICIO]
+    assert tarea["en_ejecucion"] is True
+    assert tarea["pendientes"] == pendientes
+    assert tarea["omitidas"] == omitidas
+
+
+def test_encolar_respeta_maximo(pool, monkeypatch):
+    monkeypatch.setattr(scheduler, "MAX_PENDIENTES", 2)
+    tarea = _tarea(perdidas="todas", solapamiento="encolar")
+    _despachar(10)
+
+    assert tarea["pendientes"] == 2
+    assert tarea["omitidas"] == 1
+
+
+def test_editar_tarea_borra_zona_y_conserva_lo_demas(pool):
+    _tarea()
+    editada = scheduler.editar_tarea("t", zona=None)
+
+    assert editada["zona"] is None
+    assert editada["cron"] == "0 * * * *"
+
+    editada = scheduler.editar_tarea("t", motor="http")
+    assert editada["motor"] == "http"
+    assert editada["zona"] is None
+
+
+def test_put_con_campo_vacio_lo_borra(pool):
+    from app.main import app
+
+    _tarea()
+    scheduler.editar_tarea("t", motor="http")
+    cliente = TestClient(app)
+
+    sin_motor = cliente.put("/scheduler/tareas/t", params={"motor": ""}).json()
+    assert sin_motor["motor"] is None
+    assert sin_motor["zona"] == "UTC"
+
+    assert cliente.put("/scheduler/tareas/t", params={"zona": ""}).json()["zona"] is None
+    assert cliente.put("/scheduler/tareas/t", params={"solapamiento": "x"}).status_code == 400
+
+
+def test_detener_no_espera_mas_del_limite(pool, monkeypatch):
+    import time
+
+    class PoolConCierre(PoolFalso):
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.wait = wait
+
+    ejecutor = PoolConCierre()
+    monkeypatch.setattr(scheduler, "_executor", ejecutor)
+    monkeypatch.setattr(scheduler, "ESPERA_CIERRE_SEG", 0.2)
+    _tarea()["en_ejecucion"] = True
+
+    inicio = time.monotonic()
+    scheduler.detener_scheduler()
+
+    assert ejecutor.wait is False
+    assert time.monotonic() - inicio < 2
+
+
+def test_cargar_descarta_registros_invalidos(pool, monkeypatch, tmp_path):
+    import json
+
+    archivo = tmp_path / "programaciones.json"
+    archivo.write_text(json.dumps([
+        {"cron": "0 * * * *"},
+        {"id": "fecha_mala", "cron": "0 * * * *", "ultima_programada": "ayer"},
+        {"id": "sin_zona", "cron": "0 * * * *", "ultima_programada": "2026-01-01T00:00:00"},
+        {"id": "ok", "cron": "0 * * * *", "zona": "UTC", "ultima_programada": INICIO.isoformat()}
+    ]), encoding="utf-8")
+    monkeypatch.setattr(scheduler, "PROGRAMACIONES_ARCHIVO", archivo)
+
+    scheduler._cargar_tareas()
+
+    assert list(scheduler._tareas) == ["ok"]
+    assert scheduler._tareas["ok"]["proxima"] == INICIO + timedelta(hours=1)
@@ -0,0 +1,80 @@
+#test_snapshots.py
+
+import polars as pl
+from app import snapshots
+
+
+def _crudo(poblaciones: dict) -> list:
+    """Filas en el formato del extractor."""
+    return [
+        {
+            "pais": pais,
+            "poblacion_2023": f"{poblacion - 1000:,}",
+            "poblacion_2024": f"{poblacion:,}",
+            "cambio_porcentual": "+1.0%",
+            "continente": "América",
+            "region": "Sudamérica"
+        }
+        for pais, poblacion in poblaciones.items()
+    ]
+
+
+def test_primera_ejecucion():
+    df, diff = snapshots.procesar_incremental(_crudo({"Perú": 34_000_000, "Chile": 19_000_000}))
+
+    assert df["pais"].to_list() == ["Perú", "Chile"]
+    assert diff["primera_ejecucion"] is True
+    assert snapshots.RUTA_SNAPSHOT.exists()
+
+
+def test_diff_entre_ejecuciones():
+    snapshots.procesar_incremental(_crudo({"Perú": 34_000_000, "Chile": 19_000_000, "Bolivia": 12_000_000}))
+    df, diff = snapshots.procesar_incremental(_crudo({"Perú": 34_500_000, "Chile": 19_000_000, "Uruguay": 3_400_000}))
+
+    assert diff["agregados"] == ["Uruguay"]
+    assert diff["eliminados"] == ["Bolivia"]
+    assert [c["pais"] for c in diff["cambiados"]] == ["Perú"]
+    assert diff["cambiados"][0]["poblacion_2024_anterior"] == 34_000_000
+    assert diff["total_cambios"] == 3
+    assert df.height == 3
+
+
+def test_misma_fuente_no_recalcula():
+    crudo = _crudo({"Perú": 34_000_000})
+    snapshots.procesar_incremental(crudo, hash_fuente="abc")
+
+    df, diff = snapshots.procesar_incremental(None, hash_fuente="abc")
+
+    assert df["pais"].to_list() == ["Perú"]
+    assert diff["sin_cambios"] is True
+
+
+def test_pais_repetido_no_multiplica_cambios():
+    columnas = {"pais": ["Perú", "Perú"], "poblacion_2024": [2, 1], "cambio_porcentual": [0.1, 0.1], "_hash_fila": [10, 11]}
+    anterior = pl.DataFrame({**columnas, "_hash_fila": [20, 21]})
+    actual = pl.DataFrame(columnas)
+
+    diff = snapshots.calcular_diff(anterior, actual)
+
+    assert len(diff["cambiados"]) == 1
+    assert diff["cambiados"][0]["poblacion_2024"] == 2
+
+
+def test_guardar_snapshot_no_deja_temporales():
+    snapshots.procesar_incremental(_crudo({"Perú": 34_000_000}))
+
+    assert not list(snapshots.SNAPSHOT_DIR.glob("*.tmp"))
+
+
+def test_cambio_de_limpieza_reprocesa_aunque_la_fuente_sea_igual(monkeypatch):
+    crudo = _crudo({"Perú": 34_000_000})
+    snapshots.procesar_incremental(crudo, hash_fuente="h1")
+
+    monkeypatch.setattr(snapshots, "VERSION_LIMPIEZA", snapshots.VERSION_LIMPIEZA + 1)
+    _, diff = snapshots.procesar_incremental(crudo, hash_fuente="h1")
+    assert diff["primera_ejecucion"] is True
+    assert snapshots.cargar_snapshot()[1]["version_limpieza"] == snapshots.VERSION_LIMPIEZA
+
+    monkeypatch.setattr(snapshots, "hash_esquema", lambda: "otro")
+    _, diff = snapshots.procesar_incremental(crudo, hash_fuente="h1")
+    assert diff["primera_ejecucion"] is True
@@ -0,0 +1,136 @@
+#test_source_cache.py
+
+import pytest
+from app import source_cache
+
+URL = "https://ejemplo.org/poblacion"
+
+
+class RespuestaFalsa:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def red(monkeypatch):
+    """Reemplaza requests.get; registra los headers de cada llamada."""
+    llamadas = []
+    respuestas = []
+
+    def get(url, headers=None, timeout=None):
+        llamadas.append(headers or {})
+        respuesta = respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+    monkeypatch.setattr(source_cache.requests, "get", get)
+    return llamadas, respuestas
+
+
+def test_primera_descarga_guarda_copia(red):
+    llamadas, respuestas = red
+    respuestas.append(RespuestaFalsa(content=b"<html>v1</html>", headers={"ETag": '"v1"'}))
+
+    resultado = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    assert resultado["origen"] == "red"
+    assert resultado["cambiado"] is True
+    assert source_cache.leer_contenido(URL) == b"<html>v1</html>"
+    assert "If-None-Match" not in llamadas[0]
+
+
+def test_dentro_del_ttl_no_toca_la_red(red):
+    llamadas, respuestas = red
+    respuestas.append(RespuestaFalsa(content=b"<html>v1</html>"))
+    source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    resultado = source_cache.obtener_fuente(URL, ttl_seg=3600, offline=False)
+
+    assert resultado["origen"] == "cache"
+    assert len(llamadas) == 1
+
+
+def test_get_condicional_y_304(red):
+    llamadas, respuestas = red
+    respuestas.append(RespuestaFalsa(content=b"<html>v1</html>", headers={"ETag": '"v1"'}))
+    primera = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    respuestas.append(RespuestaFalsa(status_code=304))
+    segunda = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    assert llamadas[1]["If-None-Match"] == '"v1"'
+    assert segunda["origen"] == "304"
+    assert segunda["hash"] == primera["hash"]
+    assert segunda["cambiado"] is False
+
+
+def test_contenido_nuevo_marca_cambiado(red):
+    _, respuestas = red
+    respuestas.append(RespuestaFalsa(content=b"<html>v1</html>"))
+    primera = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    respuestas.append(RespuestaFalsa(content=b"<html>v2</html>"))
+    segunda = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    assert segunda["cambiado"] is True
+    assert segunda["hash"] != primera["hash"]
+
+
+def test_sin_red_usa_la_copia(red):
+    _, respuestas = red
+    respuestas.append(RespuestaFalsa(content=b"<html>v1</html>"))
+    source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    respuestas.append(ConnectionError("sin red"))
+    resultado = source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+    assert resultado["origen"] == "offline"
+
+
+def test_sin_red_ni_copia_propaga_el_error(red):
+    _, respuestas = red
+    respuestas.append(ConnectionError("sin red"))
+
+    with pytest.raises(ConnectionError):
+        source_cache.obtener_fuente(URL, ttl_seg=0, offline=False)
+
+
+def test_modo_offline(tmp_path):
+    assert source_cache.obtener_fuente(URL, offline=True) is None
+
+    fixture = tmp_path / "pagina.html"
+    fixture.write_bytes(b"<html>fixture</html>")
+    meta = source_cache.importar_fixture(fixture, URL)
+
+    resultado = source_cache.obtener_fuente(URL, offline=True)
+    assert resultado["origen"] == "offline"
+    assert resultado["hash"] == meta["hash"]
+
+
+def test_filas_asociadas_al_hash():
+    source_cache.guardar_filas(URL, "hash-a", [{"pais": "Perú"}])
+
+    assert source_cache.leer_filas(URL, "hash-a") == [{"pais": "Perú"}]
+    assert source_cache.leer_filas(URL, "hash-b") is None
+
+
+def test_escrituras_no_dejan_temporales():
+    source_cache.guardar_filas(URL, "hash-a", [])
+    source_cache._guardar_contenido(URL, b"<html></html>")
+
+    assert not list(source_cache.CACHE_DIR.glob("*.tmp"))
+
+
+def test_temporales_unicos_por_escritura():
+    from app.archivos import ruta_temporal
+
+    ruta = source_cache.CACHE_DIR / "x.json"
+    assert ruta_temporal(ruta) != ruta_temporal(ruta)
+    assert ruta_temporal(ruta).name.startswith("x.json.")
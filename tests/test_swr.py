@@ -0,0 +1,69 @@
+#test_swr.py
+
+import os
+import time
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from app import jobs, main
+
+
+@pytest.fixture(autouse=True)
+def pipeline_falso(monkeypatch, trabajos_limpios):
+    llamadas = []
+
+    def ejecutar_pipeline(motor=None, al_cambiar_etapa=None, perfilar=None, cprofile=None, persistir=True, al_generar=None):
+        llamadas.append(motor)
+        if al_generar:
+            al_generar("nuevo.docx", b"nuevo")
+        Path("outputs").mkdir(exist_ok=True)
+        ruta = Path("outputs") / "nuevo.docx"
+        ruta.write_bytes(b"nuevo")
+        return str(ruta)
+
+    monkeypatch.setattr(jobs, "ejecutar_pipeline", ejecutar_pipeline)
+    return llamadas
+
+
+def _reporte_previo(edad_seg: float):
+    Path("outputs").mkdir(exist_ok=True)
+    ruta = Path("outputs") / "previo.docx"
+    ruta.write_bytes(b"previo")
+    modificado = time.time() - edad_seg
+    os.utime(ruta, (modificado, modificado))
+    return ruta
+
+
+def test_reporte_fresco_se_sirve_sin_pipeline(pipeline_falso):
+    _reporte_previo(5)
+
+    respuesta = TestClient(main.app).get("/generar-reporte")
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == b"previo"
+    assert respuesta.headers["X-Reporte-Estado"] == "fresco"
+    assert pipeline_falso == []
+
+
+def test_motor_explicito_no_usa_el_ultimo_reporte(pipeline_falso):
+    _reporte_previo(5)
+
+    respuesta = TestClient(main.app).get("/generar-reporte", params={"motor": "http"})
+
+    assert respuesta.content == b"nuevo"
+    assert pipeline_falso == ["http"]
+
+
+def test_reporte_borrado_durante_la_busqueda_es_miss(pipeline_falso, monkeypatch):
+    ruta = _reporte_previo(5)
+
+    def ultimo_reporte_borrado():
+        ruta.unlink()
+        return str(ruta), 5.0
+
+    monkeypatch.setattr(main, "ultimo_reporte", ultimo_reporte_borrado)
+    respuesta = TestClient(main.app).get("/generar-reporte")
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == b"nuevo"
+    assert pipeline_falso == [None]